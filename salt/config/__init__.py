@@ -400,6 +400,9 @@ VALID_OPTS = immutabletypes.freeze({
     # The TCP port for mworkers to connect to on the master
     'tcp_master_workers': int,
 
+    # The number of processes the TCP transport publishes to the connected minions from
+    'tcp_pub_processes': int,
+
     # The file to send logging data to
     'log_file': six.string_types,
 
@@ -481,6 +484,31 @@ VALID_OPTS = immutabletypes.freeze({
     # When true, states run in the order defined in an SLS file, unless requisites re-order them
     'state_auto_order': bool,
 
+    # The number of states which may run at the same time, states only wait
+    # for the states they require
+    'state_concurrency': int,
+
+    # Skip the states whose inputs did not change since they last succeeded
+    'state_incremental': bool,
+
+    # Reuse the rendered highstate while the SLS files, grains and pillar it
+    # was rendered from do not change
+    'state_render_cache': bool,
+
+    # Run the pkg states of a state run which do not depend on other states
+    # as one package manager transaction
+    'state_pkg_batch': bool,
+
+    # Record the time spent in each phase of the states and of the state run
+    'state_profile': bool,
+
+    # Send the state returns to the master in frames while the state run is
+    # in progress, the return of the job only holds a summary
+    'state_stream': bool,
+
+    # The number of state returns sent in one frame by state_stream
+    'state_stream_batch': int,
+
     # Fire events as state chunks are processed by the state compiler
     'state_events': bool,
 
@@ -621,6 +649,21 @@ VALID_OPTS = immutabletypes.freeze({
     # the number of connected minions increases.
     'worker_threads': int,
 
+    # The number of minion sign ins per second the master admits, the other minions are told
+    # when to sign in again. 0 admits every sign in.
+    'auth_rate': float,
+
+    # The longest a master busy signing in minions tells them to wait, and the longest a minion
+    # waits when told to
+    'auth_retry_after_max': float,
+
+    # The number of accepted minion public keys each MWorker keeps in memory
+    'auth_key_cache_size': int,
+
+    # Additional MWorker processes dedicated to a class of requests: auth, file,
+    # pillar or return. Other requests are served by the worker_threads workers.
+    'worker_pools': dict,
+
     # The port for the master to listen to returns on. The minion needs to connect to this port
     # to send returns.
     'ret_port': int,
@@ -742,6 +785,13 @@ VALID_OPTS = immutabletypes.freeze({
     # Specify a list of external pillar systems to use
     'ext_pillar': list,
 
+    # Run the external pillars concurrently instead of one after the other
+    'ext_pillar_parallel': bool,
+
+    # The time in seconds after which an external pillar run concurrently is
+    # abandoned, either for all of them or per external pillar name
+    'ext_pillar_timeout': (type(None), int, float, dict),
+
     # Reserved for future use to version the pillar structure
     'pillar_version': int,
 
@@ -757,6 +807,25 @@ VALID_OPTS = immutabletypes.freeze({
     # Pillar cache backend. Defaults to `disk` which stores caches in the master cache
     'pillar_cache_backend': six.string_types,
 
+    # Keep cached pillars until the grains of the minion or the pillar files
+    # change instead of only expiring them after `pillar_cache_ttl`
+    'pillar_cache_fingerprint': bool,
+
+    # The ext_pillars whose data may be cached when `pillar_cache_fingerprint`
+    # is True
+    'pillar_cache_ext_pillar': list,
+
+    # Share the rendered data of pillar SLS files which do not depend on the
+    # minion between the pillars compiled by a master process
+    'pillar_render_cache': bool,
+
+    # Globs of pillar SLS names whose rendered data may be shared even though
+    # they hold template syntax
+    'pillar_render_cache_static': list,
+
+    # The maximum number of rendered pillar SLS files kept per process
+    'pillar_render_cache_size': int,
+
     'pillar_safe_render_error': bool,
 
     # When creating a pillar, there are several strategies to choose from when
@@ -858,12 +927,40 @@ VALID_OPTS = immutabletypes.freeze({
     # Specify whether the master should store end times for jobs as returns come in
     'job_cache_store_endtime': bool,
 
+    # Maintain an sqlite index of the local job cache to list and expire jobs
+    # without walking the job cache directories
+    'job_cache_index': bool,
+
+    # Write the returns received by the master workers to the master job cache
+    # in batches from a dedicated process
+    'master_job_cache_batch': bool,
+
+    # The maximum number of returns written to the master job cache at once
+    'master_job_cache_batch_size': int,
+
+    # How long to wait for more returns before writing a batch, in seconds
+    'master_job_cache_batch_wait': float,
+
+    # The maximum number of returns waiting to be written to the master job
+    # cache before the master workers write them synchronously
+    'master_job_cache_queue_size': int,
+
     # The minion data cache is a cache of information about the minions stored on the master.
     # This information is primarily the pillar and grains data. The data is cached in the master
     # cachedir under the name of the minion and used to predetermine what minions are expected to
     # reply from executions.
     'minion_data_cache': bool,
 
+    # Keep an in-memory inverted index of the minion data cache on the master to
+    # resolve grain and pillar targets without reading the cache of every minion
+    'minion_data_index': bool,
+
+    # Number of journal entries after which the minion data index is compacted
+    'minion_data_index_compact': int,
+
+    # Number of compiled compound targets kept in memory by each master process
+    'compound_cache_size': int,
+
     # The number of seconds between AES key rotations on the master
     'publish_session': int,
 
@@ -976,6 +1073,16 @@ VALID_OPTS = immutabletypes.freeze({
     # If set, the master will sign all publications before they are sent out
     'sign_pub_messages': bool,
 
+    # The AEAD ciphers to use the session key with, in order of preference. The
+    # minion offers them when signing in and the master picks one of them.
+    'session_ciphers': list,
+
+    # The cipher the master encrypts publications with, cbc or an AEAD cipher
+    'publish_cipher': six.string_types,
+
+    # The signature the master signs publications with, rsa or ed25519
+    'publish_signing_algorithm': six.string_types,
+
     # The size of key that should be generated when creating new keys
     'keysize': int,
 
@@ -1051,6 +1158,15 @@ VALID_OPTS = immutabletypes.freeze({
     # Use zmq.SUSCRIBE to limit listening sockets to only process messages bound for them
     'zmq_filtering': bool,
 
+    # Resolve targets on the master and only write publications to the matching
+    # minions connected to the TCP transport
+    'publish_filtering': bool,
+
+    # The fraction of the accepted minions which must be in the minion data cache
+    # for targets matched on cached data to be resolved on the master when
+    # filtering publications, they are broadcast otherwise
+    'publish_filter_coverage': float,
+
     # Connection caching. Can greatly speed up salt performance.
     'con_cache': bool,
     'rotate_aes_key': bool,
@@ -1240,6 +1356,7 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'master_failback_interval': 0,
     'verify_master_pubkey_sign': False,
     'sign_pub_messages': False,
+    'session_ciphers': [],
     'always_verify_signature': False,
     'master_sign_key_name': 'master_sign',
     'syndic_finger': '',
@@ -1419,12 +1536,20 @@ DEFAULT_MINION_OPTS = immutabletypes.freeze({
     'state_output': 'full',
     'state_output_diff': False,
     'state_auto_order': True,
+    'state_concurrency': 0,
+    'state_incremental': False,
+    'state_render_cache': False,
+    'state_pkg_batch': False,
+    'state_profile': False,
+    'state_stream': False,
+    'state_stream_batch': 100,
     'state_events': False,
     'state_aggregate': False,
     'snapper_states': False,
     'snapper_states_config': 'root',
     'acceptance_wait_time': 10,
     'acceptance_wait_time_max': 0,
+    'auth_retry_after_max': 60,
     'rejected_retry': False,
     'loop_interval': 1,
     'verify_env': True,
@@ -1533,6 +1658,10 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'auth_mode': 1,
     'user': _MASTER_USER,
     'worker_threads': 5,
+    'worker_pools': {},
+    'auth_rate': 0.0,
+    'auth_retry_after_max': 60,
+    'auth_key_cache_size': 10000,
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'master'),
     'sock_pool_size': 1,
     'ret_port': 4506,
@@ -1648,6 +1777,8 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'minionfs_whitelist': [],
     'minionfs_blacklist': [],
     'ext_pillar': [],
+    'ext_pillar_parallel': False,
+    'ext_pillar_timeout': None,
     'pillar_version': 2,
     'pillar_opts': False,
     'pillar_safe_render_error': True,
@@ -1657,6 +1788,11 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'pillar_cache': False,
     'pillar_cache_ttl': 3600,
     'pillar_cache_backend': 'disk',
+    'pillar_cache_fingerprint': False,
+    'pillar_cache_ext_pillar': [],
+    'pillar_render_cache': False,
+    'pillar_render_cache_static': [],
+    'pillar_render_cache_size': 1000,
     'ping_on_rotate': False,
     'peer': {},
     'preserve_minion_cache': False,
@@ -1710,7 +1846,15 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'ext_job_cache': '',
     'master_job_cache': 'local_cache',
     'job_cache_store_endtime': False,
+    'job_cache_index': False,
+    'master_job_cache_batch': False,
+    'master_job_cache_batch_size': 1000,
+    'master_job_cache_batch_wait': 0.5,
+    'master_job_cache_queue_size': 10000,
     'minion_data_cache': True,
+    'minion_data_index': False,
+    'minion_data_index_compact': 1000,
+    'compound_cache_size': 1000,
     'enforce_mine_cache': False,
     'ipc_mode': _DFLT_IPC_MODE,
     'ipc_write_buffer': _DFLT_IPC_WBUFFER,
@@ -1722,6 +1866,7 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'tcp_master_pull_port': 4513,
     'tcp_master_publish_pull': 4514,
     'tcp_master_workers': 4515,
+    'tcp_pub_processes': 1,
     'log_file': os.path.join(salt.syspaths.LOGS_DIR, 'master'),
     'log_level': 'warning',
     'log_level_logfile': None,
@@ -1753,6 +1898,11 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'state_output': 'full',
     'state_output_diff': False,
     'state_auto_order': True,
+    'state_concurrency': 0,
+    'state_incremental': False,
+    'state_render_cache': False,
+    'state_pkg_batch': False,
+    'state_profile': False,
     'state_events': False,
     'state_aggregate': False,
     'search': '',
@@ -1793,6 +1943,9 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'tcp_keepalive_cnt': -1,
     'tcp_keepalive_intvl': -1,
     'sign_pub_messages': True,
+    'session_ciphers': ['aes-gcm', 'chacha20-poly1305'],
+    'publish_cipher': 'cbc',
+    'publish_signing_algorithm': 'rsa',
     'keysize': 2048,
     'transport': 'zeromq',
     'gather_job_timeout': 10,
@@ -1821,6 +1974,8 @@ DEFAULT_MASTER_OPTS = immutabletypes.freeze({
     'master_pubkey_signature': 'master_pubkey_signature',
     'master_use_pubkey_signature': False,
     'zmq_filtering': False,
+    'publish_filtering': False,
+    'publish_filter_coverage': 1.0,
     'zmq_monitor': False,
     'con_cache': False,
     'rotate_aes_key': True,
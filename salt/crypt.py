@@ -25,7 +25,6 @@ import getpass
 import tornado.gen
 
 # Import third party libs
-from salt.ext.six.moves import zip  # pylint: disable=import-error,redefined-builtin
 from salt.ext import six
 
 try:
@@ -57,6 +56,42 @@ if not HAS_M2 and not HAS_CDOME:
         # No need for crypt in local mode
         pass
 
+# The AEAD session ciphers use cryptography, which reuses the key for every
+# message, or else pycryptodome or pycryptodomex. M2Crypto and PyCrypto do not
+# provide them.
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+    from cryptography.exceptions import InvalidSignature, InvalidTag
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+    InvalidSignature = InvalidTag = ValueError
+# Ed25519 publish signatures need cryptography
+try:
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+        Ed25519PrivateKey, Ed25519PublicKey
+    )
+    Ed25519PrivateKey.generate()
+    HAS_ED25519 = True
+except Exception:  # pylint: disable=broad-except
+    HAS_ED25519 = False
+try:
+    from Cryptodome.Cipher import AES as AEAD_AES
+except ImportError:
+    try:
+        from Crypto.Cipher import AES as AEAD_AES
+    except ImportError:
+        AEAD_AES = None
+try:
+    from Cryptodome.Cipher import ChaCha20_Poly1305
+except ImportError:
+    try:
+        from Crypto.Cipher import ChaCha20_Poly1305
+    except ImportError:
+        ChaCha20_Poly1305 = None
+
 # Import salt libs
 import salt.defaults.exitcodes
 import salt.payload
@@ -78,6 +113,29 @@ from salt.exceptions import (
 
 log = logging.getLogger(__name__)
 
+# The AEAD ciphers cryptography provides with the OpenSSL it is built against
+CRYPTOGRAPHY_AEAD = {}
+if HAS_CRYPTOGRAPHY:
+    for _name, _aead in (('aes-gcm', AESGCM), ('chacha20-poly1305', ChaCha20Poly1305)):
+        try:
+            # Raises when the OpenSSL does not support the cipher
+            _aead(os.urandom(32))
+            CRYPTOGRAPHY_AEAD[_name] = _aead
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+# The AEAD ciphers available for the session key, CBC with HMAC-SHA256 is
+# always available
+AEAD_CIPHERS = []
+if 'aes-gcm' in CRYPTOGRAPHY_AEAD or getattr(AEAD_AES, 'MODE_GCM', None) is not None:
+    AEAD_CIPHERS.append('aes-gcm')
+if 'chacha20-poly1305' in CRYPTOGRAPHY_AEAD or ChaCha20_Poly1305 is not None:
+    AEAD_CIPHERS.append('chacha20-poly1305')
+# The unavailable publish ciphers already warned about
+_WARNED_CIPHERS = set()
+# The parsed Ed25519 master keys publications are verified with
+_ED25519_PUB_KEYS = {}
+
 
 def dropfile(cachedir, user=None):
     '''
@@ -168,6 +226,49 @@ def gen_keys(keydir, keyname, keysize, user=None, passphrase=None):
     return priv
 
 
+def gen_ed25519_keys(keydir, keyname, user=None):
+    '''
+    Generate an Ed25519 keypair, used by the master to sign publications
+
+    :param str keydir: The directory to write the keypair to
+    :param str keyname: The name of the keypair files
+    :param str user: The user on the system who should own this keypair
+
+    :rtype: str
+    :return: Path on the filesystem to the private key
+    '''
+    base = os.path.join(keydir, keyname)
+    priv = '{0}.pem'.format(base)
+    pub = '{0}.pub'.format(base)
+
+    gen = Ed25519PrivateKey.generate()
+    if os.path.isfile(priv):
+        # Another process has made a key, use the winner's key
+        return priv
+
+    if not os.access(keydir, os.W_OK):
+        raise IOError('Write access denied to "{0}" for user "{1}".'.format(os.path.abspath(keydir), getpass.getuser()))
+
+    with salt.utils.files.set_umask(0o277):
+        with salt.utils.files.fopen(priv, 'wb+') as f:
+            f.write(gen.private_bytes(serialization.Encoding.PEM,
+                                      serialization.PrivateFormat.PKCS8,
+                                      serialization.NoEncryption()))
+    with salt.utils.files.fopen(pub, 'wb+') as f:
+        f.write(gen.public_key().public_bytes(serialization.Encoding.PEM,
+                                              serialization.PublicFormat.SubjectPublicKeyInfo))
+    os.chmod(priv, 0o400)
+    if user:
+        try:
+            import pwd
+            uid = pwd.getpwnam(user).pw_uid
+            os.chown(priv, uid, -1)
+            os.chown(pub, uid, -1)
+        except (KeyError, ImportError, OSError):
+            pass
+    return priv
+
+
 @salt.utils.decorators.memoize
 def _get_key_with_evict(path, timestamp, passphrase):
     '''
@@ -201,6 +302,15 @@ def get_rsa_key(path, passphrase):
     return _get_key_with_evict(path, six.text_type(os.path.getmtime(path)), passphrase)
 
 
+def get_ed25519_key(path):
+    '''
+    Read an Ed25519 private key off the disk
+    '''
+    log.debug('salt.crypt.get_ed25519_key: Loading private key')
+    with salt.utils.files.fopen(path, 'rb') as fp_:
+        return serialization.load_pem_private_key(fp_.read(), password=None, backend=default_backend())
+
+
 def get_rsa_pub_key(path):
     '''
     Read a public key off the disk.
@@ -217,6 +327,24 @@ def get_rsa_pub_key(path):
     return key
 
 
+@salt.utils.decorators.memoize
+def _get_pub_key_with_evict(path, timestamp):
+    '''
+    Load a public key from disk, memoized on the file's last modification
+    like _get_key_with_evict
+    '''
+    return get_rsa_pub_key(path)
+
+
+def get_cached_rsa_pub_key(path):
+    '''
+    Read a public key off the disk, parsing it again only when the file
+    changes. Only meant for the few keys a daemon verifies every message
+    with, like the master key on a minion.
+    '''
+    return _get_pub_key_with_evict(path, six.text_type(os.path.getmtime(path)))
+
+
 def sign_message(privkey_path, message, passphrase=None):
     '''
     Use Crypto.Signature.PKCS1_v1_5 to sign a message. Returns the signature.
@@ -233,13 +361,17 @@ def sign_message(privkey_path, message, passphrase=None):
         return signer.sign(SHA.new(salt.utils.stringutils.to_bytes(message)))
 
 
-def verify_signature(pubkey_path, message, signature):
+def verify_signature(pubkey_path, message, signature, cache=False):
     '''
     Use Crypto.Signature.PKCS1_v1_5 to verify the signature on a message.
-    Returns True for valid signature.
+    Returns True for valid signature. With ``cache`` the parsed public key
+    is kept until the key file changes.
     '''
     log.debug('salt.crypt.verify_signature: Loading public key')
-    pubkey = get_rsa_pub_key(pubkey_path)
+    if cache:
+        pubkey = get_cached_rsa_pub_key(pubkey_path)
+    else:
+        pubkey = get_rsa_pub_key(pubkey_path)
     log.debug('salt.crypt.verify_signature: Verifying signature')
     if HAS_M2:
         md = EVP.MessageDigest('sha1')
@@ -251,6 +383,71 @@ def verify_signature(pubkey_path, message, signature):
         return verifier.verify(SHA.new(salt.utils.stringutils.to_bytes(message)), signature)
 
 
+def verify_ed25519(pub, message, signature):
+    '''
+    Verify an Ed25519 signature on a message with the base64 encoded raw
+    public key ``pub``. Returns True for a valid signature.
+    '''
+    if not HAS_ED25519:
+        log.error('Ed25519 signatures need the cryptography library')
+        return False
+    if not pub:
+        return False
+    key = _ED25519_PUB_KEYS.get(pub)
+    if key is None:
+        key = Ed25519PublicKey.from_public_bytes(base64.b64decode(pub))
+        # Only the keys of the masters a minion talks to end up here
+        _ED25519_PUB_KEYS[pub] = key
+    try:
+        key.verify(signature, salt.utils.stringutils.to_bytes(message))
+    except InvalidSignature:
+        return False
+    return True
+
+
+class PublishSigner(object):
+    '''
+    Sign the publications of the master. The signing key is loaded once per
+    process and held in memory, signing with ``rsa`` uses the master key and
+    ``ed25519`` the master_ed25519 key, see ``publish_signing_algorithm``.
+    '''
+    instances = {}
+
+    def __init__(self, opts):
+        self.algorithm = opts.get('publish_signing_algorithm') or 'rsa'
+        if self.algorithm == 'ed25519':
+            path = os.path.join(opts['pki_dir'], 'master_ed25519.pem')
+            self.key = get_ed25519_key(path)
+        else:
+            self.key = get_rsa_key(os.path.join(opts['pki_dir'], 'master.pem'), None)
+            if not HAS_M2:
+                self.key = PKCS1_v1_5.new(self.key)
+
+    @classmethod
+    def get(cls, opts):
+        '''
+        Return the signer of this process for the master's pki_dir
+        '''
+        key = (opts['pki_dir'], opts.get('publish_signing_algorithm') or 'rsa')
+        signer = cls.instances.get(key)
+        if signer is None:
+            signer = cls.instances[key] = cls(opts)
+        return signer
+
+    def sign(self, message):
+        '''
+        Return the signature of the message
+        '''
+        message = salt.utils.stringutils.to_bytes(message)
+        if self.algorithm == 'ed25519':
+            return self.key.sign(message)
+        if HAS_M2:
+            md = EVP.MessageDigest('sha1')
+            md.update(message)
+            return self.key.sign(md.final())
+        return self.key.sign(SHA.new(message))
+
+
 def gen_signature(priv_path, pub_path, sign_path, passphrase=None):
     '''
     creates a signature for the given public-key with
@@ -314,6 +511,56 @@ def public_decrypt(pub, message):
         return verifier.verify(message)
 
 
+def session_ciphers(opts):
+    '''
+    Return the AEAD ciphers listed in ``session_ciphers`` which are available
+    on this host, in order of preference
+
+    :param dict opts: The master or minion configuration
+    :rtype: list
+    '''
+    return [cipher for cipher in opts.get('session_ciphers') or []
+            if cipher in AEAD_CIPHERS]
+
+
+def pick_session_cipher(opts, offered):
+    '''
+    Pick the cipher a minion uses with the session key, the first of the
+    master's ``session_ciphers`` the minion offered when signing in. Minions
+    offering none, older minions among them, keep using CBC.
+
+    :param dict opts: The master configuration
+    :param list offered: The ciphers the minion offered
+    :rtype: str
+    '''
+    if isinstance(offered, (list, tuple)):
+        for cipher in session_ciphers(opts):
+            if cipher in offered:
+                return cipher
+    return 'cbc'
+
+
+def publish_cipher(opts):
+    '''
+    Return the cipher the master encrypts the publishes with. Every minion
+    has to be able to decrypt them, the cipher is set with ``publish_cipher``
+    and CBC is used unless the cipher is available.
+
+    :param dict opts: The master configuration
+    :rtype: str
+    '''
+    cipher = opts.get('publish_cipher') or 'cbc'
+    if cipher != 'cbc' and cipher not in AEAD_CIPHERS:
+        if cipher not in _WARNED_CIPHERS:
+            _WARNED_CIPHERS.add(cipher)
+            log.warning(
+                'The publish_cipher %s is not available, publishing with '
+                'cbc. Install cryptography to use it.', cipher
+            )
+        return 'cbc'
+    return cipher
+
+
 class MasterKeys(dict):
     '''
     The Master Keys class is used to manage the RSA public key pair used for
@@ -330,6 +577,14 @@ class MasterKeys(dict):
         key_pass = salt.utils.sdb.sdb_get(self.opts['key_pass'], self.opts)
         self.key = self.__get_keys(passphrase=key_pass)
 
+        # The Ed25519 public key publications are signed with, signed with
+        # the master key for the minions to trust it
+        self.pub_ed25519 = None
+        self.pub_ed25519_sig = None
+        if opts.get('publish_signing_algorithm') == 'ed25519':
+            self.pub_ed25519 = self.__get_ed25519_pub()
+            self.pub_ed25519_sig = sign_message(self.rsa_path, self.pub_ed25519, key_pass)
+
         self.pub_signature = None
 
         # set names for the signing key-pairs
@@ -406,6 +661,26 @@ class MasterKeys(dict):
         log.debug('Loaded %s key: %s', name, path)
         return key
 
+    def __get_ed25519_pub(self):
+        '''
+        Returns the base64 encoded raw public key of the master_ed25519 key,
+        generating the key if needed
+        '''
+        if not HAS_ED25519:
+            message = ('publish_signing_algorithm is set to ed25519 but the '
+                       'cryptography library is not available')
+            log.error(message)
+            raise MasterExit(message)
+        path = os.path.join(self.opts['pki_dir'], 'master_ed25519.pem')
+        if not os.path.exists(path):
+            log.info('Generating master_ed25519 keys: %s', self.opts['pki_dir'])
+            gen_ed25519_keys(self.opts['pki_dir'],
+                             'master_ed25519',
+                             self.opts.get('user'))
+        pub = get_ed25519_key(path).public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return salt.utils.stringutils.to_str(base64.b64encode(pub))
+
     def get_pub_str(self, name='master'):
         '''
         Return the string representation of a public key
@@ -437,6 +712,20 @@ class MasterKeys(dict):
         return self.pub_signature
 
 
+def _busy_retry_after(opts, load):
+    '''
+    Return the seconds a busy master asked to wait before signing in again,
+    None if the reply holds no usable hint. The reply is not authenticated,
+    so the wait is capped at auth_retry_after_max.
+    '''
+    retry_after = load.get('retry_after')
+    if isinstance(retry_after, bool) \
+            or not isinstance(retry_after, (six.integer_types, float)) \
+            or retry_after <= 0:
+        return None
+    return min(retry_after, opts.get('auth_retry_after_max', 60))
+
+
 class AsyncAuth(object):
     '''
     Set up an Async object to maintain authentication with the salt master
@@ -498,6 +787,8 @@ class AsyncAuth(object):
         else:
             self.token = salt.utils.stringutils.to_bytes(Crypticle.generate_key_string())
         self.serial = salt.payload.Serial(self.opts)
+        # The seconds a busy master asked to wait before signing in again
+        self.retry_after = None
         self.pub_path = os.path.join(self.opts['pki_dir'], 'minion.pub')
         self.rsa_path = os.path.join(self.opts['pki_dir'], 'minion.pem')
         if self.opts['__role'] == 'syndic':
@@ -515,7 +806,7 @@ class AsyncAuth(object):
         if key in AsyncAuth.creds_map:
             creds = AsyncAuth.creds_map[key]
             self._creds = creds
-            self._crypticle = Crypticle(self.opts, creds['aes'])
+            self._crypticle = Crypticle(self.opts, creds['aes'], cipher=creds.get('cipher', 'cbc'))
             self._authenticate_future = tornado.concurrent.Future()
             self._authenticate_future.set_result(True)
         else:
@@ -607,6 +898,12 @@ class AsyncAuth(object):
                     error = exc
                     break
                 if creds == 'retry':
+                    if self.retry_after:
+                        log.info('The master is busy, waiting %s seconds '
+                                 'before retry.', self.retry_after)
+                        yield tornado.gen.sleep(self.retry_after)
+                        self.retry_after = None
+                        continue
                     if self.opts.get('detect_mode') is True:
                         error = SaltClientError('Detect mode is on')
                         break
@@ -648,7 +945,7 @@ class AsyncAuth(object):
                 key = self.__key(self.opts)
                 AsyncAuth.creds_map[key] = creds
                 self._creds = creds
-                self._crypticle = Crypticle(self.opts, creds['aes'])
+                self._crypticle = Crypticle(self.opts, creds['aes'], cipher=creds.get('cipher', 'cbc'))
                 self._authenticate_future.set_result(True)  # mark the sign-in as complete
                 # Notify the bus about creds change
                 if self.opts.get('auth_events') is True:
@@ -746,6 +1043,10 @@ class AsyncAuth(object):
                 # has the master returned that its maxed out with minions?
                 elif payload['load']['ret'] == 'full':
                     raise tornado.gen.Return('full')
+                # is the master signing in too many minions at once?
+                elif payload['load']['ret'] == 'busy':
+                    self.retry_after = _busy_retry_after(self.opts, payload['load'])
+                    raise tornado.gen.Return('retry')
                 else:
                     log.error(
                         'The Salt Master has cached the public key for this '
@@ -776,6 +1077,16 @@ class AsyncAuth(object):
                 if salt.utils.crypt.pem_finger(m_pub_fn, sum_type=self.opts['hash_type']) != self.opts['master_finger']:
                     self._finger_fail(self.opts['master_finger'], m_pub_fn)
         auth['publish_port'] = payload['publish_port']
+        if 'pub_ed25519' in payload:
+            if verify_signature(m_pub_fn, payload['pub_ed25519'], payload.get('pub_ed25519_sig')):
+                auth['pub_ed25519'] = payload['pub_ed25519']
+            else:
+                log.error('The signature of the master\'s Ed25519 key failed to validate')
+        # Only use a cipher which was offered, older masters pick none
+        if payload.get('cipher') in sign_in_payload.get('ciphers', ()):
+            auth['cipher'] = payload['cipher']
+        else:
+            auth['cipher'] = 'cbc'
         raise tornado.gen.Return(auth)
 
     def get_keys(self):
@@ -839,6 +1150,9 @@ class AsyncAuth(object):
             pass
         with salt.utils.files.fopen(self.pub_path) as f:
             payload['pub'] = f.read()
+        ciphers = session_ciphers(self.opts)
+        if ciphers:
+            payload['ciphers'] = ciphers
         return payload
 
     def decrypt_aes(self, payload, master_pub=True):
@@ -1185,6 +1499,8 @@ class SAuth(AsyncAuth):
         else:
             self.token = salt.utils.stringutils.to_bytes(Crypticle.generate_key_string())
         self.serial = salt.payload.Serial(self.opts)
+        # The seconds a busy master asked to wait before signing in again
+        self.retry_after = None
         self.pub_path = os.path.join(self.opts['pki_dir'], 'minion.pub')
         self.rsa_path = os.path.join(self.opts['pki_dir'], 'minion.pem')
         if 'syndic_master' in self.opts:
@@ -1227,6 +1543,12 @@ class SAuth(AsyncAuth):
             while True:
                 creds = self.sign_in(channel=channel)
                 if creds == 'retry':
+                    if self.retry_after:
+                        log.info('The master is busy, waiting %s seconds '
+                                 'before retry.', self.retry_after)
+                        time.sleep(self.retry_after)
+                        self.retry_after = None
+                        continue
                     if self.opts.get('caller'):
                         # We have a list of masters, so we should break
                         # and try the next one in the list.
@@ -1248,7 +1570,7 @@ class SAuth(AsyncAuth):
                     continue
                 break
             self._creds = creds
-            self._crypticle = Crypticle(self.opts, creds['aes'])
+            self._crypticle = Crypticle(self.opts, creds['aes'], cipher=creds.get('cipher', 'cbc'))
         finally:
             channel.close()
 
@@ -1328,6 +1650,10 @@ class SAuth(AsyncAuth):
                 # has the master returned that its maxed out with minions?
                 elif payload['load']['ret'] == 'full':
                     return 'full'
+                # is the master signing in too many minions at once?
+                elif payload['load']['ret'] == 'busy':
+                    self.retry_after = _busy_retry_after(self.opts, payload['load'])
+                    return 'retry'
                 else:
                     log.error(
                         'The Salt Master has cached the public key for this '
@@ -1361,6 +1687,16 @@ class SAuth(AsyncAuth):
                 if salt.utils.crypt.pem_finger(m_pub_fn, sum_type=self.opts['hash_type']) != self.opts['master_finger']:
                     self._finger_fail(self.opts['master_finger'], m_pub_fn)
         auth['publish_port'] = payload['publish_port']
+        if 'pub_ed25519' in payload:
+            if verify_signature(m_pub_fn, payload['pub_ed25519'], payload.get('pub_ed25519_sig')):
+                auth['pub_ed25519'] = payload['pub_ed25519']
+            else:
+                log.error('The signature of the master\'s Ed25519 key failed to validate')
+        # Only use a cipher which was offered, older masters pick none
+        if payload.get('cipher') in sign_in_payload.get('ciphers', ()):
+            auth['cipher'] = payload['cipher']
+        else:
+            auth['cipher'] = 'cbc'
         return auth
 
 
@@ -1370,17 +1706,25 @@ class Crypticle(object):
 
     Encryption algorithm: AES-CBC
     Signing algorithm: HMAC-SHA256
+
+    With the ``aes-gcm`` or ``chacha20-poly1305`` cipher the data is
+    encrypted and authenticated in one pass, with a key derived from the
+    session key for each cipher.
     '''
 
     PICKLE_PAD = b'pickle::'
     AES_BLOCK_SIZE = 16
     SIG_SIZE = hashlib.sha256().digest_size
+    NONCE_SIZE = 12
+    TAG_SIZE = 16
 
-    def __init__(self, opts, key_string, key_size=192):
+    def __init__(self, opts, key_string, key_size=192, cipher='cbc'):
         self.key_string = key_string
         self.keys = self.extract_keys(self.key_string, key_size)
         self.key_size = key_size
+        self.cipher = cipher
         self.serial = salt.payload.Serial(opts)
+        self._aead_keys = {}
 
     @classmethod
     def generate_key_string(cls, key_size=192):
@@ -1400,10 +1744,14 @@ class Crypticle(object):
         assert len(key) == key_size / 8 + cls.SIG_SIZE, 'invalid key'
         return key[:-cls.SIG_SIZE], key[-cls.SIG_SIZE:]
 
-    def encrypt(self, data):
+    def encrypt(self, data, cipher=None):
         '''
-        encrypt data with AES-CBC and sign it with HMAC-SHA256
+        encrypt data with AES-CBC and sign it with HMAC-SHA256, or with the
+        AEAD cipher given
         '''
+        cipher = cipher or self.cipher
+        if cipher != 'cbc':
+            return self._aead_encrypt(data, cipher)
         aes_key, hmac_key = self.keys
         pad = self.AES_BLOCK_SIZE - len(data) % self.AES_BLOCK_SIZE
         if six.PY2:
@@ -1422,28 +1770,21 @@ class Crypticle(object):
         sig = hmac.new(hmac_key, data, hashlib.sha256).digest()
         return data + sig
 
-    def decrypt(self, data):
+    def decrypt(self, data, cipher=None):
         '''
-        verify HMAC-SHA256 signature and decrypt data with AES-CBC
+        verify HMAC-SHA256 signature and decrypt data with AES-CBC, or with
+        the AEAD cipher given
         '''
+        cipher = cipher or self.cipher
+        if cipher != 'cbc':
+            return self._aead_decrypt(data, cipher)
         aes_key, hmac_key = self.keys
-        sig = data[-self.SIG_SIZE:]
-        data = data[:-self.SIG_SIZE]
         if six.PY3 and not isinstance(data, bytes):
             data = salt.utils.stringutils.to_bytes(data)
+        sig = data[-self.SIG_SIZE:]
+        data = data[:-self.SIG_SIZE]
         mac_bytes = hmac.new(hmac_key, data, hashlib.sha256).digest()
-        if len(mac_bytes) != len(sig):
-            log.debug('Failed to authenticate message')
-            raise AuthenticationError('message authentication failed')
-        result = 0
-
-        if six.PY2:
-            for zipped_x, zipped_y in zip(mac_bytes, sig):
-                result |= ord(zipped_x) ^ ord(zipped_y)
-        else:
-            for zipped_x, zipped_y in zip(mac_bytes, sig):
-                result |= zipped_x ^ zipped_y
-        if result != 0:
+        if not hmac.compare_digest(mac_bytes, sig):
             log.debug('Failed to authenticate message')
             raise AuthenticationError('message authentication failed')
         iv_bytes = data[:self.AES_BLOCK_SIZE]
@@ -1460,16 +1801,93 @@ class Crypticle(object):
         else:
             return data[:-data[-1]]
 
-    def dumps(self, obj):
+    def _aead_key(self, cipher):
+        '''
+        Return the key of the AEAD cipher given, derived from the session key.
+        With cryptography this is the cipher object, used for every message.
+        '''
+        key = self._aead_keys.get(cipher)
+        if key is None:
+            if cipher not in AEAD_CIPHERS:
+                log.debug('Unsupported session cipher %s', cipher)
+                raise AuthenticationError('unsupported cipher {0}'.format(cipher))
+            aes_key, hmac_key = self.keys
+            key = hmac.new(aes_key + hmac_key,
+                           salt.utils.stringutils.to_bytes(cipher),
+                           hashlib.sha256).digest()
+            if cipher in CRYPTOGRAPHY_AEAD:
+                key = CRYPTOGRAPHY_AEAD[cipher](key)
+            self._aead_keys[cipher] = key
+        return key
+
+    def _aead(self, cipher, key, nonce):
+        '''
+        Return a pycryptodome cipher object for one message
+        '''
+        if cipher == 'aes-gcm':
+            return AEAD_AES.new(key, AEAD_AES.MODE_GCM, nonce=nonce, mac_len=self.TAG_SIZE)
+        return ChaCha20_Poly1305.new(key=key, nonce=nonce)
+
+    def _aead_encrypt(self, data, cipher, header=None):
+        '''
+        Encrypt data with an AEAD cipher, ``header`` is authenticated but not
+        sent
+        '''
+        key = self._aead_key(cipher)
+        nonce = os.urandom(self.NONCE_SIZE)
+        if not isinstance(key, bytes):
+            # cryptography appends the tag to the encrypted data
+            return nonce + key.encrypt(nonce, data, header)
+        cypher = self._aead(cipher, key, nonce)
+        if header:
+            cypher.update(header)
+        encr, tag = cypher.encrypt_and_digest(data)
+        return b''.join((nonce, encr, tag))
+
+    def _aead_decrypt(self, data, cipher, header=None):
+        '''
+        Verify and decrypt data encrypted with an AEAD cipher
+        '''
+        key = self._aead_key(cipher)
+        if six.PY3 and not isinstance(data, bytes):
+            data = salt.utils.stringutils.to_bytes(data)
+        if len(data) < self.NONCE_SIZE + self.TAG_SIZE:
+            log.debug('Failed to authenticate message')
+            raise AuthenticationError('message authentication failed')
+        nonce = data[:self.NONCE_SIZE]
+        try:
+            if not isinstance(key, bytes):
+                return key.decrypt(nonce, data[self.NONCE_SIZE:], header)
+            if six.PY3:
+                # Slice the message without copying it
+                data = memoryview(data)
+            cypher = self._aead(cipher, key, nonce)
+            if header:
+                cypher.update(header)
+            return cypher.decrypt_and_verify(data[self.NONCE_SIZE:-self.TAG_SIZE],
+                                             data[-self.TAG_SIZE:])
+        except (ValueError, InvalidTag):
+            log.debug('Failed to authenticate message')
+            raise AuthenticationError('message authentication failed')
+
+    def dumps(self, obj, cipher=None):
         '''
         Serialize and encrypt a python object
         '''
+        cipher = cipher or self.cipher
+        if cipher != 'cbc':
+            # The pad is authenticated instead of prepended to the data
+            return self._aead_encrypt(self.serial.dumps(obj), cipher, self.PICKLE_PAD)
         return self.encrypt(self.PICKLE_PAD + self.serial.dumps(obj))
 
-    def loads(self, data, raw=False):
+    def loads(self, data, raw=False, cipher=None):
         '''
         Decrypt and un-serialize a python object
         '''
+        cipher = cipher or self.cipher
+        if cipher != 'cbc':
+            data = self._aead_decrypt(data, cipher, self.PICKLE_PAD)
+            return self.serial.loads(data, raw=raw)
         data = self.decrypt(data)
         # simple integrity check to verify that we got meaningful data
         if not data.startswith(self.PICKLE_PAD):
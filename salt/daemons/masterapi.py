@@ -38,6 +38,7 @@ import salt.utils.verify
 import salt.utils.minions
 import salt.utils.gzip_util
 import salt.utils.jid
+import salt.utils.minion_index
 import salt.utils.minions
 import salt.utils.path
 import salt.utils.platform
@@ -784,9 +785,11 @@ class RemoteFuncs(object):
                 pillar_override=load.get('pillar_override', {}))
         data = pillar.compile_pillar()
         if self.opts.get('minion_data_cache', False):
+            mdata = {'grains': load['grains'], 'pillar': data}
             self.cache.store('minions/{0}'.format(load['id']),
                              'data',
-                             {'grains': load['grains'], 'pillar': data})
+                             mdata)
+            salt.utils.minion_index.update_minion_data(self.opts, load['id'], mdata)
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'comment': 'Minion data cache refresh'}, salt.utils.event.tagify(load['id'], 'refresh', 'minion'))
         return data
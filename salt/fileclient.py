@@ -47,6 +47,10 @@ from salt.ext.six.moves.urllib.parse import urlparse, urlunparse
 log = logging.getLogger(__name__)
 MAX_FILENAME_LENGTH = 255
 
+# Sets of the salt:// files cached while they are being recorded, see
+# record_files
+_FILE_RECORDERS = []
+
 
 def get_file_client(opts, pillar=False):
     '''
@@ -63,6 +67,31 @@ def get_file_client(opts, pillar=False):
     }.get(client, RemoteClient)(opts)
 
 
+@contextlib.contextmanager
+def record_files():
+    '''
+    Collect the (saltenv, path) pairs of the salt:// files cached by any file
+    client of this process while the context is active
+    '''
+    files = set()
+    _FILE_RECORDERS.append(files)
+    try:
+        yield files
+    finally:
+        _FILE_RECORDERS.remove(files)
+
+
+def record_file(url, saltenv):
+    '''
+    Add a salt:// file to the active recorders
+    '''
+    if not _FILE_RECORDERS:
+        return
+    path, senv = salt.utils.url.parse(url)
+    for files in _FILE_RECORDERS:
+        files.add((senv or saltenv, path))
+
+
 def decode_dict_keys_to_str(src):
     '''
     Convert top level keys from bytes to strings if possible.
@@ -189,6 +218,8 @@ class Client(object):
         Pull a file down from the file server and store it in the minion
         file cache
         '''
+        if isinstance(path, six.string_types) and path.startswith('salt://'):
+            record_file(path, saltenv)
         return self.get_url(
             path, '', True, saltenv, cachedir=cachedir, source_hash=source_hash)
 
@@ -26,6 +26,8 @@ import salt.utils.files
 import salt.utils.json
 import salt.utils.kinds
 import salt.utils.master
+import salt.utils.minion_index
+import salt.utils.minions
 import salt.utils.sdb
 import salt.utils.stringutils
 import salt.utils.user
@@ -424,6 +426,7 @@ class Key(object):
         '''
         if preserve_minions is None:
             preserve_minions = []
+        salt.utils.minions.accepted_minions_changed(self.opts)
         keys = self.list_keys()
         minions = []
         for key, val in six.iteritems(keys):
@@ -446,6 +449,7 @@ class Key(object):
                 for minion in clist:
                     if minion not in minions and minion not in preserve_minions:
                         cache.flush('{0}/{1}'.format(self.ACC, minion))
+                        salt.utils.minion_index.update_minion_data(self.opts, minion, None)
 
     def check_master(self):
         '''
@@ -645,6 +649,7 @@ class Key(object):
                                           salt.utils.event.tagify(prefix='key'))
                 except (IOError, OSError):
                     pass
+        salt.utils.minions.accepted_minions_changed(self.opts)
         return (
             self.name_match(match) if match is not None
             else self.dict_match(matches)
@@ -674,6 +679,7 @@ class Key(object):
                                       salt.utils.event.tagify(prefix='key'))
             except (IOError, OSError):
                 pass
+        salt.utils.minions.accepted_minions_changed(self.opts)
         return self.list_keys()
 
     def delete_key(self,
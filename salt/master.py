@@ -59,6 +59,8 @@ import salt.utils.gzip_util
 import salt.utils.jid
 import salt.utils.job
 import salt.utils.master
+import salt.utils.metrics
+import salt.utils.minion_index
 import salt.utils.minions
 import salt.utils.platform
 import salt.utils.process
@@ -200,6 +202,8 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
         # Init any values needed by the git ext pillar
         self.git_pillar = salt.daemons.masterapi.init_git_pillar(self.opts)
 
+        self.minion_index_built = False
+
         self.presence_events = False
         if self.opts.get('presence_events', False):
             tcp_only = True
@@ -238,6 +242,7 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
             self.handle_git_pillar()
             self.handle_schedule()
             self.handle_key_cache()
+            self.handle_minion_index()
             self.handle_presence(old_present)
             self.handle_key_rotate(now)
             salt.utils.verify.check_max_open_files(self.opts)
@@ -250,16 +255,13 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
         which contains a list
         '''
         if self.opts['key_cache'] == 'sched':
-            keys = []
             #TODO DRY from CKMinions
             if self.opts['transport'] in ('zeromq', 'tcp'):
                 acc = 'minions'
             else:
                 acc = 'accepted'
 
-            for fn_ in os.listdir(os.path.join(self.opts['pki_dir'], acc)):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], acc, fn_)):
-                    keys.append(fn_)
+            keys = salt.utils.minions.get_accepted_minions(self.opts, acc).minions()
             log.debug('Writing master key cache')
             # Write a temporary file securely
             if six.PY2:
@@ -269,6 +271,25 @@ class Maintenance(salt.utils.process.SignalHandlingMultiprocessingProcess):
                 with salt.utils.atomicfile.atomic_open(os.path.join(self.opts['pki_dir'], acc, '.key_cache'), mode='wb') as cache_file:
                     self.serial.dump(keys, cache_file)
 
+    def handle_minion_index(self):
+        '''
+        Build the minion data index on startup and keep its journal compact
+        '''
+        if not self.opts.get('minion_data_index', False) \
+                or not self.opts.get('minion_data_cache', False):
+            return
+        index = salt.utils.minion_index.get_index(self.opts)
+        try:
+            if not self.minion_index_built:
+                index.rebuild()
+                self.minion_index_built = True
+            elif index.refresh() and \
+                    index.journal_frames > max(len(index.data), self.opts['minion_data_index_compact']):
+                log.debug('Compacting the minion data index')
+                index.compact()
+        except (IOError, OSError) as exc:
+            log.error('Unable to maintain the minion data index: %s', exc)
+
     def handle_key_rotate(self, now):
         '''
         Rotate the AES key rotation
@@ -709,6 +730,12 @@ class Master(SMaster):
                 log.info('Creating master event return process')
                 self.process_manager.add_process(salt.utils.event.EventReturn, args=(self.opts,))
 
+            job_queue = None
+            if self.opts['master_job_cache_batch']:
+                log.info('Creating master job cache writer process')
+                job_queue = salt.utils.job.JobCacheQueue(self.opts['master_job_cache_queue_size'])
+                self.process_manager.add_process(salt.utils.job.JobCacheWriter, args=(self.opts, job_queue))
+
             ext_procs = self.opts.get('ext_processes', [])
             for proc in ext_procs:
                 log.info('Creating ext_processes process: %s', proc)
@@ -734,7 +761,7 @@ class Master(SMaster):
                 time.sleep(2)
 
             log.info('Creating master request server process')
-            kwargs = {}
+            kwargs = {'job_queue': job_queue}
             if salt.utils.platform.is_windows():
                 kwargs['log_queue'] = log_queue
                 kwargs['log_queue_level'] = salt.log.setup.get_multiprocessing_logging_level()
@@ -827,13 +854,14 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
     Starts up the master request server, minions send results to this
     interface.
     '''
-    def __init__(self, opts, key, mkey, secrets=None, **kwargs):
+    def __init__(self, opts, key, mkey, secrets=None, job_queue=None, **kwargs):
         '''
         Create a request server
 
         :param dict opts: The salt options dictionary
         :key dict: The user starting the server and the AES key
         :mkey dict: The user starting the server and the RSA key
+        :job_queue JobCacheQueue: The queue of returns to write to the job cache
 
         :rtype: ReqServer
         :returns: Request server
@@ -844,6 +872,7 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
         # Prepare the AES key
         self.key = key
         self.secrets = secrets
+        self.job_queue = job_queue
 
     # __setstate__ and __getstate__ are only used on Windows.
     # We do this so that __init__ will be invoked on Windows in the child
@@ -855,6 +884,7 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
             state['key'],
             state['mkey'],
             secrets=state['secrets'],
+            job_queue=state['job_queue'],
             log_queue=state['log_queue'],
             log_queue_level=state['log_queue_level']
         )
@@ -865,6 +895,7 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
             'key': self.key,
             'mkey': self.master_key,
             'secrets': self.secrets,
+            'job_queue': self.job_queue,
             'log_queue': self.log_queue,
             'log_queue_level': self.log_queue_level
         }
@@ -901,14 +932,29 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
 
         req_channels = []
         tcp_only = True
+        zeromq_only = True
         for transport, opts in iter_transport_opts(self.opts):
             chan = salt.transport.server.ReqServerChannel.factory(opts)
             chan.pre_fork(self.process_manager)
             req_channels.append(chan)
             if transport != 'tcp':
                 tcp_only = False
-
-        kwargs = {}
+            if transport != 'zeromq':
+                zeromq_only = False
+
+        worker_pools = {}
+        for pool, count in six.iteritems(self.opts.get('worker_pools') or {}):
+            if pool not in salt.transport.server.WORKER_POOLS:
+                log.error('Ignoring unknown worker pool \'%s\', valid pools '
+                          'are: %s', pool, ', '.join(sorted(salt.transport.server.WORKER_POOLS)))
+            elif count:
+                worker_pools[pool] = int(count)
+        if worker_pools and not zeromq_only:
+            log.warning('worker_pools are only supported by the zeromq '
+                        'transport, all the workers will serve every request')
+            worker_pools = {}
+
+        kwargs = {'job_queue': self.job_queue}
         if salt.utils.platform.is_windows():
             kwargs['log_queue'] = self.log_queue
             kwargs['log_queue_level'] = self.log_queue_level
@@ -934,6 +980,17 @@ class ReqServer(salt.utils.process.SignalHandlingMultiprocessingProcess):
                                                        name),
                                                  kwargs=kwargs,
                                                  name=name)
+            for pool, count in six.iteritems(worker_pools):
+                for ind in range(count):
+                    name = 'MWorker-{0}-{1}'.format(pool, ind)
+                    self.process_manager.add_process(MWorker,
+                                                     args=(self.opts,
+                                                           self.master_key,
+                                                           self.key,
+                                                           req_channels,
+                                                           name),
+                                                     kwargs=dict(kwargs, pool=pool),
+                                                     name=name)
         self.process_manager.run()
 
     def run(self):
@@ -963,6 +1020,8 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
                  key,
                  req_channels,
                  name,
+                 job_queue=None,
+                 pool=None,
                  **kwargs):
         '''
         Create a salt master worker process
@@ -970,6 +1029,8 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         :param dict opts: The salt options
         :param dict mkey: The user running the salt master and the AES key
         :param dict key: The user running the salt master and the RSA key
+        :param JobCacheQueue job_queue: The queue of returns to write to the job cache
+        :param str pool: The worker pool served by this worker, see worker_pools
 
         :rtype: MWorker
         :return: Master worker
@@ -979,11 +1040,15 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         super(MWorker, self).__init__(**kwargs)
         self.opts = opts
         self.req_channels = req_channels
+        self.job_queue = job_queue
+        self.pool = pool
 
         self.mkey = mkey
         self.key = key
         self.k_mtime = 0
         self.stats = collections.defaultdict(lambda: {'mean': 0, 'latency': 0, 'runs': 0})
+        self.histograms = collections.defaultdict(salt.utils.metrics.Histogram)
+        self.busy = 0.0
         self.stat_clock = time.time()
 
     # We need __setstate__ and __getstate__ to also pickle 'SMaster.secrets'.
@@ -999,6 +1064,8 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         )
         self.opts = state['opts']
         self.req_channels = state['req_channels']
+        self.job_queue = state['job_queue']
+        self.pool = state['pool']
         self.mkey = state['mkey']
         self.key = state['key']
         self.k_mtime = state['k_mtime']
@@ -1008,6 +1075,8 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         return {
             'opts': self.opts,
             'req_channels': self.req_channels,
+            'job_queue': self.job_queue,
+            'pool': self.pool,
             'mkey': self.mkey,
             'key': self.key,
             'k_mtime': self.k_mtime,
@@ -1029,8 +1098,11 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         install_zmq()
         self.io_loop = ZMQDefaultLoop()
         self.io_loop.make_current()
+        kwargs = {}
+        if self.pool is not None:
+            kwargs['pool'] = self.pool
         for req_channel in self.req_channels:
-            req_channel.post_fork(self._handle_payload, io_loop=self.io_loop)  # TODO: cleaner? Maybe lazily?
+            req_channel.post_fork(self._handle_payload, io_loop=self.io_loop, **kwargs)  # TODO: cleaner? Maybe lazily?
         try:
             self.io_loop.start()
         except (KeyboardInterrupt, SystemExit):
@@ -1065,6 +1137,16 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
                'clear': self._handle_clear}[key](load)
         raise tornado.gen.Return(ret)
 
+    def _update_stats(self, start, load):
+        '''
+        Record the time spent serving a request
+        '''
+        duration = time.time() - start
+        self.busy += duration
+        self.histograms[load['cmd']].observe(duration)
+        stats = salt.utils.event.update_stats(self.stats, start, load)
+        self._post_stats(stats)
+
     def _post_stats(self, stats):
         '''
         Fire events with stat info if it's time
@@ -1072,8 +1154,21 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
         end_time = time.time()
         if end_time - self.stat_clock > self.opts['master_stats_event_iter']:
             # Fire the event with the stats and wipe the tracker
-            self.aes_funcs.event.fire_event({'time': end_time - self.stat_clock, 'worker': self.name, 'stats': stats}, tagify(self.name, 'stats'))
+            interval = end_time - self.stat_clock
+            busy = self.busy / interval
+            self.aes_funcs.event.fire_event(
+                {'time': interval,
+                 'worker': self.name,
+                 'stats': stats,
+                 'busy': busy,
+                 'latency': dict((cmd, hist.summary())
+                                 for cmd, hist in six.iteritems(self.histograms))},
+                tagify(self.name, 'stats'))
+            salt.utils.metrics.write_worker_stats(
+                self.opts, self.name, self.histograms, self.busy, interval)
             self.stats = collections.defaultdict(lambda: {'mean': 0, 'latency': 0, 'runs': 0})
+            self.histograms = collections.defaultdict(salt.utils.metrics.Histogram)
+            self.busy = 0.0
             self.stat_clock = end_time
 
     def _handle_clear(self, load):
@@ -1092,8 +1187,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
             start = time.time()
         ret = getattr(self.clear_funcs, cmd)(load), {'fun': 'send_clear'}
         if self.opts['master_stats']:
-            stats = salt.utils.event.update_stats(self.stats, start, load)
-            self._post_stats(stats)
+            self._update_stats(start, load)
         return ret
 
     def _handle_aes(self, data):
@@ -1123,8 +1217,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
             ret = run_func(data)
 
         if self.opts['master_stats']:
-            stats = salt.utils.event.update_stats(self.stats, start, data)
-            self._post_stats(stats)
+            self._update_stats(start, data)
         return ret
 
     def run(self):
@@ -1136,7 +1229,7 @@ class MWorker(salt.utils.process.SignalHandlingMultiprocessingProcess):
            self.opts,
            self.key,
            )
-        self.aes_funcs = AESFuncs(self.opts)
+        self.aes_funcs = AESFuncs(self.opts, job_queue=self.job_queue)
         salt.utils.crypt.reinit_crypto()
         self.__bind()
 
@@ -1148,16 +1241,18 @@ class AESFuncs(object):
     '''
     # The AES Functions:
     #
-    def __init__(self, opts):
+    def __init__(self, opts, job_queue=None):
         '''
         Create a new AESFuncs
 
         :param dict opts: The salt options
+        :param JobCacheQueue job_queue: The queue of returns to write to the job cache
 
         :rtype: AESFuncs
         :returns: Instance for handling AES operations
         '''
         self.opts = opts
+        self.job_queue = job_queue
         self.event = salt.utils.event.get_master_event(self.opts, self.opts['sock_dir'], listen=False)
         self.serial = salt.payload.Serial(opts)
         self.ckminions = salt.utils.minions.CkMinions(opts)
@@ -1540,10 +1635,11 @@ class AESFuncs(object):
         data = pillar.compile_pillar()
         self.fs_.update_opts()
         if self.opts.get('minion_data_cache', False):
+            mdata = {'grains': load['grains'], 'pillar': data}
             self.masterapi.cache.store('minions/{0}'.format(load['id']),
                                        'data',
-                                       {'grains': load['grains'],
-                                        'pillar': data})
+                                       mdata)
+            salt.utils.minion_index.update_minion_data(self.opts, load['id'], mdata)
             if self.opts.get('minion_data_cache_events') is True:
                 self.event.fire_event({'Minion data cache refresh': load['id']}, tagify(load['id'], 'refresh', 'minion'))
         return data
@@ -1631,10 +1727,45 @@ class AESFuncs(object):
 
         try:
             salt.utils.job.store_job(
-                self.opts, load, event=self.event, mminion=self.mminion)
+                self.opts, load, event=self.event, mminion=self.mminion,
+                job_queue=self.job_queue)
         except salt.exceptions.SaltCacheError:
             log.error('Could not store job information for load: %s', load)
 
+    def _return_stream(self, load):
+        '''
+        Handle a frame of state returns streamed by a minion while its state
+        run is in progress. The frame is stored in the job cache and fired on
+        the master event bus. Returns True only when the frame was stored, the
+        minion otherwise sends all of the state returns at the end of the run.
+
+        :param dict load: The minion payload
+        '''
+        load = self.__verify_load(load, ('id', 'jid', 'stream', 'seq', 'return', 'tok'))
+        if load is False:
+            return {}
+        # Both name the file the frame is stored in
+        if not isinstance(load['seq'], six.integer_types) or isinstance(load['seq'], bool) \
+                or load['seq'] < 0 or not isinstance(load['stream'], six.string_types) \
+                or not load['stream'].isalnum():
+            log.warning('Rejecting a malformed frame of state returns from %s', load['id'])
+            return {}
+        fstr = '{0}.save_stream'.format(self.opts['master_job_cache'])
+        if fstr not in self.mminion.returners:
+            log.debug('The %s job cache does not store streamed state returns',
+                      self.opts['master_job_cache'])
+            return False
+        try:
+            stored = self.mminion.returners[fstr](load) is True
+        except salt.exceptions.SaltCacheError:
+            log.error('Could not store the state returns streamed by %s for job %s',
+                      load['id'], load['jid'])
+            return False
+        if stored:
+            self.event.fire_event(
+                load, tagify([load['jid'], 'stream', load['id']], 'job'))
+        return stored
+
     def _syndic_return(self, load):
         '''
         Receive a syndic minion return and format it to look like returns from
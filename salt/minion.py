@@ -1698,6 +1698,7 @@ class Minion(MinionBase):
                     func = function_name
                     args, kwargs = data['arg'], data
                 minion_instance.functions.pack['__context__']['retcode'] = 0
+                minion_instance.functions.pack['__context__'].pop('state_stream', None)
                 if isinstance(executors, six.string_types):
                     executors = [executors]
                 elif not isinstance(executors, list) or not executors:
@@ -1751,6 +1752,10 @@ class Minion(MinionBase):
 
                 ret['retcode'] = retcode
                 ret['success'] = retcode == salt.defaults.exitcodes.EX_OK
+                # The totals of the state returns streamed to the master
+                stream = minion_instance.functions.pack['__context__'].pop('state_stream', None)
+                if stream is not None:
+                    ret['stream'] = stream
             except CommandNotFoundError as exc:
                 msg = 'Command required for \'{0}\' not found'.format(
                     function_name
@@ -108,6 +108,21 @@ def _set_retcode(ret, highstate=None):
         __context__['retcode'] = salt.defaults.exitcodes.EX_STATE_FAILURE
 
 
+def _stream_summary(state, ret, kwargs):
+    '''
+    Drop the state returns the master stored while the states ran from the
+    return of the job. Their totals go in the job return, the minion reads
+    them from ``__context__``. Jobs running several functions keep all of the
+    state returns.
+    '''
+    if not isinstance(kwargs.get('__pub_fun'), six.string_types):
+        return ret
+    ret, summary = state.stream_summary(ret)
+    if summary is not None:
+        __context__['state_stream'] = summary
+    return ret
+
+
 def _get_pillar_errors(kwargs, pillar=None):
     '''
     Checks all pillars (external and internal) for errors.
@@ -999,6 +1014,24 @@ def highstate(test=None, queue=False, **kwargs):
 
         .. versionadded:: 2015.8.4
 
+    incremental
+        Do not run the states whose low data, ``salt://`` sources and, for
+        templates, grains and pillar did not change since they last
+        succeeded. Defaults to the :conf_minion:`state_incremental` minion
+        option.
+
+        .. versionadded:: Neon
+
+    profile
+        Record the time spent checking the requisites, running the
+        ``onlyif``/``unless`` checks, calling and firing the event of each
+        state. Use the ``profile`` outputter to display it. The time spent
+        rendering, compiling and executing the whole run is logged and fired
+        on the ``salt/job/<jid>/profile/<minion_id>`` event. Defaults to the
+        :conf_minion:`state_profile` minion option.
+
+        .. versionadded:: Neon
+
     CLI Examples:
 
     .. code-block:: bash
@@ -1007,6 +1040,8 @@ def highstate(test=None, queue=False, **kwargs):
 
         salt '*' state.highstate whitelist=sls1_to_run,sls2_to_run
         salt '*' state.highstate exclude=sls_to_exclude
+        salt '*' state.highstate incremental=True
+        salt '*' state.highstate profile=True --out=profile
         salt '*' state.highstate exclude="[{'id': 'id_to_exclude'}, {'sls': 'sls_to_exclude'}]"
 
         salt '*' state.highstate pillar="{foo: 'Foo!', bar: 'Bar!'}"
@@ -1080,7 +1115,8 @@ def highstate(test=None, queue=False, **kwargs):
                 cache_name=kwargs.get('cache_name', 'highstate'),
                 force=kwargs.get('force', False),
                 whitelist=kwargs.get('whitelist'),
-                orchestration_jid=orchestration_jid)
+                orchestration_jid=orchestration_jid,
+                incremental=kwargs.get('incremental'))
     finally:
         st_.pop_active()
 
@@ -1089,6 +1125,7 @@ def highstate(test=None, queue=False, **kwargs):
         ret = _filter_running(ret)
 
     _set_retcode(ret, highstate=st_.building_highstate)
+    ret = _stream_summary(st_.state, ret, kwargs)
     _snapper_post(opts, kwargs.get('__pub_jid', 'called localy'), snapper_pre)
 
     # Work around Windows multiprocessing bug, set __opts__['test'] back to
@@ -1201,6 +1238,12 @@ def sls(mods, test=None, exclude=None, queue=False, sync_mods=None, **kwargs):
 
         .. versionadded:: 2017.7.8,2018.3.3,2019.2.0
 
+    profile
+        Record the time spent in each phase of every state and in each step
+        of the run, see :py:func:`state.highstate <salt.modules.state.highstate>`.
+
+        .. versionadded:: Neon
+
     CLI Example:
 
     .. code-block:: bash
@@ -1356,6 +1399,7 @@ def sls(mods, test=None, exclude=None, queue=False, sync_mods=None, **kwargs):
                 cache_file
             )
         _set_retcode(ret, high_)
+        ret = _stream_summary(st_.state, ret, kwargs)
         # Work around Windows multiprocessing bug, set __opts__['test'] back to
         # value from before this function was run.
         __opts__['test'] = orig_test
@@ -1456,11 +1500,13 @@ def top(topfn, test=None, queue=False, **kwargs):
                 exclude=kwargs.get('exclude', []),
                 cache=kwargs.get('cache', None),
                 cache_name=kwargs.get('cache_name', 'highstate'),
-                orchestration_jid=orchestration_jid)
+                orchestration_jid=orchestration_jid,
+                incremental=kwargs.get('incremental'))
     finally:
         st_.pop_active()
 
     _set_retcode(ret, highstate=st_.building_highstate)
+    ret = _stream_summary(st_.state, ret, kwargs)
     # Work around Windows multiprocessing bug, set __opts__['test'] back to
     # value from before this function was run.
     _snapper_post(opts, kwargs.get('__pub_jid', 'called localy'), snapper_pre)
@@ -1746,7 +1792,7 @@ def sls_id(id_, mods, test=None, queue=False, **kwargs):
     ret = {}
     for chunk in chunks:
         if chunk.get('__id__', '') == id_:
-            ret.update(st_.state.call_chunk(chunk, {}, chunks))
+            ret.update(salt.state.expand_results(st_.state.call_chunk(chunk, {}, chunks)))
 
     _set_retcode(ret, highstate=highstate)
     # Work around Windows multiprocessing bug, set __opts__['test'] back to
@@ -2191,6 +2237,7 @@ def pkg(pkg_path,
     snapper_pre = _snapper_pre(popts, kwargs.get('__pub_jid', 'called localy'))
     ret = st_.call_chunks(lowstate)
     ret = st_.call_listen(lowstate, ret)
+    salt.state.expand_results(ret)
     try:
         shutil.rmtree(root)
     except (IOError, OSError):
@@ -25,12 +25,20 @@ To get the above appearance, use settings something like these::
     out.table.delim: '  '
     out.table.prefix: ''
     out.table.suffix: ''
+
+When the states were run with profiling enabled (``profile=True`` or the
+:conf_minion:`state_profile` option), the time spent in each phase of every
+state is shown as well, followed by the totals of each SLS file::
+
+    salt MINION state.apply profile=True --out=profile
 '''
 from __future__ import absolute_import, print_function, unicode_literals
 import salt.output.table_out as table_out
 
 __virtualname__ = 'profile'
 
+PHASES = ('requisites', 'checks', 'call', 'event')
+
 
 def __virtual__():
     return True
@@ -64,18 +72,79 @@ def _find_durations(data, name_max=60):
     return [x[1:] + x[0:1] for x in sorted(ret)]
 
 
-def output(data, **kwargs):
+def _profiled(data):
     '''
-    Display the profiling data in a table format.
+    Return True if the states were run with profiling enabled
+    '''
+    for host in data:
+        if not isinstance(data[host], dict):
+            continue
+        for dat in data[host].values():
+            if isinstance(dat, dict) and '__profile__' in dat:
+                return True
+    return False
+
+
+def _find_phases(data, name_max=60):
+    '''
+    Return the rows of the durations of the phases of each state
+    '''
+    ret = []
+    for host in data:
+        for sid in data[host]:
+            dat = data[host][sid]
+            if not isinstance(dat, dict):
+                continue
+            ts = sid.split('_|-')
+            name = dat.get('name', dat.get('__id__'))
+            if name is None:
+                name = '<>'
+            if len(name) > name_max:
+                name = name[0:name_max-3] + '...'
+            phases = dat.get('__profile__', {})
+            ret.append([float(dat.get('duration', -1)),
+                        name,
+                        '{0}.{1}'.format(ts[0], ts[-1])] +
+                       [float(phases.get(phase, 0)) for phase in PHASES])
+    return [row[1:3] + ['{0:0.4f}'.format(dur) for dur in row[0:1] + row[3:]]
+            for row in sorted(ret)]
+
+
+def _find_sls(data):
+    '''
+    Return the rows of the number of states and the total duration of each
+    SLS file
     '''
+    totals = {}
+    for host in data:
+        for sid in data[host]:
+            dat = data[host][sid]
+            if not isinstance(dat, dict):
+                continue
+            sls = dat.get('__sls__') or '<>'
+            count, dur = totals.get(sls, (0, 0.0))
+            totals[sls] = (count + 1, dur + float(dat.get('duration', 0)))
+    return [[sls, '{0}'.format(count), '{0:0.4f}'.format(dur)]
+            for sls, (count, dur) in sorted(totals.items(), key=lambda x: x[1][1])]
 
-    rows = _find_durations(data)
 
-    kwargs['opts'] = __opts__
+def output(data, **kwargs):
+    '''
+    Display the profiling data in a table format.
+    '''
     kwargs['rows_key'] = 'rows'
     kwargs['labels_key'] = 'labels'
 
-    to_show = {'labels': ['name', 'mod.fun', 'duration (ms)'],
-               'rows':   rows}
-
-    return table_out.output(to_show, **kwargs)
+    if not _profiled(data):
+        to_show = {'labels': ['name', 'mod.fun', 'duration (ms)'],
+                   'rows':   _find_durations(data)}
+        return table_out.output(to_show, opts=__opts__, **kwargs)
+
+    tables = [
+        {'labels': ['name', 'mod.fun', 'duration (ms)'] + list(PHASES),
+         'rows':   _find_phases(data)},
+        {'labels': ['sls', 'states', 'duration (ms)'],
+         'rows':   _find_sls(data)},
+    ]
+    return '\n\n'.join(table_out.output(to_show, opts=__opts__, **kwargs)
+                        for to_show in tables)
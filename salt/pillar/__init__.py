@@ -12,6 +12,8 @@ import collections
 import logging
 import tornado.gen
 import sys
+import threading
+import time
 import traceback
 import inspect
 
@@ -25,6 +27,11 @@ import salt.utils.cache
 import salt.utils.crypt
 import salt.utils.data
 import salt.utils.dictupdate
+import salt.utils.files
+import salt.utils.hashutils
+import salt.utils.json
+import salt.utils.path
+import salt.utils.stringutils
 import salt.utils.url
 from salt.exceptions import SaltClientError
 from salt.template import compile_template
@@ -40,6 +47,21 @@ from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# Content hashes of the pillar files keyed by path, with the mtime and size
+# they were computed for
+_FILE_HASHES = {}
+
+# Rendered minion-independent pillar SLS files shared by every pillar compiled
+# in this process, see pillar_render_cache
+_RENDER_CACHE = None
+
+# Renderers whose output only depends on the content of a file which holds no
+# template syntax
+STATIC_RENDERERS = frozenset(('jinja', 'yaml', 'yamlex', 'json'))
+JINJA_MARKERS = (b'{{', b'{%', b'{#')
+JINJA_SYNTAX_OPTS = ('block_start_string', 'variable_start_string',
+                     'comment_start_string', 'line_statement_prefix')
+
 
 def get_pillar(opts, grains, minion_id, saltenv=None, ext=None, funcs=None,
                pillar_override=None, pillarenv=None, extra_minion_data=None):
@@ -328,6 +350,124 @@ class PillarCache(object):
                               pillarenv=self.pillarenv)
         return fresh_pillar.compile_pillar()
 
+    def _cacheable(self):
+        '''
+        Return True if every ext_pillar used by the minion is listed in
+        pillar_cache_ext_pillar
+        '''
+        cacheable = self.opts.get('pillar_cache_ext_pillar') or []
+        runs = list(self.opts.get('ext_pillar') or [])
+        if self.ext:
+            runs.append(self.ext)
+        for run in runs:
+            if not isinstance(run, dict):
+                return False
+            for key in run:
+                if key in self.opts.get('exclude_ext_pillar', []):
+                    continue
+                if key not in cacheable:
+                    log.debug('Not caching the pillar of minion %s, ext_pillar '
+                              '%s is not cacheable', self.minion_id, key)
+                    return False
+        return True
+
+    def _pillar_files(self):
+        '''
+        Return the mtime and size of every file under the pillar roots
+        '''
+        files = {}
+        for roots in six.itervalues(self.opts.get('pillar_roots', {})):
+            for root in roots:
+                for dirpath, dirnames, filenames in salt.utils.path.os_walk(root):
+                    for name in filenames:
+                        path = os.path.join(dirpath, name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        files[path] = [stat.st_mtime, stat.st_size]
+        return files
+
+    @staticmethod
+    def _file_hash(path, mtime, size):
+        '''
+        Return the content hash of a pillar file, computed once per version
+        of the file
+        '''
+        cached = _FILE_HASHES.get(path)
+        if cached is None or cached[:2] != [mtime, size]:
+            try:
+                cached = [mtime, size, salt.utils.hashutils.get_hash(path)]
+            except (IOError, OSError):
+                return None
+            _FILE_HASHES[path] = cached
+        return cached[2]
+
+    def _fingerprint(self):
+        '''
+        Return the inputs the pillar of the minion is compiled from. The
+        files are hashed here, before the pillar is compiled from them.
+        '''
+        def _digest(data):
+            return salt.utils.hashutils.sha256_digest(
+                salt.utils.json.dumps(data, sort_keys=True, default=repr))
+        files = self._pillar_files()
+        for path, stat in six.iteritems(files):
+            stat.append(self._file_hash(path, *stat))
+        return {'grains': _digest(self.grains or {}),
+                'env': [self.saltenv, self.pillarenv],
+                'ext_pillar': _digest([self.opts.get('ext_pillar'), self.ext]),
+                'files': files}
+
+    def _fingerprint_matches(self, cached, current):
+        '''
+        Compare a stored fingerprint with the current one. Files whose mtime
+        changed but whose content did not, as after a checkout, still match.
+        '''
+        for key in ('grains', 'env', 'ext_pillar'):
+            if cached.get(key) != current[key]:
+                return False
+        cached_files = cached.get('files', {})
+        if set(cached_files) != set(current['files']):
+            return False
+        for path, stat in six.iteritems(current['files']):
+            old = cached_files[path]
+            if old[:2] == stat[:2]:
+                continue
+            if old[2] is None or old[2] != stat[2]:
+                return False
+        return True
+
+    def fetch_fingerprinted_pillar(self):
+        '''
+        Return the cached pillar if none of its inputs changed, otherwise
+        compile and cache it
+        '''
+        if not self._cacheable():
+            return self.fetch_pillar()
+        fingerprint = self._fingerprint()
+        entries = self.cache[self.minion_id] if self.minion_id in self.cache else None
+        entry = (entries or {}).get(self.pillarenv)
+        if isinstance(entry, dict) and '__fingerprint__' in entry \
+                and self._fingerprint_matches(entry['__fingerprint__'], fingerprint):
+            log.debug('Pillar cache hit for minion %s and pillarenv %s', self.minion_id, self.pillarenv)
+            return entry['__pillar__']
+
+        log.debug('Pillar cache miss for minion %s and pillarenv %s', self.minion_id, self.pillarenv)
+        pillar_data = self.fetch_pillar()
+        files = dict((path, stat[:2]) for path, stat in six.iteritems(fingerprint['files']))
+        if self._pillar_files() != files:
+            log.debug('Pillar files of minion %s changed while compiling, '
+                      'not caching its pillar', self.minion_id)
+            return pillar_data
+        entry = {'__fingerprint__': fingerprint, '__pillar__': pillar_data}
+        if entries is None:
+            self.cache[self.minion_id] = {self.pillarenv: entry}
+        else:
+            entries[self.pillarenv] = entry
+            self.cache.store()
+        return pillar_data
+
     def compile_pillar(self, *args, **kwargs):  # Will likely just be pillar_dirs
         '''
         Compile pillar and set it to the cache, if not found.
@@ -336,6 +476,9 @@ class PillarCache(object):
         :param kwargs:
         :return:
         '''
+        if self.opts.get('pillar_cache_fingerprint', False):
+            return self._merge_override(self.fetch_fingerprinted_pillar())
+
         log.debug('Scanning pillar cache for information about minion %s and pillarenv %s', self.minion_id, self.pillarenv)
         log.debug('Scanning cache for minion %s: %s', self.minion_id, self.cache[self.minion_id] or '*empty*')
 
@@ -359,6 +502,9 @@ class PillarCache(object):
             log.debug('Pillar cache has been added for minion %s', self.minion_id)
             log.debug('Current pillar cache: %s', self.cache[self.minion_id])
 
+        return self._merge_override(pillar_data)
+
+    def _merge_override(self, pillar_data):
         # we dont want the pillar_override baked into the cached fetch_pillar from above
         if self.pillar_override:
             pillar_data = merge(
@@ -751,15 +897,7 @@ class Pillar(object):
                 return None, mods, errors
         state = None
         try:
-            state = compile_template(fn_,
-                                     self.rend,
-                                     self.opts['renderer'],
-                                     self.opts['renderer_blacklist'],
-                                     self.opts['renderer_whitelist'],
-                                     saltenv,
-                                     sls,
-                                     _pillar_rend=True,
-                                     **defaults)
+            state = self._render_sls(fn_, saltenv, sls, defaults)
         except Exception as exc:
             msg = 'Rendering SLS \'{0}\' failed, render error:\n{1}'.format(
                 sls, exc
@@ -857,6 +995,65 @@ class Pillar(object):
                                         self.opts.get('pillar_merge_lists', False))
         return state, mods, errors
 
+    def _static_sls(self, sls, content):
+        '''
+        Return True if rendering an SLS file does not depend on the minion,
+        either because it was declared so in pillar_render_cache_static or
+        because it holds no template syntax
+        '''
+        for pattern in self.opts.get('pillar_render_cache_static') or []:
+            if fnmatch.fnmatch(sls, pattern):
+                return True
+        for opt in ('jinja_env', 'jinja_sls_env'):
+            if any(key in (self.opts.get(opt) or {}) for key in JINJA_SYNTAX_OPTS):
+                # Custom delimiters, we cannot tell templates apart
+                return False
+        if any(marker in content for marker in JINJA_MARKERS):
+            return False
+        renderer = self.opts['renderer']
+        if content.startswith(b'#!'):
+            renderer = salt.utils.stringutils.to_unicode(
+                content.split(b'\n', 1)[0][2:])
+        return all(rend.strip() in STATIC_RENDERERS for rend in renderer.split('|'))
+
+    def _render_sls(self, fn_, saltenv, sls, defaults):
+        '''
+        Render a pillar SLS file, reusing the data rendered for another minion
+        if the file does not depend on the minion
+        '''
+        global _RENDER_CACHE  # pylint: disable=global-statement
+        size = self.opts.get('pillar_render_cache_size', 1000)
+        key = None
+        if self.opts.get('pillar_render_cache', False) and size and not defaults:
+            try:
+                with salt.utils.files.fopen(fn_, 'rb') as fp_:
+                    content = fp_.read()
+            except (IOError, OSError):
+                content = None
+            if content is not None and self._static_sls(sls, content):
+                if _RENDER_CACHE is None or _RENDER_CACHE.size != size:
+                    _RENDER_CACHE = salt.utils.cache.CacheLRU(size)
+                key = (salt.utils.hashutils.sha256_digest(content),
+                       saltenv,
+                       sls,
+                       self.opts['renderer'])
+                if key in _RENDER_CACHE:
+                    log.trace('Using the cached render of pillar SLS %s', sls)
+                    # The caller modifies the data it is handed
+                    return copy.deepcopy(_RENDER_CACHE[key])
+        state = compile_template(fn_,
+                                 self.rend,
+                                 self.opts['renderer'],
+                                 self.opts['renderer_blacklist'],
+                                 self.opts['renderer_whitelist'],
+                                 saltenv,
+                                 sls,
+                                 _pillar_rend=True,
+                                 **defaults)
+        if key is not None:
+            _RENDER_CACHE[key] = copy.deepcopy(state)
+        return state
+
     def render_pillar(self, matches, errors=None):
         '''
         Extract the sls pillar files from the matches and render them into the
@@ -985,6 +1182,9 @@ class Pillar(object):
                 self.opts.get('renderer', 'yaml'),
                 self.opts.get('pillar_merge_lists', False))
 
+        if self.opts.get('ext_pillar_parallel', False):
+            return self._parallel_ext_pillar(pillar, errors)
+
         for run in self.opts['ext_pillar']:
             if not isinstance(run, dict):
                 errors.append('The "ext_pillar" option is malformed')
@@ -1024,6 +1224,90 @@ class Pillar(object):
                 ext = None
         return pillar, errors
 
+    def _ext_pillar_timeout(self, key):
+        '''
+        Return the timeout of an ext_pillar in parallel mode, None if it has
+        none
+        '''
+        timeout = self.opts.get('ext_pillar_timeout')
+        if isinstance(timeout, dict):
+            timeout = timeout.get(key)
+        return timeout or None
+
+    def _parallel_ext_pillar(self, pillar, errors):
+        '''
+        Run the external pillars concurrently, each of them is passed the
+        pillar data compiled before any external pillar ran. The results are
+        merged in the configured order.
+        '''
+        runs = []
+        for run in self.opts['ext_pillar']:
+            if not isinstance(run, dict):
+                errors.append('The "ext_pillar" option is malformed')
+                log.critical(errors[-1])
+                return {}, errors
+            if next(six.iterkeys(run)) in self.opts.get('exclude_ext_pillar', []):
+                continue
+            for key, val in six.iteritems(run):
+                if key not in self.ext_pillars:
+                    log.critical(
+                        'Specified ext_pillar interface %s is unavailable',
+                        key
+                    )
+                    continue
+                runs.append((key, val, {}))
+
+        def _run(key, val, data, result):
+            try:
+                result['ext'] = self._external_pillar_data(data, val, key)
+            except Exception as exc:
+                result['exc'] = exc
+                result['tb'] = ''.join(traceback.format_tb(sys.exc_info()[2]))
+
+        threads = []
+        for key, val, result in runs:
+            # Each ext_pillar gets its own copy since they may modify it
+            thread = threading.Thread(target=_run,
+                                      args=(key, val, copy.deepcopy(pillar), result),
+                                      name='ext_pillar-{0}'.format(key))
+            thread.daemon = True
+            thread.start()
+            threads.append((thread, time.time()))
+
+        for (key, val, result), (thread, start) in zip(runs, threads):
+            timeout = self._ext_pillar_timeout(key)
+            if timeout is None:
+                thread.join()
+            else:
+                thread.join(max(0, start + timeout - time.time()))
+            if thread.is_alive():
+                errors.append(
+                    'Failed to load ext_pillar {0}: timed out after {1} '
+                    'seconds'.format(key, timeout)
+                )
+                log.error(errors[-1])
+                continue
+            if 'exc' in result:
+                errors.append(
+                    'Failed to load ext_pillar {0}: {1}'.format(
+                        key,
+                        result['exc'].__str__(),
+                    )
+                )
+                log.error(
+                    'Exception caught loading ext_pillar \'%s\':\n%s',
+                    key, result['tb']
+                )
+                continue
+            if result.get('ext'):
+                pillar = merge(
+                    pillar,
+                    result['ext'],
+                    self.merge_strategy,
+                    self.opts.get('renderer', 'yaml'),
+                    self.opts.get('pillar_merge_lists', False))
+        return pillar, errors
+
     def compile_pillar(self, ext=True):
         '''
         Render the pillar data and return
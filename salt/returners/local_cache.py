@@ -27,6 +27,11 @@ import salt.exceptions
 # Import 3rd-party libs
 from salt.ext import six
 from salt.ext.six.moves import range  # pylint: disable=import-error,redefined-builtin
+try:
+    import sqlite3
+    HAS_SQLITE3 = True
+except ImportError:
+    HAS_SQLITE3 = False
 
 log = logging.getLogger(__name__)
 
@@ -42,8 +47,17 @@ SYNDIC_MINIONS_P = '.minions.{0}.p'
 RETURN_P = 'return.p'
 # out is the "out" from the minion data
 OUT_P = 'out.p'
+# the frames of state returns streamed by the minions, one directory per
+# minion holding one file per frame
+STREAM_DIR = '.stream'
 # endtime is the end time for a job, not stored as msgpack
 ENDTIME = 'endtime'
+# sqlite index of the jobs in the cache, kept in the cachedir next to the
+# jobs directory, see job_cache_index
+INDEX_DB = 'jobs.index.sqlite'
+
+# The index connection of this process, connections must not cross a fork
+_INDEX = {}
 
 
 def _job_dir():
@@ -84,6 +98,150 @@ def _walk_through(job_dir):
                 yield jid, job, t_path, final
 
 
+def _index():
+    '''
+    Return the sqlite connection to the job index, or None if the index is
+    disabled. The index may not have been built yet, see _ready_index.
+    '''
+    if not __opts__.get('job_cache_index', False) or not HAS_SQLITE3:
+        return None
+    if _INDEX.get('pid') == os.getpid():
+        return _INDEX['conn']
+
+    try:
+        if not os.path.isdir(__opts__['cachedir']):
+            os.makedirs(__opts__['cachedir'])
+        conn = sqlite3.connect(os.path.join(__opts__['cachedir'], INDEX_DB),
+                               timeout=30,
+                               isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                     'jid TEXT PRIMARY KEY, created REAL NOT NULL, '
+                     'fun TEXT, load BLOB, endtime TEXT)')
+        conn.execute('CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created)')
+        conn.execute('CREATE TABLE IF NOT EXISTS meta ('
+                     'key TEXT PRIMARY KEY, value REAL)')
+        _INDEX.clear()
+        _INDEX.update({'pid': os.getpid(), 'conn': conn})
+    except (OSError, sqlite3.Error) as exc:
+        log.error('Unable to open the job cache index, falling back to '
+                  'walking the job cache: %s', exc)
+        _INDEX.clear()
+        return None
+    return conn
+
+
+def _ready_index():
+    '''
+    Return the sqlite connection to the job index once the Maintenance
+    process has built it. Until then None is returned and readers walk the
+    job cache.
+    '''
+    conn = _index()
+    if conn is None:
+        return None
+    if not _INDEX.get('built'):
+        try:
+            _INDEX['built'] = _index_meta(conn, 'built') is not None
+        except sqlite3.Error as exc:
+            log.error('Unable to read the job cache index: %s', exc)
+            return None
+    return conn if _INDEX['built'] else None
+
+
+def _index_meta(conn, key):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_index_meta(conn, key, value):
+    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+
+def _build_index(conn):
+    '''
+    Index the jobs already present in the job cache. The jobs are committed
+    in batches so that the workers recording new jobs are not held up for
+    the whole walk.
+    '''
+    serial = salt.payload.Serial(__opts__)
+    if os.path.isdir(_job_dir()):
+        log.info('Building the job cache index')
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for count, (jid, job, t_path, final) in enumerate(_walk_through(_job_dir()), 1):
+                try:
+                    created = os.stat(os.path.join(t_path, final, 'jid')).st_ctime
+                except OSError:
+                    created = time.time()
+                _index_load(conn, serial, jid, job, created=created)
+                if not count % 1000:
+                    conn.execute('COMMIT')
+                    conn.execute('BEGIN IMMEDIATE')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    _set_index_meta(conn, 'full_clean', time.time())
+    _set_index_meta(conn, 'built', time.time())
+
+
+def _index_load(conn, serial, jid, load, created=None):
+    '''
+    Record the load of a job in the index
+    '''
+    fun = load.get('fun')
+    if not isinstance(fun, six.string_types):
+        fun = None
+    conn.execute('INSERT OR IGNORE INTO jobs (jid, created) VALUES (?, ?)',
+                 (jid, created or time.time()))
+    conn.execute('UPDATE jobs SET fun = ?, load = ? WHERE jid = ?',
+                 (fun, sqlite3.Binary(serial.dumps(load)), jid))
+
+
+def _index_call(func, *args):
+    '''
+    Run ``func(conn, *args)`` against the index, index errors are logged and
+    never fail the job cache operation itself
+    '''
+    conn = _index()
+    if conn is None:
+        return
+    try:
+        func(conn, *args)
+    except sqlite3.Error as exc:
+        log.error('Failed to update the job cache index: %s', exc)
+
+
+def _index_jid(conn, jid):
+    conn.execute('INSERT OR IGNORE INTO jobs (jid, created) VALUES (?, ?)',
+                 (jid, time.time()))
+
+
+def _index_endtime(conn, jid, endtime):
+    _index_jid(conn, jid)
+    conn.execute('UPDATE jobs SET endtime = ? WHERE jid = ?', (endtime, jid))
+
+
+def _indexed_jobs(conn, count=None, filter_find_job=False):
+    '''
+    Yield (jid, load, endtime) from the index in ascending jid order, only
+    the ``count`` most recent jobs if count is passed
+    '''
+    serial = salt.payload.Serial(__opts__)
+    query = 'SELECT jid, load, endtime FROM jobs WHERE load IS NOT NULL'
+    params = ()
+    if filter_find_job:
+        query += ' AND fun IS NOT ?'
+        params = ('saltutil.find_job',)
+    query += ' ORDER BY jid DESC'
+    if count is not None:
+        query += ' LIMIT ?'
+        params += (count,)
+    for jid, load, endtime in reversed(conn.execute(query, params).fetchall()):
+        yield jid, serial.loads(bytes(load)), endtime
+
+
 #TODO: add to returner docs-- this is a new one
 def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
     '''
@@ -127,6 +285,7 @@ def prep_jid(nocache=False, passed_jid=None, recurse_count=0):
         return prep_jid(passed_jid=jid, nocache=nocache,
                         recurse_count=recurse_count+1)
 
+    _index_call(_index_jid, jid)
     return jid
 
 
@@ -165,7 +324,7 @@ def returner(load):
         raise
 
     serial.dump(
-        dict((key, load[key]) for key in ['return', 'retcode', 'success'] if key in load),
+        dict((key, load[key]) for key in ['return', 'retcode', 'success', 'stream'] if key in load),
         # Use atomic open here to avoid the file being read before it's
         # completely written to. Refs #1935
         salt.utils.atomicfile.atomic_open(
@@ -184,6 +343,64 @@ def returner(load):
         )
 
 
+def save_stream(load):
+    '''
+    Save a frame of state returns streamed by a minion, returns True once it
+    is stored
+    '''
+    serial = salt.payload.Serial(__opts__)
+    jid_dir = salt.utils.jid.jid_dir(load['jid'], _job_dir(), __opts__['hash_type'])
+    if not os.path.isdir(jid_dir) or os.path.exists(os.path.join(jid_dir, 'nocache')):
+        return False
+    stream_dir = os.path.join(jid_dir, STREAM_DIR, load['id'])
+    try:
+        os.makedirs(stream_dir)
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+    serial.dump(
+        load['return'],
+        salt.utils.atomicfile.atomic_open(
+            os.path.join(stream_dir, '{0}-{1:08d}.p'.format(load['stream'], load['seq'])), 'w+b'
+        )
+    )
+    return True
+
+
+def _load_stream(jid_dir, minion_id, ret_data, serial):
+    '''
+    Add the state returns the minion streamed while running to a return
+    which only holds the states which did not succeed
+    '''
+    stream_dir = os.path.join(jid_dir, STREAM_DIR, minion_id)
+    summary = ret_data.pop('stream', None)
+    ret = ret_data['return']
+    if not isinstance(summary, dict) or not isinstance(ret, dict) \
+            or not os.path.isdir(stream_dir):
+        return
+    # Only the frames of this run
+    prefix = '{0}-'.format(summary.get('stream'))
+    for fn_ in sorted(os.listdir(stream_dir)):
+        if not fn_.startswith(prefix):
+            continue
+        with salt.utils.files.fopen(os.path.join(stream_dir, fn_), 'rb') as rfh:
+            for tag, data in six.iteritems(serial.load(rfh)):
+                # The returns of failed states are also in the job return
+                ret.setdefault(tag, data)
+
+
+def returner_batch(loads):
+    '''
+    Return a batch of returns to the local job cache
+    '''
+    for load in loads:
+        try:
+            returner(load)
+        except Exception:
+            log.error('Could not store the return from %s for job %s',
+                      load.get('id'), load.get('jid'), exc_info=True)
+
+
 def save_load(jid, clear_load, minions=None, recurse_count=0):
     '''
     Save the load to the specified jid
@@ -223,6 +440,7 @@ def save_load(jid, clear_load, minions=None, recurse_count=0):
         time.sleep(0.1)
         return save_load(jid=jid, clear_load=clear_load,
                          recurse_count=recurse_count+1)
+    _index_call(_index_load, serial, jid, clear_load)
 
     # if you have a tgt, save that for the UI etc
     if 'tgt' in clear_load and clear_load['tgt'] != '':
@@ -361,6 +579,7 @@ def get_jid(jid):
                         # the new that is dict containing 'return' and optionally 'retcode' and
                         # 'success'.
                         ret_data = {'return': ret_data}
+                    _load_stream(jid_dir, fn_, ret_data, serial)
                     ret[fn_] = ret_data
                     if os.path.isfile(outp):
                         with salt.utils.files.fopen(outp, 'rb') as rfh:
@@ -376,6 +595,14 @@ def get_jids():
     Return a dict mapping all job ids to job information
     '''
     ret = {}
+    conn = _ready_index()
+    if conn is not None:
+        for jid, job, endtime in _indexed_jobs(conn):
+            ret[jid] = salt.utils.jid.format_jid_instance(jid, job)
+            if __opts__.get('job_cache_store_endtime') and endtime:
+                ret[jid]['EndTime'] = endtime
+        return ret
+
     for jid, job, _, _ in _walk_through(_job_dir()):
         ret[jid] = salt.utils.jid.format_jid_instance(jid, job)
 
@@ -393,6 +620,11 @@ def get_jids_filter(count, filter_find_job=True):
     :param int count: show not more than the count of most recent jobs
     :param bool filter_find_jobs: filter out 'saltutil.find_job' jobs
     '''
+    conn = _ready_index()
+    if conn is not None:
+        return [salt.utils.jid.format_jid_instance_ext(jid, job)
+                for jid, job, _ in _indexed_jobs(conn, count, filter_find_job)]
+
     keys = []
     ret = []
     for jid, job, _, _ in _walk_through(_job_dir()):
@@ -414,12 +646,28 @@ def clean_old_jobs():
     '''
     Clean out the old jobs from the job cache
     '''
+    # Called from the Maintenance process, which builds the index
+    conn = _index()
+    if conn is not None and _ready_index() is None:
+        try:
+            _build_index(conn)
+        except sqlite3.Error as exc:
+            log.error('Failed to build the job cache index: %s', exc)
     if __opts__['keep_jobs'] != 0:
         jid_root = _job_dir()
 
         if not os.path.exists(jid_root):
             return
 
+        conn = _ready_index()
+        if conn is not None:
+            try:
+                if _clean_indexed_jobs(conn):
+                    return
+            except sqlite3.Error as exc:
+                log.error('Failed to clean jobs through the job cache '
+                          'index: %s', exc)
+
         # Keep track of any empty t_path dirs that need to be removed later
         dirs_to_remove = set()
 
@@ -466,6 +714,33 @@ def clean_old_jobs():
                     shutil.rmtree(t_path)
 
 
+def _clean_indexed_jobs(conn):
+    '''
+    Remove the jobs older than keep_jobs with a range query on the index.
+    Returns False when the job cache tree should also be walked, which
+    happens once per keep_jobs period to catch jobs the index never saw.
+    '''
+    now = time.time()
+    cutoff = now - __opts__['keep_jobs'] * 3600
+    expired = [row[0] for row in conn.execute(
+        'SELECT jid FROM jobs WHERE created < ?', (cutoff,)).fetchall()]
+    for jid in expired:
+        jid_dir = salt.utils.jid.jid_dir(jid, _job_dir(), __opts__['hash_type'])
+        if os.path.exists(jid_dir):
+            try:
+                shutil.rmtree(jid_dir)
+            except OSError as err:
+                log.error('Unable to remove %s: %s', jid_dir, err)
+                continue
+        conn.execute('DELETE FROM jobs WHERE jid = ?', (jid,))
+
+    full_clean = _index_meta(conn, 'full_clean') or 0
+    if now - full_clean < __opts__['keep_jobs'] * 3600:
+        return True
+    _set_index_meta(conn, 'full_clean', now)
+    return False
+
+
 def update_endtime(jid, time):
     '''
     Update (or store) the end time for a given job
@@ -480,6 +755,7 @@ def update_endtime(jid, time):
             etfile.write(salt.utils.stringutils.to_str(time))
     except IOError as exc:
         log.warning('Could not write job invocation cache file: %s', exc)
+    _index_call(_index_endtime, jid, time)
 
 
 def get_endtime(jid):
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+'''
+Report the request latency of the master workers
+
+.. versionadded:: Neon
+
+The master workers record how long they take to serve each command when
+:conf_master:`master_stats` is enabled and save their histograms every
+:conf_master:`master_stats_event_iter` seconds. This runner merges the
+histograms of all the workers, which helps sizing
+:conf_master:`worker_threads`.
+'''
+from __future__ import absolute_import, print_function, unicode_literals
+
+# Import python libs
+import logging
+
+# Import salt libs
+import salt.utils.metrics
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+
+def _merged():
+    # Ignore the workers which have not reported in the last two periods
+    workers = salt.utils.metrics.read_worker_stats(
+        __opts__, max_age=2 * __opts__['master_stats_event_iter'])
+    return salt.utils.metrics.merge_worker_stats(workers)
+
+
+def workers():
+    '''
+    Return the latency percentiles of every command served by the master
+    workers, in seconds, and how busy each worker was over the last
+    :conf_master:`master_stats_event_iter` period
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt-run metrics.workers
+    '''
+    if not __opts__.get('master_stats'):
+        log.warning('master_stats is disabled, the master workers do not '
+                    'record their latency')
+    histograms, busy = _merged()
+    return {'commands': dict((cmd, hist.summary())
+                             for cmd, hist in six.iteritems(histograms)),
+            'busy': busy,
+            'busy_mean': sum(busy.values()) / len(busy) if busy else 0.0}
+
+
+def prometheus():
+    '''
+    Return the worker metrics in the Prometheus text exposition format
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt-run metrics.prometheus --out=txt
+    '''
+    histograms, busy = _merged()
+    lines = ['# HELP salt_master_request_seconds Time spent serving requests',
+             '# TYPE salt_master_request_seconds histogram']
+    for cmd in sorted(histograms):
+        hist = histograms[cmd]
+        cumulative = 0
+        for bound, count in zip(salt.utils.metrics.BUCKETS, hist.counts):
+            cumulative += count
+            lines.append('salt_master_request_seconds_bucket{{cmd="{0}",le="{1}"}} {2}'.format(
+                cmd, bound, cumulative))
+        lines.append('salt_master_request_seconds_bucket{{cmd="{0}",le="+Inf"}} {1}'.format(
+            cmd, hist.count))
+        lines.append('salt_master_request_seconds_sum{{cmd="{0}"}} {1}'.format(cmd, hist.total))
+        lines.append('salt_master_request_seconds_count{{cmd="{0}"}} {1}'.format(cmd, hist.count))
+    lines.extend(['# HELP salt_master_worker_busy_ratio Share of time spent serving requests',
+                  '# TYPE salt_master_worker_busy_ratio gauge'])
+    for name in sorted(busy):
+        lines.append('salt_master_worker_busy_ratio{{worker="{0}"}} {1}'.format(name, busy[name]))
+    return '\n'.join(lines) + '\n'
@@ -25,9 +25,13 @@ import traceback
 import re
 import time
 import random
+import uuid
+import select
+import multiprocessing
 import collections
 
 # Import salt libs
+import salt.crypt
 import salt.loader
 import salt.minion
 import salt.pillar
@@ -41,11 +45,15 @@ import salt.utils.event
 import salt.utils.files
 import salt.utils.hashutils
 import salt.utils.immutabletypes as immutabletypes
+import salt.utils.json
 import salt.utils.msgpack as msgpack
+import salt.utils.path
 import salt.utils.platform
 import salt.utils.process
+import salt.utils.stringutils
 import salt.utils.url
 import salt.syspaths as syspaths
+import salt.version
 import salt.transport.client
 from salt.serializers.msgpack import serialize as msgpack_serialize, deserialize as msgpack_deserialize
 from salt.template import compile_template, compile_template_str
@@ -54,6 +62,10 @@ from salt.exceptions import (
     SaltReqTimeoutError
 )
 from salt.utils.odict import OrderedDict, DefaultOrderedDict
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 # Explicit late import to avoid circular import. DO NOT MOVE THIS.
 import salt.utils.yamlloader as yamlloader
 
@@ -133,6 +145,47 @@ STATE_RUNTIME_KEYWORDS = frozenset([
 
 STATE_INTERNAL_KEYWORDS = STATE_REQUISITE_KEYWORDS.union(STATE_REQUISITE_IN_KEYWORDS).union(STATE_RUNTIME_KEYWORDS)
 
+# The requisites which order chunks when running them concurrently
+CONCURRENT_REQUISITE_KEYWORDS = frozenset([
+    'onchanges',
+    'onchanges_any',
+    'onfail',
+    'onfail_any',
+    'onfail_all',
+    'watch',
+    'watch_any',
+    'require',
+    'require_any',
+    ])
+# Chunks using these keywords run alone when running chunks concurrently
+CONCURRENT_SERIAL_KEYWORDS = frozenset([
+    'prereq',
+    'prerequired',
+    '__prereq__',
+    'parallel',
+    ])
+
+# Low chunks are plain dicts where dicts keep their order, an OrderedDict
+# takes twice the memory
+if sys.version_info >= (3, 6):
+    LowChunk = dict
+else:
+    LowChunk = OrderedDict
+
+# The keys of a chunk return which are not streamed to the master
+STREAM_DROP_KEYS = frozenset([
+    '__saltfunc__',
+    'pchanges',
+    'skip_watch',
+    ])
+
+# The onlyif and unless conditions evaluated without running a command
+CHECK_BUILTIN_KEYWORDS = frozenset([
+    'file',
+    'directory',
+    'which',
+    ])
+
 
 def _odict_hashable(self):
     return id(self)
@@ -363,6 +416,210 @@ def mock_ret(cdata):
             'result': True}
 
 
+class RequisiteIndex(object):
+    '''
+    Resolve requisites against a list of low chunks without scanning the
+    whole list for every requisite. Chunks are indexed by name, ID and SLS,
+    plain requisites are hash lookups and globs are compiled once and matched
+    against the distinct names only. Resolved requisites are memoized.
+    '''
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.size = len(chunks)
+        self._position = {}
+        self._by_name = collections.defaultdict(list)
+        self._by_id = collections.defaultdict(list)
+        self._by_sls = collections.defaultdict(list)
+        for pos, chunk in enumerate(chunks):
+            self._position[id(chunk)] = pos
+            self._by_name[self._normcase(chunk['name'])].append(chunk)
+            self._by_id[self._normcase(chunk['__id__'])].append(chunk)
+            self._by_sls[self._normcase(chunk['__sls__'])].append(chunk)
+        self._cache = {}
+
+    def current(self, chunks):
+        '''
+        Return True if the index was built for this list of chunks
+        '''
+        return chunks is self.chunks and len(chunks) == self.size
+
+    @staticmethod
+    def _normcase(value):
+        # fnmatch normalizes the case of both sides on Windows
+        return os.path.normcase(six.text_type(value))
+
+    @classmethod
+    def _match(cls, index, pattern):
+        pattern = cls._normcase(pattern)
+        if not any(char in pattern for char in '*?['):
+            return index.get(pattern, [])
+        regex = re.compile(fnmatch.translate(pattern))
+        ret = []
+        for key, chunks in six.iteritems(index):
+            if regex.match(key):
+                ret.extend(chunks)
+        return ret
+
+    def lookup(self, req_key, req_val):
+        '''
+        Return the chunks matching a trimmed requisite in chunk order
+        '''
+        if req_val is None or not self.chunks:
+            return []
+        if not isinstance(req_val, six.string_types):
+            raise SaltRenderError(
+                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
+                    req_key, self.chunks[0]['name']))
+        key = (req_key, req_val)
+        if key not in self._cache:
+            if req_key == 'sls':
+                # Allow requisite tracking of entire sls files
+                found = self._match(self._by_sls, req_val)
+            else:
+                found = {}
+                for chunk in self._match(self._by_name, req_val) + self._match(self._by_id, req_val):
+                    if req_key == 'id' or chunk['state'] == req_key:
+                        found[id(chunk)] = chunk
+                found = list(found.values())
+            found.sort(key=lambda chunk: self._position[id(chunk)])
+            self._cache[key] = found
+        return self._cache[key]
+
+
+class NameIndex(object):
+    '''
+    Find the IDs of the high data declaring a state with an argument set to
+    a given value, as find_name does, without scanning the whole high data
+    for every lookup. The IDs changed after the index was built are passed
+    to touch and scanned again on lookup.
+    '''
+    def __init__(self, high):
+        self.high = high
+        self._position = {}
+        self._by_arg = collections.defaultdict(list)
+        self._touched = set()
+        for pos, nid in enumerate(high):
+            self._position[nid] = pos
+            for state, arg_val in self._args(high[nid]):
+                try:
+                    self._by_arg[(state, arg_val)].append(nid)
+                except TypeError:
+                    # Not hashable, cannot be equal to the name of an ID
+                    continue
+
+    @staticmethod
+    def _args(body):
+        if not isinstance(body, dict):
+            return
+        for state, args in six.iteritems(body):
+            if not isinstance(args, list):
+                continue
+            for arg in args:
+                if isinstance(arg, dict) and len(arg) == 1:
+                    yield state, arg[next(iter(arg))]
+
+    def touch(self, nid):
+        '''
+        Mark an ID whose declaration was changed
+        '''
+        self._touched.add(nid)
+
+    def find(self, name, state):
+        '''
+        Return the (ID, state) tuples find_name returns for a name which is
+        not an ID of the high data
+        '''
+        nids = [nid for nid in self._by_arg.get((state, name), [])
+                if nid not in self._touched]
+        for nid in self._touched:
+            nids.extend(nid for arg_state, arg_val in self._args(self.high.get(nid))
+                        if arg_state == state and arg_val == name)
+        nids.sort(key=self._position.get)
+        return [(nid, state) for nid in nids]
+
+
+class StateResult(MutableMapping):
+    '''
+    The return of a chunk kept in the running data once the chunk has run.
+    The keys all returns have are stored in slots instead of a dict, which
+    makes a return take about a third of the memory of a dict. It can be
+    used as a dict by the requisites and the state modules, call_high turns
+    the returns back into dicts.
+    '''
+    KEYS = ('name', 'result', 'changes', 'comment', 'duration', 'start_time',
+            '__id__', '__sls__', '__run_num__', '__saltfunc__')
+    _ATTRS = dict((key, '_' + key.strip('_')) for key in KEYS)
+    __slots__ = ('_name', '_result', '_changes', '_comment', '_duration',
+                 '_start_time', '_id', '_sls', '_run_num', '_saltfunc',
+                 '_extra')
+
+    def __init__(self, data=()):
+        self._extra = None
+        self.update(data)
+
+    def __getitem__(self, key):
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            try:
+                return getattr(self, attr)
+            except AttributeError:
+                raise KeyError(key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            setattr(self, attr, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        attr = self._ATTRS.get(key)
+        if attr is not None:
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                raise KeyError(key)
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def __iter__(self):
+        for key in self.KEYS:
+            if hasattr(self, self._ATTRS[key]):
+                yield key
+        if self._extra:
+            for key in self._extra:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def __reduce__(self):
+        return (StateResult, (dict(self),))
+
+    def copy(self):
+        return dict(self)
+
+
+def expand_results(running):
+    '''
+    Turn the StateResult returns of the running data back into dicts
+    '''
+    for tag, data in list(six.iteritems(running)):
+        if isinstance(data, StateResult):
+            running[tag] = dict(data)
+    return running
+
+
 class StateError(Exception):
     '''
     Custom exception class.
@@ -758,6 +1015,29 @@ class State(object):
         self.active = set()
         self.mod_init = set()
         self.pre = {}
+        self.requisite_index = None
+        self.incremental = None
+        self.fingerprints = {}
+        self.profile = self.opts.get('state_profile', False)
+        self.profiles = {}
+        self.profile_run = {}
+        self.check_cache = {}
+        # Nested runs, such as a state.sls called by module.run, return their
+        # states inside the return of the outer run
+        self.stream = bool(self.opts.get('state_stream', False) and jid
+                           and self.opts.get('master_uri')
+                           and not self.opts.get('local')
+                           and self.opts.get('__cli') != 'salt-call'
+                           and HighState.get_active() is None)
+        self.stream_buffer = {}
+        self.streamed = set()
+        # Frames are numbered per State, other runs of the same job stream
+        # under their own id
+        self.stream_id = uuid.uuid4().hex
+        self.stream_seq = 0
+        self.stream_failed = False
+        self.stream_channel = None
+        self.stream_token = None
         self.__run_num = 0
         self.jid = jid
         self.instance_id = six.text_type(id(self))
@@ -875,6 +1155,33 @@ class State(object):
 
         return ret
 
+    def _run_check_builtin(self, entry):
+        '''
+        Evaluate an onlyif or unless condition which only reads the system
+        in this process. The result is kept until a state reports changes.
+        '''
+        key = tuple(sorted((k, six.text_type(v)) for k, v in six.iteritems(entry)))
+        if key in self.check_cache:
+            return self.check_cache[key]
+        if 'which' in entry:
+            result = salt.utils.path.which(entry['which']) is not None
+        elif 'directory' in entry:
+            result = os.path.isdir(entry['directory'])
+        else:
+            result = os.path.isfile(entry['file'])
+            if result and 'regex' in entry:
+                try:
+                    with salt.utils.files.fopen(entry['file'], 'rb') as fp_:
+                        content = salt.utils.stringutils.to_unicode(
+                            fp_.read(), errors='replace')
+                except (IOError, OSError):
+                    result = False
+                else:
+                    result = re.search(entry['regex'], content, re.MULTILINE) is not None
+        log.debug('Condition %s evaluated to %s', entry, result)
+        self.check_cache[key] = result
+        return result
+
     def _run_check_onlyif(self, low_data, cmd_opts):
         '''
         Check that unless doesn't return 0, and that onlyif returns a 0.
@@ -901,16 +1208,18 @@ class State(object):
                 log.debug('Last command return code: %s', cmd)
                 _check_cmd(cmd)
             elif isinstance(entry, dict):
-                if 'fun' not in entry:
+                builtin = 'fun' not in entry and bool(CHECK_BUILTIN_KEYWORDS.intersection(entry))
+                if builtin:
+                    result = self._run_check_builtin(entry)
+                elif 'fun' not in entry:
                     ret['comment'] = 'no `fun` argument in onlyif: {0}'.format(entry)
                     log.warning(ret['comment'])
                     return ret
-
-                if 'args' in entry:
+                elif 'args' in entry:
                     result = self.functions[entry.pop('fun')](*entry.pop('args'), **entry)
                 else:
                     result = self.functions[entry.pop('fun')](**entry)
-                if self.state_con.get('retcode', 0):
+                if not builtin and self.state_con.get('retcode', 0):
                     _check_cmd(self.state_con['retcode'])
                 elif not result:
                     ret.update({'comment': 'onlyif condition is false',
@@ -949,16 +1258,18 @@ class State(object):
                 log.debug('Last command return code: %s', cmd)
                 _check_cmd(cmd)
             elif isinstance(entry, dict):
-                if 'fun' not in entry:
+                builtin = 'fun' not in entry and bool(CHECK_BUILTIN_KEYWORDS.intersection(entry))
+                if builtin:
+                    result = self._run_check_builtin(entry)
+                elif 'fun' not in entry:
                     ret['comment'] = 'no `fun` argument in unless: {0}'.format(entry)
                     log.warning(ret['comment'])
                     return ret
-
-                if 'args' in entry:
+                elif 'args' in entry:
                     result = self.functions[entry.pop('fun')](*entry.pop('args'), **entry)
                 else:
                     result = self.functions[entry.pop('fun')](**entry)
-                if self.state_con.get('retcode', 0):
+                if not builtin and self.state_con.get('retcode', 0):
                     _check_cmd(self.state_con['retcode'])
                 elif result:
                     ret.update({'comment': 'unless condition is true',
@@ -1407,7 +1718,7 @@ class State(object):
                 names = []
                 if state.startswith('__'):
                     continue
-                chunk = OrderedDict()
+                chunk = LowChunk()
                 chunk['state'] = state
                 chunk['name'] = name
                 if orchestration_jid is not None:
@@ -1467,6 +1778,7 @@ class State(object):
         if '__extend__' not in high:
             return high, errors
         ext = high.pop('__extend__')
+        index = None
         for ext_chunk in ext:
             for name, body in six.iteritems(ext_chunk):
                 if name not in high:
@@ -1474,7 +1786,12 @@ class State(object):
                         x for x in body if not x.startswith('__')
                     )
                     # Check for a matching 'name' override in high data
-                    ids = find_name(name, state_type, high)
+                    if state_type == 'sls':
+                        ids = find_name(name, state_type, high)
+                    else:
+                        if index is None:
+                            index = NameIndex(high)
+                        ids = index.find(name, state_type)
                     if len(ids) != 1:
                         errors.append(
                             'Cannot extend ID \'{0}\' in \'{1}:{2}\'. It is not '
@@ -1491,6 +1808,8 @@ class State(object):
                     else:
                         name = ids[0][0]
 
+                if index is not None:
+                    index.touch(name)
                 for state, run in six.iteritems(body):
                     if state.startswith('__'):
                         continue
@@ -1861,6 +2180,52 @@ class State(object):
                 'proc': proc}
         return ret
 
+    def _profile_phase(self, low, phase, start):
+        '''
+        Add the milliseconds elapsed since start to a phase of the profile of
+        a chunk, the phases of a mod_watch call count for the watching chunk
+        '''
+        if not self.profile:
+            return
+        tag = '{0[state]}_|-{0[__id__]}_|-{0[name]}_|-{1}'.format(
+            low, low.get('sfun', low['fun']))
+        phases = self.profiles.setdefault(tag, {})
+        phases[phase] = phases.get(phase, 0.0) + (time.time() - start) * 1000
+
+    def _profile_step(self, step, start):
+        '''
+        Add the milliseconds elapsed since start to a step of the whole run
+        '''
+        if self.profile:
+            self.profile_run[step] = self.profile_run.get(step, 0.0) + (time.time() - start) * 1000
+
+    def _fire_profile(self, steps):
+        '''
+        Log the milliseconds spent in each step of a profiled run and fire
+        them on the event bus, the return of the run only holds the returns
+        of its states
+        '''
+        log.info('Milliseconds spent in the steps of the state run: %s', steps)
+        if not self.jid or self.opts.get('local'):
+            return
+        tag = salt.utils.event.tagify([self.jid, 'profile', self.opts['id']], 'job')
+        if not self.opts.get('master_uri'):
+            salt.utils.event.get_master_event(
+                self.opts, self.opts['sock_dir'], listen=False).fire_event(steps, tag)
+        else:
+            self.functions['event.fire_master'](steps, tag)
+
+    def _profile_ret(self, tag, ret):
+        '''
+        Move the profile gathered for a chunk into its return
+        '''
+        phases = self.profiles.pop(tag, None)
+        if not phases or not isinstance(ret, dict):
+            return
+        profile = ret.setdefault('__profile__', {})
+        for phase, duration in six.iteritems(phases):
+            profile[phase] = round(profile.get(phase, 0.0) + duration, 3)
+
     @salt.utils.decorators.state.OutputUnifier('content_check', 'unify')
     def call(self, low, chunks=None, running=None, retries=1):
         '''
@@ -1954,7 +2319,9 @@ class State(object):
             # not found we default to 'base'
             if ('unless' in low and '{0[state]}.mod_run_check'.format(low) not in self.states) or \
                     ('onlyif' in low and '{0[state]}.mod_run_check'.format(low) not in self.states):
+                start = time.time()
                 ret.update(self._run_check(low))
+                self._profile_phase(low, 'checks', start)
 
             if not self.opts.get('lock_saltenv', False):
                 # NOTE: Overriding the saltenv when lock_saltenv is blocked in
@@ -1981,6 +2348,7 @@ class State(object):
 
             if 'result' not in ret or ret['result'] is False:
                 self.states.inject_globals = inject_globals
+                start = time.time()
                 if self.mocked:
                     ret = mock_ret(cdata)
                 else:
@@ -1996,9 +2364,12 @@ class State(object):
                             ret = self.states[cdata['full']](cdata['args'], module=None, state=cdata['kwargs'])
                         else:
                             ret = self.states[cdata['full']](*cdata['args'], **cdata['kwargs'])
+                self._profile_phase(low, 'call', start)
                 self.states.inject_globals = {}
             if 'check_cmd' in low and '{0[state]}.mod_run_check_cmd'.format(low) not in self.states:
+                start = time.time()
                 ret.update(self._run_check_cmd(low))
+                self._profile_phase(low, 'checks', start)
         except Exception as exc:
             log.debug('An exception occurred in this state: %s', exc,
                       exc_info_on_loglevel=logging.DEBUG)
@@ -2028,6 +2399,10 @@ class State(object):
         if not isinstance(ret, dict):
             return ret
 
+        if ret.get('changes'):
+            # The conditions read the system this state just changed
+            self.check_cache.clear()
+
         # If format_call got any warnings, let's show them to the user
         if 'warnings' in cdata:
             ret.setdefault('warnings', []).extend(cdata['warnings'])
@@ -2281,6 +2656,15 @@ class State(object):
                         chunks.remove(low)
                         break
         running = {}
+        concurrency = self.opts.get('state_concurrency', 0)
+        if concurrency and concurrency > 1 and chunks:
+            if salt.utils.platform.is_windows():
+                log.warning('state_concurrency is not supported on Windows, '
+                            'running states one at a time')
+            else:
+                running = self.call_chunks_concurrent(chunks, concurrency)
+                ret = dict(list(disabled.items()) + list(running.items()))
+                return ret
         for low in chunks:
             if '__FAILHARD__' in running:
                 running.pop('__FAILHARD__')
@@ -2302,6 +2686,346 @@ class State(object):
         ret = dict(list(disabled.items()) + list(running.items()))
         return ret
 
+    def _concurrent_deps(self, chunks):
+        '''
+        Return the tags of the chunks each chunk waits for when running
+        chunks concurrently
+        '''
+        index = self._requisite_index(chunks)
+        deps = {}
+        for low in chunks:
+            tag = _gen_tag(low)
+            deps[tag] = set()
+            for r_state in CONCURRENT_REQUISITE_KEYWORDS.intersection(low):
+                for req in low[r_state] or []:
+                    if isinstance(req, six.string_types):
+                        req = {'id': req}
+                    req = trim_req(req)
+                    req_key = next(iter(req))
+                    for chunk in index.lookup(req_key, req[req_key]):
+                        deps[tag].add(_gen_tag(chunk))
+            deps[tag].discard(tag)
+        return deps
+
+    def _concurrent_order(self, low):
+        '''
+        Return the order group of a chunk, chunks only start once every chunk
+        of the lower groups has run. The orders set by state_auto_order only
+        prioritize chunks, they all belong to the same group.
+        '''
+        order = low.get('order', 0)
+        if not isinstance(order, (int, float)):
+            return 0
+        if self.opts.get('state_auto_order', True) and 10000 <= order < 1000000:
+            return 10000
+        return int(order)
+
+    def _call_concurrent_target(self, low, status, reqs, chunks, running, conn):
+        '''
+        Run a chunk in a worker process and send its return to the scheduler
+        '''
+        tag = _gen_tag(low)
+        try:
+            ret = self.call(low, chunks, running)
+            if status == 'change' and not ret['changes'] and not ret.get('skip_watch', False):
+                low = low.copy()
+                low['sfun'] = low['fun']
+                low['fun'] = 'mod_watch'
+                low['__reqs__'] = reqs
+                ret = self.call(low, chunks, running)
+        except Exception:
+            trb = traceback.format_exc()
+            ret = {'result': False,
+                   'name': low['name'],
+                   'changes': {},
+                   'comment': 'An exception occurred in this state: {0}'.format(trb)}
+        self._profile_ret(tag, ret)
+        try:
+            conn.send(ret)
+        except Exception as exc:
+            conn.send({'result': False,
+                       'name': low['name'],
+                       'changes': {},
+                       'comment': 'Unable to return the state result: {0}'.format(exc)})
+        conn.close()
+
+    def _start_concurrent(self, low, status, reqs, chunks, running):
+        '''
+        Fork a worker process running a chunk whose requisites are met
+        '''
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        proc = salt.utils.process.MultiprocessingProcess(
+                target=self._call_concurrent_target,
+                args=(low, status, reqs, chunks, running, writer))
+        proc.start()
+        # The worker holds the only writing end, reading gets EOF if it dies
+        writer.close()
+        return proc, reader, low
+
+    def _finish_concurrent(self, worker, running, chunks):
+        '''
+        Collect the return of a worker process
+        '''
+        proc, reader, low = worker
+        tag = _gen_tag(low)
+        try:
+            ret = reader.recv()
+        except (EOFError, IOError, OSError):
+            ret = {'result': False,
+                   'name': low['name'],
+                   'changes': {},
+                   'comment': 'Concurrent state process failed to return'}
+        reader.close()
+        proc.join()
+        ret['__run_num__'] = self.__run_num
+        self.__run_num += 1
+        ret.setdefault('__sls__', low.get('__sls__'))
+        ret['__saltfunc__'] = '{0}.{1}'.format(low['state'], low['fun'])
+        running[tag] = ret
+        if ret.get('changes'):
+            self.check_cache.clear()
+            # The changes were made by another process, drop what the modules
+            # of this state cached about the system
+            prefix = '{0}.'.format(low['state'])
+            for key in list(self.state_con):
+                if isinstance(key, six.string_types) and key.startswith(prefix):
+                    self.state_con.pop(key, None)
+        start = time.time()
+        self.event(ret, len(chunks), fire_event=low.get('fire_event'))
+        self._profile_phase(low, 'event', start)
+        self._profile_ret(tag, ret)
+        self._stream(tag, ret)
+        running[tag] = StateResult(ret)
+
+    def call_chunks_concurrent(self, chunks, concurrency):
+        '''
+        Run the chunks on up to ``concurrency`` worker processes, starting
+        each chunk as soon as the chunks it requires have run. Chunks using
+        prereq or parallel run alone in this process, as call_chunks would.
+        '''
+        deps = self._concurrent_deps(chunks)
+        running = {}
+        workers = {}
+        pending = list(chunks)
+        stop = False
+        while pending or workers:
+            progress = False
+            if not stop:
+                floor = min(self._concurrent_order(low)
+                            for low in pending + [worker[2] for worker in six.itervalues(workers)])
+                for low in list(pending):
+                    if len(workers) >= concurrency:
+                        break
+                    tag = _gen_tag(low)
+                    if tag in running:
+                        # Already run as the requisite of a serial chunk
+                        pending.remove(low)
+                        progress = True
+                        continue
+                    if self._concurrent_order(low) > floor:
+                        break
+                    if deps[tag].difference(running):
+                        continue
+                    serial = bool(CONCURRENT_SERIAL_KEYWORDS.intersection(low))
+                    if serial and workers:
+                        # Wait for the running workers before going on
+                        break
+                    pending.remove(low)
+                    progress = True
+                    if self.check_pause(low) == 'kill':
+                        stop = True
+                        break
+                    if not serial:
+                        low = self._mod_aggregate(low, running, chunks)
+                        self._mod_init(low)
+                        start = time.time()
+                        status, reqs = self.check_requisite(low, running, chunks, pre=True)
+                        self._profile_phase(low, 'requisites', start)
+                        if status in ('met', 'change'):
+                            skipped = None
+                            if status == 'met':
+                                skipped = self._incremental_skip(low, reqs, running)
+                            else:
+                                self._incremental_record(low)
+                            if skipped is None:
+                                # The worker returns the profile gathered so far
+                                workers[tag] = self._start_concurrent(low, status, reqs, chunks, running)
+                                self.profiles.pop(tag, None)
+                            else:
+                                skipped['__saltfunc__'] = '{0}.{1}'.format(low['state'], low['fun'])
+                                running[tag] = skipped
+                                self._profile_ret(tag, skipped)
+                                self._stream(tag, skipped)
+                                running[tag] = StateResult(skipped)
+                                self.event(skipped, len(chunks), fire_event=low.get('fire_event'))
+                            continue
+                    # Nothing to run or a chunk which must run alone
+                    running = self.call_chunk(low, running, chunks)
+                    self.active = set()
+                    if running.pop('__FAILHARD__', False) or self.check_failhard(low, running):
+                        stop = True
+                        break
+                    if serial:
+                        break
+            if workers:
+                ready, _, _ = select.select([worker[1] for worker in six.itervalues(workers)], [], [])
+                for tag in [tag for tag, worker in six.iteritems(workers) if worker[1] in ready]:
+                    worker = workers.pop(tag)
+                    self._finish_concurrent(worker, running, chunks)
+                    if self.check_failhard(worker[2], running):
+                        stop = True
+            elif stop:
+                break
+            elif not progress and pending:
+                # The requisites of the remaining chunks cannot be met by
+                # running other chunks first, let call_chunk report them
+                low = pending.pop(0)
+                running = self.call_chunk(low, running, chunks)
+                self.active = set()
+                if running.pop('__FAILHARD__', False) or self.check_failhard(low, running):
+                    stop = True
+        while True:
+            if self.reconcile_procs(running):
+                break
+            time.sleep(0.01)
+        return running
+
+    def _incremental_path(self):
+        return os.path.join(self.opts['cachedir'], 'state_incremental.p')
+
+    def load_incremental(self):
+        '''
+        Load the fingerprints of the chunks which succeeded in the last
+        incremental run, chunks whose fingerprint did not change are skipped
+        '''
+        self.fingerprints = {}
+        self.incremental = {}
+        try:
+            with salt.utils.files.fopen(self._incremental_path(), 'rb') as fp_:
+                self.incremental = msgpack_deserialize(fp_.read()) or {}
+        except (IOError, OSError):
+            pass
+        except Exception as exc:
+            log.warning('Unable to read the incremental state data: %s', exc)
+
+    def save_incremental(self, running):
+        '''
+        Record the fingerprints of the chunks which succeeded
+        '''
+        if self.incremental is None or self.opts.get('test', False) \
+                or not isinstance(running, dict):
+            return
+        data = dict((tag, fingerprint) for tag, fingerprint in six.iteritems(self.fingerprints)
+                    if running.get(tag, {}).get('result') is True)
+        try:
+            with salt.utils.files.set_umask(0o077):
+                with salt.utils.files.fopen(self._incremental_path(), 'w+b') as fp_:
+                    fp_.write(msgpack_serialize(data))
+        except (IOError, OSError) as exc:
+            log.error('Unable to write the incremental state data: %s', exc)
+
+    def _incremental_urls(self, data):
+        '''
+        Yield the URLs and paths referenced by a low chunk
+        '''
+        if isinstance(data, six.string_types):
+            if '://' in data or os.path.isabs(data):
+                yield data
+        elif isinstance(data, dict):
+            for val in six.itervalues(data):
+                for source in self._incremental_urls(val):
+                    yield source
+        elif isinstance(data, (list, tuple)):
+            for val in data:
+                for source in self._incremental_urls(val):
+                    yield source
+
+    def _incremental_upstream(self, low):
+        '''
+        Return True if a chunk pulls its source from outside of the
+        fileserver without pinning it with a source_hash, its content can
+        change upstream
+        '''
+        remote = [source for source in self._incremental_urls([low.get('source'), low.get('sources')])
+                  if not source.startswith('salt://')]
+        if not remote:
+            return False
+        source_hash = low.get('source_hash')
+        return not isinstance(source_hash, six.string_types) \
+            or not re.match(r'^(\w+=)?[0-9a-fA-F]+$', source_hash)
+
+    def _incremental_fingerprint(self, low):
+        '''
+        Return a digest of everything a chunk depends on: its low data, the
+        files it pulls from the fileserver and, for templates, the grains and
+        pillar they are rendered with
+        '''
+        tag = _gen_tag(low)
+        if tag in self.fingerprints:
+            return self.fingerprints[tag]
+        # The order of a chunk shifts whenever a state is added before it
+        data = dict((key, val) for key, val in six.iteritems(low)
+                    if key not in ('__agg__', '__prereq__', '__prerequired__',
+                                   'order', 'name_order'))
+        sources = []
+        for source in sorted(set(self._incremental_urls(data))):
+            if not source.startswith('salt://'):
+                continue
+            sources.append((source, self.functions['cp.hash_file'](source, low.get('__env__', 'base'))))
+        context = None
+        if data.get('template'):
+            context = (self.opts['grains'], self.opts['pillar'])
+        fingerprint = salt.utils.hashutils.sha256_digest(
+            salt.utils.json.dumps([data, sources, context], sort_keys=True, default=repr))
+        self.fingerprints[tag] = fingerprint
+        return fingerprint
+
+    def _incremental_record(self, low):
+        '''
+        Fingerprint a chunk about to run in an incremental run, returns None
+        if the chunk cannot be skipped
+        '''
+        if self.incremental is None or self.opts.get('test', False):
+            return None
+        func = self.states.get('{0}.{1}'.format(low['state'], low['fun']))
+        if func is None or not getattr(func, '__globals__', {}).get('__incremental__', True):
+            return None
+        if self._incremental_upstream(low):
+            return None
+        try:
+            return self._incremental_fingerprint(low)
+        except Exception as exc:
+            log.debug('Unable to fingerprint %s: %s', _gen_tag(low), exc)
+            return None
+
+    def _incremental_skip(self, low, reqs, running):
+        '''
+        Return the result of a skipped chunk if it is unchanged since the last
+        incremental run, or None if it has to run
+        '''
+        fingerprint = self._incremental_record(low)
+        if fingerprint is None or self.incremental.get(_gen_tag(low)) != fingerprint:
+            return None
+        for req_lows in (six.itervalues(reqs) if reqs else ()):
+            for req_low in req_lows:
+                if running.get(_gen_tag(req_low), {}).get('changes'):
+                    # A requisite changed something, mod_watch and onchanges
+                    # have to see it
+                    return None
+        start_time, duration = _calculate_fake_duration()
+        ret = {'name': low['name'],
+               'changes': {},
+               'result': True,
+               'comment': 'State was not run because its inputs did not change since the last run',
+               '__incremental__': True,
+               'duration': duration,
+               'start_time': start_time,
+               '__id__': low['__id__'],
+               '__run_num__': self.__run_num,
+               '__sls__': low['__sls__']}
+        self.__run_num += 1
+        return ret
+
     def check_failhard(self, low, running):
         '''
         Check if the low data chunk should send a failhard signal
@@ -2360,12 +3084,15 @@ class State(object):
                 return 'run'
         return 'run'
 
-    def reconcile_procs(self, running):
+    def reconcile_procs(self, running, tags=None):
         '''
-        Check the running dict for processes and resolve them
+        Check the running dict for processes and resolve them, only looking at
+        the given tags if any
         '''
         retset = set()
-        for tag in running:
+        for tag in running if tags is None else tags:
+            if tag not in running:
+                continue
             proc = running[tag].get('proc')
             if proc:
                 if not proc.is_alive():
@@ -2392,6 +3119,15 @@ class State(object):
                     retset.add(False)
         return False not in retset
 
+    def _requisite_index(self, chunks):
+        '''
+        Return the RequisiteIndex of a list of chunks, building it the first
+        time the list is seen
+        '''
+        if self.requisite_index is None or not self.requisite_index.current(chunks):
+            self.requisite_index = RequisiteIndex(chunks)
+        return self.requisite_index
+
     def check_requisite(self, low, running, chunks, pre=False):
         '''
         Look into the running data to check the status of all requisite
@@ -2438,7 +3174,7 @@ class State(object):
             present = True
         if not present:
             return 'met', ()
-        self.reconcile_procs(running)
+        index = self._requisite_index(chunks)
         reqs = {
                 'require': [],
                 'require_any': [],
@@ -2461,40 +3197,11 @@ class State(object):
                     if isinstance(req, six.string_types):
                         req = {'id': req}
                     req = trim_req(req)
-                    found = False
-                    for chunk in chunks:
-                        req_key = next(iter(req))
-                        req_val = req[req_key]
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                found = True
-                                reqs[r_state].append(chunk)
-                            continue
-                        try:
-                            if isinstance(req_val, six.string_types):
-                                if (fnmatch.fnmatch(chunk['name'], req_val) or
-                                    fnmatch.fnmatch(chunk['__id__'], req_val)):
-                                    if req_key == 'id' or chunk['state'] == req_key:
-                                        found = True
-                                        reqs[r_state].append(chunk)
-                            else:
-                                raise KeyError
-                        except KeyError as exc:
-                            raise SaltRenderError(
-                                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk['name']))
-                        except TypeError:
-                            # On Python 2, the above req_val, being an OrderedDict, will raise a KeyError,
-                            # however on Python 3 it will raise a TypeError
-                            # This was found when running tests.unit.test_state.StateCompilerTestCase.test_render_error_on_invalid_requisite
-                            raise SaltRenderError(
-                                'Could not locate requisite of [{0}] present in state with name [{1}]'.format(
-                                    req_key, chunk['name']))
+                    req_key = next(iter(req))
+                    found = index.lookup(req_key, req[req_key])
                     if not found:
                         return 'unmet', ()
+                    reqs[r_state].extend(found)
         fun_stats = set()
         for r_state, chunks in six.iteritems(reqs):
             req_stats = set()
@@ -2503,8 +3210,9 @@ class State(object):
             else:
                 run_dict = running
 
+            tags = [_gen_tag(chunk) for chunk in chunks]
             while True:
-                if self.reconcile_procs(run_dict):
+                if self.reconcile_procs(run_dict, tags):
                     break
                 time.sleep(0.01)
 
@@ -2579,6 +3287,79 @@ class State(object):
 
         return status, reqs
 
+    def _stream(self, tag, chunk_ret):
+        '''
+        Queue the return of a chunk to be streamed to the master, the queued
+        returns are sent once state_stream_batch of them are waiting
+        '''
+        if not self.stream or self.stream_failed or tag in self.streamed:
+            return
+        self.streamed.add(tag)
+        self.stream_buffer[tag] = dict((key, val) for key, val in six.iteritems(chunk_ret)
+                                       if key not in STREAM_DROP_KEYS)
+        if len(self.stream_buffer) >= self.opts.get('state_stream_batch', 100):
+            self._stream_flush()
+
+    def _stream_flush(self):
+        '''
+        Send the queued chunk returns to the master in one frame
+        '''
+        if not self.stream_buffer or self.stream_failed:
+            return
+        load = {'cmd': '_return_stream',
+                'id': self.opts['id'],
+                'jid': self.jid,
+                'stream': self.stream_id,
+                'seq': self.stream_seq,
+                'return': self.stream_buffer}
+        self.stream_buffer = {}
+        try:
+            if self.stream_channel is None:
+                self.stream_channel = salt.transport.client.ReqChannel.factory(self.opts)
+            if self.stream_token is None:
+                self.stream_token = salt.crypt.SAuth(self.opts).gen_token(b'salt')
+            load['tok'] = self.stream_token
+            reply = self.stream_channel.send(load, timeout=self.opts.get('return_retry_timer', 60))
+        except Exception as exc:
+            # The whole return is sent at the end of the run instead
+            log.warning('Unable to stream the state returns to the master: %s', exc)
+            self.stream_failed = True
+            return
+        if reply is not True:
+            # Older masters and job caches which do not store the frames
+            log.warning('The master did not store the streamed state returns, '
+                        'sending them at the end of the run')
+            self.stream_failed = True
+            return
+        self.stream_seq += 1
+
+    def stream_summary(self, running):
+        '''
+        Return what is left to send to the master once the chunk returns
+        have been streamed, and the totals of the streamed returns. Only the
+        returns of the chunks which did not succeed are left when the master
+        stored every frame, otherwise the return is left as is and the totals
+        are None.
+        '''
+        if not self.stream or self.stream_failed or self.stream_buffer \
+                or not self.stream_seq or not isinstance(running, dict):
+            return running, None
+        ret = {}
+        summary = {'stream': self.stream_id,
+                   'frames': self.stream_seq,
+                   'states': 0,
+                   'changed': 0,
+                   'duration': 0.0}
+        for tag, data in six.iteritems(running):
+            if tag not in self.streamed or data.get('result') is not True:
+                ret[tag] = data
+                continue
+            summary['states'] += 1
+            if data.get('changes'):
+                summary['changed'] += 1
+            summary['duration'] += float(data.get('duration', 0))
+        return ret, summary
+
     def event(self, chunk_ret, length, fire_event=False):
         '''
         Fire an event on the master bus
@@ -2637,11 +3418,13 @@ class State(object):
                       'onfail_any',
                       'onchanges',
                       'onchanges_any']
+        start = time.time()
         if not low.get('__prereq__'):
             requisites.append('prerequired')
             status, reqs = self.check_requisite(low, running, chunks, pre=True)
         else:
             status, reqs = self.check_requisite(low, running, chunks)
+        self._profile_phase(low, 'requisites', start)
         if status == 'unmet':
             lost = {}
             reqs = []
@@ -2653,29 +3436,14 @@ class State(object):
                     if isinstance(req, six.string_types):
                         req = {'id': req}
                     req = trim_req(req)
-                    found = False
                     req_key = next(iter(req))
-                    req_val = req[req_key]
-                    for chunk in chunks:
-                        if req_val is None:
-                            continue
-                        if req_key == 'sls':
-                            # Allow requisite tracking of entire sls files
-                            if fnmatch.fnmatch(chunk['__sls__'], req_val):
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                reqs.append(chunk)
-                                found = True
-                            continue
-                        if (fnmatch.fnmatch(chunk['name'], req_val) or
-                            fnmatch.fnmatch(chunk['__id__'], req_val)):
-                            if req_key == 'id' or chunk['state'] == req_key:
-                                if requisite == 'prereq':
-                                    chunk['__prereq__'] = True
-                                elif requisite == 'prerequired':
-                                    chunk['__prerequired__'] = True
-                                reqs.append(chunk)
-                                found = True
+                    found = self._requisite_index(chunks).lookup(req_key, req[req_key])
+                    for chunk in found:
+                        if requisite == 'prereq':
+                            chunk['__prereq__'] = True
+                        elif requisite == 'prerequired' and req_key != 'sls':
+                            chunk['__prerequired__'] = True
+                        reqs.append(chunk)
                     if not found:
                         lost[requisite].append(req)
             if lost['require'] or lost['watch'] or lost['prereq'] \
@@ -2751,7 +3519,8 @@ class State(object):
             if low.get('__prereq__'):
                 self.pre[tag] = self.call(low, chunks, running)
             else:
-                running[tag] = self.call(low, chunks, running)
+                running[tag] = (self._incremental_skip(low, reqs, running) or
+                                self.call(low, chunks, running))
         elif status == 'fail':
             # if the requisite that failed was due to a prereq on this low state
             # show the normal error
@@ -2796,6 +3565,7 @@ class State(object):
                 self.pre[tag] = running[tag]
             self.__run_num += 1
         elif status == 'change' and not low.get('__prereq__'):
+            self._incremental_record(low)
             ret = self.call(low, chunks, running)
             if not ret['changes'] and not ret.get('skip_watch', False):
                 low = low.copy()
@@ -2845,7 +3615,12 @@ class State(object):
                 running[tag] = self.call(low, chunks, running)
         if tag in running:
             running[tag]['__saltfunc__'] = '{0}.{1}'.format(low['state'], low['fun'])
+            start = time.time()
             self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+            self._profile_phase(low, 'event', start)
+            self._profile_ret(tag, running[tag])
+            self._stream(tag, running[tag])
+            running[tag] = StateResult(running[tag])
         return running
 
     def call_listen(self, chunks, running):
@@ -2947,6 +3722,8 @@ class State(object):
         '''
         Process a high data call and ensure the defined states.
         '''
+        start = time.time()
+        self.check_cache = {}
         self.inject_default_call(high)
         errors = []
         # If there is extension data reconcile it
@@ -2968,8 +3745,28 @@ class State(object):
         # the low data chunks
         if errors:
             return errors
+        self._profile_step('compile', start)
+        start = time.time()
         ret = self.call_chunks(chunks)
         ret = self.call_listen(chunks, ret)
+        self._profile_step('execute', start)
+        # Release the chunks before the returns take the memory of dicts again
+        del chunks
+        self.requisite_index = None
+        expand_results(ret)
+        if self.profile:
+            self._fire_profile(dict((step, round(duration, 3))
+                                    for step, duration in six.iteritems(self.profile_run)))
+            self.profile_run = {}
+        if self.stream:
+            # Listen and mod_watch calls do not go through call_chunk
+            for tag, data in six.iteritems(ret):
+                if isinstance(data, dict) and '__run_num__' in data:
+                    self._stream(tag, data)
+            self._stream_flush()
+            if self.stream_channel is not None:
+                self.stream_channel.close()
+                self.stream_channel = None
 
         def _cleanup_accumulator_data():
             accum_data_path = os.path.join(
@@ -3634,6 +4431,17 @@ class BaseHighState(object):
         Render a state file and retrieve all of the include states
         '''
         errors = []
+        state = self._render_include_tree(sls, saltenv, mods, matches, local, None, errors)
+        return state, errors
+
+    def _render_include_tree(self, sls, saltenv, mods, matches, local, high, errors):
+        '''
+        Render a state file and the state files it includes which are not in
+        mods yet. The declarations of each file are merged once into high, or
+        into the declarations of the first file when high is None, in the
+        order the files are included, so that the cost of an include does not
+        grow with the depth it is included from.
+        '''
         if not local:
             state_data = self.client.get_state(sls, saltenv)
             fn_ = state_data.get('dest', False)
@@ -3701,6 +4509,11 @@ class BaseHighState(object):
                 self._handle_extend(state, sls, saltenv, errors)
                 self._handle_exclude(state, sls, saltenv, errors)
                 self._handle_state_decls(state, sls, saltenv, errors)
+                if high is None:
+                    high = state
+                else:
+                    self.merge_included_states(high, state, errors)
+                own = list(state)
 
                 for inc_sls in include:
                     # inc_sls may take the form of:
@@ -3779,17 +4592,15 @@ class BaseHighState(object):
                             r_env = resolved_envs[0] if len(resolved_envs) == 1 else saltenv
                             mod_tgt = '{0}:{1}'.format(r_env, sls_target)
                             if mod_tgt not in mods:
-                                nstate, err = self.render_state(
+                                self._render_include_tree(
                                     sls_target,
                                     r_env,
                                     mods,
-                                    matches
+                                    matches,
+                                    False,
+                                    high,
+                                    errors
                                 )
-                                if nstate:
-                                    self.merge_included_states(state, nstate, errors)
-                                    state.update(nstate)
-                                if err:
-                                    errors.extend(err)
                     else:
                         msg = ''
                         if not resolved_envs:
@@ -3807,12 +4618,13 @@ class BaseHighState(object):
                         log.critical(msg)
                         errors.append(msg)
                 try:
-                    self._handle_iorder(state)
+                    # The included files got their order first
+                    self._handle_iorder(OrderedDict((name, high[name]) for name in own if name in high))
                 except TypeError:
                     log.critical('Could not render SLS %s. Syntax error detected.', sls)
         else:
             state = {}
-        return state, errors
+        return state
 
     def _handle_iorder(self, state):
         '''
@@ -3958,6 +4770,7 @@ class BaseHighState(object):
         Gather the state files and render them into a single unified salt
         high data structure.
         '''
+        start = time.time()
         highstate = self.building_highstate
         all_errors = []
         mods = set()
@@ -4000,14 +4813,80 @@ class BaseHighState(object):
                     all_errors.extend(errors)
 
         self.clean_duplicate_extends(highstate)
+        self.state._profile_step('render', start)
         return highstate, all_errors
 
+    def _render_cache_key(self, matches):
+        '''
+        Return a digest of the inputs of render_highstate other than the
+        contents of the SLS files
+        '''
+        return salt.utils.hashutils.sha256_digest(salt.utils.json.dumps(
+            [matches,
+             self.avail,
+             self.opts['grains'],
+             self.state.opts['pillar'],
+             [self.opts.get(opt) for opt in ('saltenv', 'pillarenv', 'renderer',
+                                             'state_top', 'state_top_saltenv')],
+             salt.version.__version__],
+            sort_keys=True,
+            default=repr))
+
+    def _render_cache_files(self, files):
+        '''
+        Return the hashes of the salt:// files recorded while rendering
+        '''
+        return [[saltenv, path, self.client.hash_file(salt.utils.url.create(path), saltenv)]
+                for saltenv, path in sorted(files)]
+
+    def render_highstate_cached(self, matches, cache_name='highstate'):
+        '''
+        Render the highstate, reusing the data rendered by a previous run if
+        the SLS files, grains, pillar and environments it was rendered from
+        did not change
+        '''
+        cfn = os.path.join(self.opts['cachedir'], '{0}.render.p'.format(cache_name))
+        key = self._render_cache_key(matches)
+        try:
+            with salt.utils.files.fopen(cfn, 'rb') as fp_:
+                cached = self.serial.load(fp_)
+            if cached['key'] == key and \
+                    self._render_cache_files((saltenv, path) for saltenv, path, _ in cached['files']) \
+                    == cached['files']:
+                log.debug('Using the highstate rendered in %s', cfn)
+                self.building_highstate = cached['high']
+                return self.building_highstate, []
+        except (IOError, OSError):
+            pass
+        except Exception as exc:
+            log.debug('Unable to use the highstate render cache %s: %s', cfn, exc)
+        with salt.fileclient.record_files() as files:
+            high, errors = self.render_highstate(matches)
+        if errors:
+            return high, errors
+        try:
+            data = self.serial.dumps({'key': key,
+                                      'files': self._render_cache_files(files),
+                                      'high': high})
+            with salt.utils.files.set_umask(0o077):
+                with salt.utils.files.fopen(cfn, 'w+b') as fp_:
+                    fp_.write(data)
+        except TypeError:
+            # Can't serialize pydsl
+            pass
+        except (IOError, OSError):
+            log.error('Unable to write the highstate render cache %s', cfn)
+        return high, errors
+
     def clean_duplicate_extends(self, highstate):
         if '__extend__' in highstate:
             highext = []
+            # Only the extends of the same ID can be duplicates
+            seen = collections.defaultdict(list)
             for items in (six.iteritems(ext) for ext in highstate['__extend__']):
                 for item in items:
-                    if item not in highext:
+                    if item[1] not in seen[item[0]]:
+                        seen[item[0]].append(item[1])
                         highext.append(item)
             highstate['__extend__'] = [{t[0]: t[1]} for t in highext]
 
@@ -4069,10 +4948,19 @@ class BaseHighState(object):
         return ret_matches
 
     def call_highstate(self, exclude=None, cache=None, cache_name='highstate',
-                       force=False, whitelist=None, orchestration_jid=None):
+                       force=False, whitelist=None, orchestration_jid=None,
+                       incremental=None):
         '''
         Run the sequence to execute the salt highstate for this minion
+
+        When ``incremental`` is True, or :conf_minion:`state_incremental` is
+        set, the states whose inputs did not change since they last succeeded
+        are not run again.
         '''
+        if incremental is None:
+            incremental = self.opts.get('state_incremental', False)
+        if incremental:
+            self.state.load_incremental()
         # Check that top file exists
         tag_name = 'no_|-states_|-states_|-None'
         ret = {tag_name: {
@@ -4091,9 +4979,12 @@ class BaseHighState(object):
             if os.path.isfile(cfn):
                 with salt.utils.files.fopen(cfn, 'rb') as fp_:
                     high = self.serial.load(fp_)
-                    return self.state.call_high(high, orchestration_jid)
+                ret = self.state.call_high(high, orchestration_jid)
+                self.state.save_incremental(ret)
+                return ret
         # File exists so continue
         err = []
+        start = time.time()
         try:
             top = self.get_top()
         except SaltRenderError as err:
@@ -4106,6 +4997,7 @@ class BaseHighState(object):
             return err
         err += self.verify_tops(top)
         matches = self.top_matches(top)
+        self.state._profile_step('top', start)
         if not matches:
             msg = ('No Top file or master_tops data matches found. Please see '
                    'master log for details.')
@@ -4117,7 +5009,10 @@ class BaseHighState(object):
             err += ['Pillar failed to render with the following messages:']
             err += self.state.opts['pillar']['_errors']
         else:
-            high, errors = self.render_highstate(matches)
+            if self.opts.get('state_render_cache', False):
+                high, errors = self.render_highstate_cached(matches, cache_name)
+            else:
+                high, errors = self.render_highstate(matches)
             if exclude:
                 if isinstance(exclude, six.string_types):
                     exclude = exclude.split(',')
@@ -4147,7 +5042,9 @@ class BaseHighState(object):
             except (IOError, OSError):
                 log.error('Unable to write to "state.highstate" cache file %s', cfn)
 
-        return self.state.call_high(high, orchestration_jid)
+        ret = self.state.call_high(high, orchestration_jid)
+        self.state.save_incremental(ret)
+        return ret
 
     def compile_highstate(self):
         '''
@@ -247,6 +247,9 @@ from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# Commands are run again by incremental highstates even if nothing changed
+__incremental__ = False
+
 
 def _reinterpreted_state(state):
     '''
@@ -33,6 +33,10 @@ from salt.ext import six
 
 log = logging.getLogger(__name__)
 
+# Repositories are checked against their remotes, incremental highstates run
+# them again even if nothing changed
+__incremental__ = False
+
 
 def __virtual__():
     '''
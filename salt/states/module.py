@@ -313,6 +313,9 @@ from salt.ext.six.moves import zip
 from salt.exceptions import SaltInvocationError
 from salt.utils.decorators import with_deprecated
 
+# Functions are called again by incremental highstates even if nothing changed
+__incremental__ = False
+
 
 def wait(name, **kwargs):
     '''
@@ -75,7 +75,9 @@ state module
 
 # Import python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import collections
 import fnmatch
+import itertools
 import logging
 import os
 import re
@@ -141,6 +143,26 @@ if salt.utils.platform.is_windows():
 
 log = logging.getLogger(__name__)
 
+# Package states query the repositories, incremental highstates run them again
+# even if nothing changed
+__incremental__ = False
+
+# The functions whose chunks are merged into batches by state_pkg_batch
+_BATCH_FUNCS = ('installed', 'latest', 'removed', 'purged')
+# Chunks using these keywords are never batched, they depend on other states
+# or on conditions which are checked when the chunk runs
+_BATCH_EXCLUDE = frozenset([
+    'sources', 'onlyif', 'unless', 'check_cmd', 'parallel', 'aggregate',
+    'bypass_file', 'bypass_file_contains', 'pkg_verify', 'reinstall',
+    'require', 'require_any', 'watch', 'watch_any', 'prereq', 'prerequired',
+    'onchanges', 'onchanges_any', 'onfail', 'onfail_any', 'onfail_all',
+    'listen', 'failhard', '__agg__', '__prereq__',
+])
+# Keywords of the chunks which do not change how their batch is run
+_BATCH_IGNORE = frozenset([
+    'state', 'fun', 'name', 'pkgs', 'version', 'order', 'name_order',
+])
+
 
 def __virtual__():
     '''
@@ -150,6 +172,130 @@ def __virtual__():
     return 'pkg.install' in __salt__
 
 
+def _batch_targets(chunk):
+    '''
+    Return the packages a chunk manages in the format of the pkgs argument
+    '''
+    if 'pkgs' in chunk:
+        return [dict(pkg) if isinstance(pkg, collections.Mapping) else pkg for pkg in chunk['pkgs']]
+    if chunk.get('version') is not None:
+        return [{chunk['name']: six.text_type(chunk['version'])}]
+    return [chunk['name']]
+
+
+def _batch_kwargs(chunk):
+    '''
+    Return the arguments a chunk shares with the other chunks of its batch
+    '''
+    return dict((key, val) for key, val in six.iteritems(chunk)
+                if key not in _BATCH_IGNORE and not key.startswith('__'))
+
+
+def _batch_key(chunk):
+    '''
+    Return the key of the batch a chunk can join, or None if the chunk can
+    not be batched
+    '''
+    if chunk.get('state') != 'pkg' or chunk.get('fun') not in _BATCH_FUNCS:
+        return None
+    if _BATCH_EXCLUDE.intersection(chunk):
+        return None
+    return (chunk['fun'], chunk.get('__env__'), repr(sorted(_batch_kwargs(chunk).items())))
+
+
+def _plan_batches(lowstate):
+    '''
+    Group the pkg chunks of a state run which can be run as one package
+    manager transaction. Returns the batches keyed by the tags of their chunks.
+
+    Only chunks following each other in the lowstate are grouped. Ordered
+    execution lets states rely on the states before them without requisites,
+    a pkgrepo.managed placed before a pkg.installed for instance, so no chunk
+    may run ahead of a state placed before it.
+    '''
+    plan = {}
+    for key, chunks in itertools.groupby(lowstate, _batch_key):
+        chunks = list(chunks)
+        if key is None or len(chunks) < 2:
+            continue
+        batch = {'fun': chunks[0]['fun'],
+                 'kwargs': _batch_kwargs(chunks[0]),
+                 'members': _OrderedDict(),
+                 'ret': None}
+        for chunk in chunks:
+            tag = __utils__['state.gen_tag'](chunk)
+            batch['members'][tag] = _batch_targets(chunk)
+            plan[tag] = batch
+    return plan
+
+
+def _batch_share(batch, tag, name):
+    '''
+    Return the part of the result of a batch concerning one of its chunks,
+    named ``name``.
+    Returns None when the batch failed without changing every package of the
+    chunk, the chunk then runs on its own to report its own result.
+    '''
+    names = set(next(iter(pkg)) if isinstance(pkg, dict) else pkg
+                for pkg in batch['members'][tag])
+    ret = batch['ret']
+    changes = dict((pkg, change) for pkg, change in six.iteritems(ret.get('changes') or {})
+                   if pkg in names or pkg.split('.')[0] in names)
+    result = ret['result']
+    if result is False:
+        changed = set(pkg.split('.')[0] for pkg in changes).union(changes)
+        if not names.issubset(changed):
+            return None
+        # Only the packages of other chunks failed
+        result = True
+    return {'name': name,
+            'changes': changes,
+            'result': result,
+            'comment': 'Run in a batch of {0} pkg.{1} states. {2}'.format(
+                len(batch['members']), batch['fun'], ret['comment'])}
+
+
+def _run_batch(func):
+    '''
+    If ``state_pkg_batch`` is enabled and the running chunk belongs to a
+    batch, run the whole batch the first time one of its chunks runs and
+    return the part of its result concerning this chunk. Returns None when
+    the chunk has to run on its own.
+    '''
+    if not __opts__.get('state_pkg_batch', False) or __opts__.get('test', False) \
+            or __context__.get('pkg.batch_running'):
+        return None
+    if (__opts__.get('state_concurrency') or 0) > 1 and not salt.utils.platform.is_windows():
+        # Each chunk runs in its own process with its own __context__, every
+        # chunk of a batch would run the whole transaction
+        return None
+    try:
+        low, lowstate, instance_id = __low__, __lowstate__, __instance_id__
+    except NameError:
+        # Not called by the state system
+        return None
+    plan = __context__.get('pkg.batch_plan')
+    if plan is None or plan['instance_id'] != instance_id:
+        plan = {'instance_id': instance_id, 'batches': _plan_batches(lowstate)}
+        __context__['pkg.batch_plan'] = plan
+    tag = __utils__['state.gen_tag'](low)
+    batch = plan['batches'].get(tag)
+    if batch is None:
+        return None
+    if batch['ret'] is None:
+        pkgs = []
+        for targets in six.itervalues(batch['members']):
+            pkgs.extend(pkg for pkg in targets if pkg not in pkgs)
+        log.debug('Running %d pkg.%s states as one batch of %d packages',
+                  len(batch['members']), batch['fun'], len(pkgs))
+        __context__['pkg.batch_running'] = True
+        try:
+            batch['ret'] = func(low['name'], pkgs=pkgs, **batch['kwargs'])
+        finally:
+            __context__.pop('pkg.batch_running', None)
+    return _batch_share(batch, tag, low['name'])
+
+
 def _get_comparison_spec(pkgver):
     '''
     Return a tuple containing the comparison operator and the version. If no
@@ -1564,6 +1710,9 @@ def installed(
         information.
 
     '''
+    batched = _run_batch(installed)
+    if batched is not None:
+        return batched
     if not pkgs and isinstance(pkgs, list):
         return {'name': name,
                 'changes': {},
@@ -2438,6 +2587,9 @@ def latest(
                - report_reboot_exit_codes: False
 
     '''
+    batched = _run_batch(latest)
+    if batched is not None:
+        return batched
     refresh = salt.utils.pkg.check_refresh(__opts__, refresh)
 
     if kwargs.get('sources'):
@@ -2855,6 +3007,9 @@ def removed(name,
 
         .. versionadded:: 0.16.0
     '''
+    batched = _run_batch(removed)
+    if batched is not None:
+        return batched
     kwargs['saltenv'] = __env__
     try:
         return _uninstall(action='remove', name=name, version=version,
@@ -2961,6 +3116,9 @@ def purged(name,
 
     .. versionadded:: 0.16.0
     '''
+    batched = _run_batch(purged)
+    if batched is not None:
+        return batched
     kwargs['saltenv'] = __env__
     try:
         return _uninstall(action='purge', name=name, version=version,
@@ -9,12 +9,14 @@ import os
 import hashlib
 import shutil
 import binascii
+import time
 
 # Import Salt Libs
 import salt.crypt
 import salt.payload
 import salt.master
 import salt.transport.frame
+import salt.utils.cache
 import salt.utils.event
 import salt.utils.files
 import salt.utils.minions
@@ -47,8 +49,12 @@ class AESPubClientMixin(object):
                 raise salt.crypt.AuthenticationError('Message signing is enabled but the payload has no signature.')
 
             # Verify that the signature is valid
+            if payload.get('sig_alg') == 'ed25519':
+                if not salt.crypt.verify_ed25519(self.auth.creds.get('pub_ed25519'), payload['load'], payload['sig']):
+                    raise salt.crypt.AuthenticationError('Message signature failed to validate.')
+                return
             master_pubkey_path = os.path.join(self.opts['pki_dir'], 'minion_master.pub')
-            if not salt.crypt.verify_signature(master_pubkey_path, payload['load'], payload.get('sig')):
+            if not salt.crypt.verify_signature(master_pubkey_path, payload['load'], payload.get('sig'), cache=True):
                 raise salt.crypt.AuthenticationError('Message signature failed to validate.')
 
     @tornado.gen.coroutine
@@ -56,16 +62,100 @@ class AESPubClientMixin(object):
         # we need to decrypt it
         log.trace('Decoding payload: %s', payload)
         if payload['enc'] == 'aes':
+            if self.opts.get('sign_pub_messages') and payload.get('sig_alg') == 'ed25519' \
+                    and not self.auth.creds.get('pub_ed25519'):
+                # The master signs with a key this minion did not get when it
+                # signed in, sign in again to get it
+                yield self.auth.authenticate()
+                if not self.auth.creds.get('pub_ed25519'):
+                    raise salt.crypt.AuthenticationError('The master did not send its Ed25519 key.')
             self._verify_master_signature(payload)
+            cipher = payload.get('cipher')
             try:
-                payload['load'] = self.auth.crypticle.loads(payload['load'])
+                payload['load'] = self.auth.crypticle.loads(payload['load'], cipher=cipher)
             except salt.crypt.AuthenticationError:
                 yield self.auth.authenticate()
-                payload['load'] = self.auth.crypticle.loads(payload['load'])
+                payload['load'] = self.auth.crypticle.loads(payload['load'], cipher=cipher)
 
         raise tornado.gen.Return(payload)
 
 
+class MinionKeyCache(object):
+    '''
+    The accepted minion public keys, as sent by the minions and parsed, kept in
+    memory until the key file changes
+    '''
+    # A key file modified this close to the time it was read may change again
+    # within the same timestamp tick, so it is not cached
+    RACY_WINDOW = 2
+
+    def __init__(self, size):
+        self.keys = salt.utils.cache.CacheLRU(size)
+
+    def _entry(self, path):
+        stat = os.stat(path)
+        stamp = (stat.st_ino, stat.st_size, stat.st_mtime)
+        entry = self.keys.get(path)
+        if entry is None or entry[0] != stamp:
+            with salt.utils.files.fopen(path, 'r') as fp_:
+                entry = [stamp, fp_.read(), None]
+            if self.keys.size and time.time() - stat.st_mtime > self.RACY_WINDOW:
+                self.keys[path] = entry
+        return entry
+
+    def read(self, path):
+        '''
+        Return the public key in the file as text
+        '''
+        return self._entry(path)[1]
+
+    def get(self, path):
+        '''
+        Return the public key in the file, parsed
+        '''
+        entry = self._entry(path)
+        if entry[2] is None:
+            entry[2] = salt.crypt.get_rsa_pub_key(path)
+        return entry[2]
+
+
+class AuthAdmission(object):
+    '''
+    Admit minion sign ins at a steady rate and tell the others when to come
+    back, queueing them behind the sign ins already admitted
+    '''
+    def __init__(self, rate, max_wait=60):
+        self.interval = 1.0 / rate
+        # The longest a minion is told to wait, minions which do not wait
+        # and come back to other workers would otherwise keep pushing the
+        # times handed out further
+        self.max_wait = max_wait
+        # Up to a second worth of sign ins are admitted at once
+        self.tolerance = 1.0
+        # When the next sign in would be admitted at the steady rate
+        self.next_admit = 0.0
+        # The last time handed out to a minion which was turned away
+        self.reserved = 0.0
+
+    def admit(self, now=None):
+        '''
+        Return None when a sign in is admitted, otherwise the seconds after
+        which the minion should sign in again. A refused sign in may be told
+        to come back right away, when auth_retry_after_max is 0.
+        '''
+        if now is None:
+            now = time.time()
+        next_admit = max(self.next_admit, now)
+        if next_admit - now <= self.tolerance:
+            self.next_admit = next_admit + self.interval
+            return None
+        # Spread the minions which were turned away over the time the
+        # admitted sign ins take, one per interval
+        self.reserved = min(max(self.reserved + self.interval, next_admit - self.tolerance),
+                            now + self.max_wait)
+        return max(self.reserved - now, 0)
+
+
 # TODO: rename?
 class AESReqServerMixin(object):
     '''
@@ -88,7 +178,7 @@ class AESReqServerMixin(object):
                 'reload': salt.crypt.Crypticle.generate_key_string
             }
 
-    def post_fork(self, _, __):
+    def post_fork(self, _, __, pool=None):
         self.serial = salt.payload.Serial(self.opts)
         self.crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
 
@@ -106,8 +196,20 @@ class AESReqServerMixin(object):
             self.ckminions = salt.utils.minions.CkMinions(self.opts)
 
         self.master_key = salt.crypt.MasterKeys(self.opts)
+        self.minion_keys = MinionKeyCache(self.opts['auth_key_cache_size'])
+        # The signature of the last AES key digest sent to minions
+        self._aes_sig = (None, None)
+        self.auth_admission = None
+        if self.opts['auth_rate'] > 0:
+            # Every worker serving sign ins admits its share of them
+            if pool == 'auth':
+                workers = self.opts['worker_pools']['auth']
+            else:
+                workers = self.opts['worker_threads']
+            self.auth_admission = AuthAdmission(float(self.opts['auth_rate']) / max(int(workers), 1),
+                                                self.opts['auth_retry_after_max'])
 
-    def _encrypt_private(self, ret, dictkey, target):
+    def _encrypt_private(self, ret, dictkey, target, cipher=None):
         '''
         The server equivalent of ReqChannel.crypted_transfer_decode_dictentry
         '''
@@ -118,9 +220,10 @@ class AESReqServerMixin(object):
         key = salt.crypt.Crypticle.generate_key_string()
         pcrypt = salt.crypt.Crypticle(
             self.opts,
-            key)
+            key,
+            cipher=cipher or 'cbc')
         try:
-            pub = salt.crypt.get_rsa_pub_key(pubfn)
+            pub = self.minion_keys.get(pubfn)
         except (ValueError, IndexError, TypeError):
             return self.crypticle.dumps({})
         except IOError:
@@ -138,6 +241,8 @@ class AESReqServerMixin(object):
         pret[dictkey] = pcrypt.dumps(
             ret if ret is not False else {}
         )
+        if pcrypt.cipher != 'cbc':
+            pret['cipher'] = pcrypt.cipher
         return pret
 
     def _update_aes(self):
@@ -153,12 +258,13 @@ class AESReqServerMixin(object):
     def _decode_payload(self, payload):
         # we need to decrypt it
         if payload['enc'] == 'aes':
+            cipher = payload.get('cipher')
             try:
-                payload['load'] = self.crypticle.loads(payload['load'])
+                payload['load'] = self.crypticle.loads(payload['load'], cipher=cipher)
             except salt.crypt.AuthenticationError:
                 if not self._update_aes():
                     raise
-                payload['load'] = self.crypticle.loads(payload['load'])
+                payload['load'] = self.crypticle.loads(payload['load'], cipher=cipher)
         return payload
 
     def _auth(self, load):
@@ -183,6 +289,15 @@ class AESReqServerMixin(object):
                     'load': {'ret': False}}
         log.info('Authentication request from %s', load['id'])
 
+        if self.auth_admission is not None:
+            retry_after = self.auth_admission.admit()
+            if retry_after is not None:
+                log.debug('Too many authentication requests, asking %s to '
+                          'retry in %.1f seconds', load['id'], retry_after)
+                return {'enc': 'clear',
+                        'load': {'ret': 'busy',
+                                 'retry_after': round(retry_after, 3)}}
+
         # 0 is default which should be 'unlimited'
         if self.opts['max_minions'] > 0:
             # use the ConCache if enabled, else use the minion utils
@@ -248,24 +363,23 @@ class AESReqServerMixin(object):
 
         elif os.path.isfile(pubfn):
             # The key has been accepted, check it
-            with salt.utils.files.fopen(pubfn, 'r') as pubfn_handle:
-                if pubfn_handle.read().strip() != load['pub'].strip():
-                    log.error(
-                        'Authentication attempt from %s failed, the public '
-                        'keys did not match. This may be an attempt to compromise '
-                        'the Salt cluster.', load['id']
-                    )
-                    # put denied minion key into minions_denied
-                    with salt.utils.files.fopen(pubfn_denied, 'w+') as fp_:
-                        fp_.write(load['pub'])
-                    eload = {'result': False,
-                             'id': load['id'],
-                             'act': 'denied',
-                             'pub': load['pub']}
-                    if self.opts.get('auth_events') is True:
-                        self.event.fire_event(eload, salt.utils.event.tagify(prefix='auth'))
-                    return {'enc': 'clear',
-                            'load': {'ret': False}}
+            if self.minion_keys.read(pubfn).strip() != load['pub'].strip():
+                log.error(
+                    'Authentication attempt from %s failed, the public '
+                    'keys did not match. This may be an attempt to compromise '
+                    'the Salt cluster.', load['id']
+                )
+                # put denied minion key into minions_denied
+                with salt.utils.files.fopen(pubfn_denied, 'w+') as fp_:
+                    fp_.write(load['pub'])
+                eload = {'result': False,
+                         'id': load['id'],
+                         'act': 'denied',
+                         'pub': load['pub']}
+                if self.opts.get('auth_events') is True:
+                    self.event.fire_event(eload, salt.utils.event.tagify(prefix='auth'))
+                return {'enc': 'clear',
+                        'load': {'ret': False}}
 
         elif not os.path.isfile(pubfn_pend):
             # The key has not been accepted, this is a new minion
@@ -410,6 +524,7 @@ class AESReqServerMixin(object):
         if not os.path.isfile(pubfn) and not self.opts['open_mode']:
             with salt.utils.files.fopen(pubfn, 'w+') as fp_:
                 fp_.write(load['pub'])
+            salt.utils.minions.accepted_minions_changed(self.opts)
         elif self.opts['open_mode']:
             disk_key = ''
             if os.path.isfile(pubfn):
@@ -419,6 +534,7 @@ class AESReqServerMixin(object):
                 log.debug('Host key change detected in open mode.')
                 with salt.utils.files.fopen(pubfn, 'w+') as fp_:
                     fp_.write(load['pub'])
+                salt.utils.minions.accepted_minions_changed(self.opts)
             elif not load['pub']:
                 log.error('Public key is empty: %s', load['id'])
                 return {'enc': 'clear',
@@ -433,7 +549,7 @@ class AESReqServerMixin(object):
         # The key payload may sometimes be corrupt when using auto-accept
         # and an empty request comes in
         try:
-            pub = salt.crypt.get_rsa_pub_key(pubfn)
+            pub = self.minion_keys.get(pubfn)
         except Exception as err:
             log.error('Corrupt public key "%s": %s', pubfn, err, exc_info_on_loglevel=logging.DEBUG)
             return {'enc': 'clear',
@@ -465,6 +581,11 @@ class AESReqServerMixin(object):
                                                    ret['pub_key'], key_pass)
                 ret.update({'pub_sig': binascii.b2a_base64(pub_sign)})
 
+        # the key the publications are signed with when using Ed25519
+        if self.master_key.pub_ed25519:
+            ret['pub_ed25519'] = self.master_key.pub_ed25519
+            ret['pub_ed25519_sig'] = self.master_key.pub_ed25519_sig
+
         if not HAS_M2:
             mcipher = PKCS1_OAEP.new(self.master_key.key)
         if self.opts['auth_mode'] >= 2:
@@ -510,7 +631,14 @@ class AESReqServerMixin(object):
                 ret['aes'] = cipher.encrypt(aes)
         # Be aggressive about the signature
         digest = salt.utils.stringutils.to_bytes(hashlib.sha256(aes).hexdigest())
-        ret['sig'] = salt.crypt.private_encrypt(self.master_key.key, digest)
+        if self._aes_sig[0] != digest:
+            # Unless the minions send a token the digest only changes with
+            # the AES key, so most sign ins reuse the signature
+            self._aes_sig = (digest, salt.crypt.private_encrypt(self.master_key.key, digest))
+        ret['sig'] = self._aes_sig[1]
+        cipher = salt.crypt.pick_session_cipher(self.opts, load.get('ciphers'))
+        if cipher != 'cbc':
+            ret['cipher'] = cipher
         eload = {'result': True,
                  'act': 'accept',
                  'id': load['id'],
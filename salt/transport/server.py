@@ -8,6 +8,25 @@ This includes server side transport, for the ReqServer and the Publisher
 # Import Python Libs
 from __future__ import absolute_import, print_function, unicode_literals
 
+# The worker pool serving each command when worker_pools are configured,
+# commands which are not listed here are served by the default pool
+WORKER_POOL_COMMANDS = {
+    '_auth': 'auth',
+    '_serve_file': 'file',
+    '_file_find': 'file',
+    '_file_hash': 'file',
+    '_file_hash_and_stat': 'file',
+    '_file_list': 'file',
+    '_file_list_emptydirs': 'file',
+    '_dir_list': 'file',
+    '_symlink_list': 'file',
+    '_file_envs': 'file',
+    '_pillar': 'pillar',
+    '_return': 'return',
+    '_syndic_return': 'return',
+}
+WORKER_POOLS = frozenset(WORKER_POOL_COMMANDS.values())
+
 
 class ReqServerChannel(object):
     '''
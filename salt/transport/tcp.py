@@ -34,6 +34,7 @@ import salt.transport.ipc
 import salt.transport.client
 import salt.transport.server
 import salt.transport.mixins.auth
+from salt.defaults import DEFAULT_TARGET_DELIM
 from salt.ext import six
 from salt.ext.six.moves import queue  # pylint: disable=import-error
 from salt.exceptions import SaltReqTimeoutError, SaltClientError
@@ -336,10 +337,14 @@ class AsyncTCPReqChannel(salt.transport.client.ReqChannel):
                 raise
 
     def _package_load(self, load):
-        return {
+        ret = {
             'enc': self.crypt,
             'load': load,
         }
+        # Tell the master which cipher the load is encrypted with
+        if self.crypt != 'clear' and self.auth.crypticle.cipher != 'cbc':
+            ret['cipher'] = self.auth.crypticle.cipher
+        return ret
 
     @tornado.gen.coroutine
     def crypted_transfer_decode_dictentry(self, load, dictkey=None, tries=3, timeout=60):
@@ -352,7 +357,7 @@ class AsyncTCPReqChannel(salt.transport.client.ReqChannel):
         else:
             cipher = PKCS1_OAEP.new(key)
             aes = cipher.decrypt(ret['key'])
-        pcrypt = salt.crypt.Crypticle(self.opts, aes)
+        pcrypt = salt.crypt.Crypticle(self.opts, aes, cipher=ret.get('cipher', 'cbc'))
         data = pcrypt.loads(ret[dictkey])
         if six.PY3:
             data = salt.transport.frame.decode_embedded_strs(data)
@@ -443,10 +448,14 @@ class AsyncTCPPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.tran
         self.close()
 
     def _package_load(self, load):
-        return {
+        ret = {
             'enc': self.crypt,
             'load': load,
         }
+        # Tell the master which cipher the load is encrypted with
+        if self.crypt != 'clear' and self.auth.crypticle.cipher != 'cbc':
+            ret['cipher'] = self.auth.crypticle.cipher
+        return ret
 
     @tornado.gen.coroutine
     def send_id(self, tok, force_auth):
@@ -726,11 +735,12 @@ class TCPReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin, salt.tra
             if req_fun == 'send_clear':
                 stream.write(salt.transport.frame.frame_msg(ret, header=header))
             elif req_fun == 'send':
-                stream.write(salt.transport.frame.frame_msg(self.crypticle.dumps(ret), header=header))
+                stream.write(salt.transport.frame.frame_msg(self.crypticle.dumps(ret, cipher=payload.get('cipher')), header=header))
             elif req_fun == 'send_private':
                 stream.write(salt.transport.frame.frame_msg(self._encrypt_private(ret,
                                                              req_opts['key'],
                                                              req_opts['tgt'],
+                                                             payload.get('cipher'),
                                                              ), header=header))
             else:
                 log.error('Unknown req_fun %s', req_fun)
@@ -1229,10 +1239,11 @@ class PubServer(tornado.tcpserver.TCPServer, object):
     '''
     TCP publisher
     '''
-    def __init__(self, opts, io_loop=None):
+    def __init__(self, opts, io_loop=None, shard_publisher=None):
         super(PubServer, self).__init__(ssl_options=opts.get('ssl'))
         self.io_loop = io_loop
         self.opts = opts
+        self.shard_publisher = shard_publisher
         self._closing = False
         self.clients = set()
         self.aes_funcs = salt.master.AESFuncs(self.opts)
@@ -1333,7 +1344,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
                         # We only accept 'aes' encoded messages for 'id'
                         continue
                     crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
-                    load = crypticle.loads(body['load'])
+                    load = crypticle.loads(body['load'], cipher=body.get('cipher'))
                     if six.PY3:
                         load = salt.transport.frame.decode_embedded_strs(load)
                     if not self.aes_funcs.verify_minion(load['id'], load['tok']):
@@ -1361,10 +1372,42 @@ class PubServer(tornado.tcpserver.TCPServer, object):
     def publish_payload(self, package, _):
         log.debug('TCP PubServer sending payload: %s', package)
         payload = salt.transport.frame.frame_msg(package['payload'])
+        topic_lst = package.get('topic_lst')
+        if self.shard_publisher is not None:
+            # Hand the framed publication to the other publisher processes,
+            # it is packed once for all of them
+            self.shard_publisher.publish({'frame': payload, 'topic_lst': topic_lst})
+        self.write_frame(payload, topic_lst)
 
+    @tornado.gen.coroutine
+    def publish_frame(self, package):
+        '''
+        Write a publication framed by the first publisher process
+        '''
+        self.write_frame(package['frame'], package.get('topic_lst'))
+
+    def _write(self, client, payload):
+        '''
+        Write the packed str to the client, return False if it disconnected
+        '''
+        try:
+            f = client.stream.write(payload)
+        except StreamClosedError:
+            return False
+        if f.done():
+            # Most writes are flushed right away, a failed one closed the
+            # stream
+            return f.exception() is None
+        self.io_loop.add_future(f, lambda f: True)
+        return True
+
+    def write_frame(self, payload, topic_lst=None):
+        '''
+        Write the framed publication to the connected minions in topic_lst,
+        or to every connected minion
+        '''
         to_remove = []
-        if 'topic_lst' in package:
-            topic_lst = package['topic_lst']
+        if topic_lst is not None:
             for topic in topic_lst:
                 if topic in self.present:
                     # This will rarely be a list of more than 1 item. It will
@@ -1373,21 +1416,13 @@ class PubServer(tornado.tcpserver.TCPServer, object):
                     # restarts and the master is yet to detect the disconnect
                     # via TCP keep-alive.
                     for client in self.present[topic]:
-                        try:
-                            # Write the packed str
-                            f = client.stream.write(payload)
-                            self.io_loop.add_future(f, lambda f: True)
-                        except StreamClosedError:
+                        if not self._write(client, payload):
                             to_remove.append(client)
                 else:
                     log.debug('Publish target %s not connected', topic)
         else:
             for client in self.clients:
-                try:
-                    # Write the packed str
-                    f = client.stream.write(payload)
-                    self.io_loop.add_future(f, lambda f: True)
-                except StreamClosedError:
+                if not self._write(client, payload):
                     to_remove.append(client)
         for client in to_remove:
             log.debug('Subscriber at %s has disconnected from publisher', client.address)
@@ -1434,10 +1469,30 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         if self.io_loop is None:
             self.io_loop = tornado.ioloop.IOLoop.current()
 
+        shard = kwargs.get('shard', 0)
+        processes = self._publish_processes()
+        shard_publisher = None
+        if processes > 1 and shard == 0:
+            # The first process frames every publication once and passes it
+            # on to the others
+            shard_publisher = salt.transport.ipc.IPCMessagePublisher(
+                self.opts,
+                self._shard_uri(),
+                io_loop=self.io_loop,
+            )
+            with salt.utils.files.set_umask(0o177):
+                shard_publisher.start()
+
         # Spin up the publisher
-        pub_server = PubServer(self.opts, io_loop=self.io_loop)
+        pub_server = PubServer(self.opts,
+                               io_loop=self.io_loop,
+                               shard_publisher=shard_publisher)
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if processes > 1:
+            # Every publisher process listens on the publish port, the kernel
+            # spreads the connecting minions across them
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         _set_tcp_keepalive(sock, self.opts)
         sock.setblocking(0)
         sock.bind((self.opts['interface'], int(self.opts['publish_port'])))
@@ -1445,6 +1500,14 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         # pub_server will take ownership of the socket
         pub_server.add_socket(sock)
 
+        if shard:
+            self.io_loop.spawn_callback(self._read_shard_frames, pub_server)
+            try:
+                self.io_loop.start()
+            except (KeyboardInterrupt, SystemExit):
+                salt.log.setup.shutdown_multiprocessing_logging()
+            return
+
         # Set up Salt IPC server
         if self.opts.get('ipc_mode', '') == 'tcp':
             pull_uri = int(self.opts.get('tcp_master_publish_pull', 4514))
@@ -1469,6 +1532,46 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         except (KeyboardInterrupt, SystemExit):
             salt.log.setup.shutdown_multiprocessing_logging()
 
+    def _publish_processes(self):
+        '''
+        Return the number of processes publishing to the connected minions
+        '''
+        processes = self.opts.get('tcp_pub_processes', 1)
+        if processes > 1 and (not hasattr(socket, 'SO_REUSEPORT') or
+                              self.opts.get('ipc_mode', '') == 'tcp'):
+            log.warning(
+                'tcp_pub_processes needs SO_REUSEPORT and ipc_mode ipc, '
+                'publishing from a single process'
+            )
+            return 1
+        return max(processes, 1)
+
+    def _shard_uri(self):
+        '''
+        Return the path of the socket framed publications are passed to the
+        other publisher processes on
+        '''
+        return os.path.join(self.opts['sock_dir'], 'publish_shards.ipc')
+
+    @tornado.gen.coroutine
+    def _read_shard_frames(self, pub_server):
+        '''
+        Write the publications framed by the first publisher process to the
+        minions connected to this one
+        '''
+        while True:
+            subscriber = salt.transport.ipc.IPCMessageSubscriber(
+                self._shard_uri(),
+                io_loop=self.io_loop,
+            )
+            subscriber.callbacks.add(pub_server.publish_frame)
+            try:
+                yield subscriber.read_async()
+            except Exception as exc:
+                log.debug('Lost the publisher shard socket: %s', exc)
+            subscriber.close()
+            yield tornado.gen.sleep(1)
+
     def pre_fork(self, process_manager, kwargs=None):
         '''
         Do anything necessary pre-fork. Since this is on the master side this will
@@ -1476,6 +1579,9 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         do the actual publishing
         '''
         process_manager.add_process(self._publish_daemon, kwargs=kwargs)
+        for shard in range(1, self._publish_processes()):
+            shard_kwargs = dict(kwargs or {}, shard=shard)
+            process_manager.add_process(self._publish_daemon, kwargs=shard_kwargs)
 
     def publish(self, load):
         '''
@@ -1483,12 +1589,18 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         '''
         payload = {'enc': 'aes'}
 
-        crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
+        crypticle = salt.crypt.Crypticle(self.opts,
+                                         salt.master.SMaster.secrets['aes']['secret'].value,
+                                         cipher=salt.crypt.publish_cipher(self.opts))
+        if crypticle.cipher != 'cbc':
+            payload['cipher'] = crypticle.cipher
         payload['load'] = crypticle.dumps(load)
         if self.opts['sign_pub_messages']:
-            master_pem_path = os.path.join(self.opts['pki_dir'], 'master.pem')
             log.debug("Signing data packet")
-            payload['sig'] = salt.crypt.sign_message(master_pem_path, payload['load'])
+            signer = salt.crypt.PublishSigner.get(self.opts)
+            payload['sig'] = signer.sign(payload['load'])
+            if signer.algorithm != 'rsa':
+                payload['sig_alg'] = signer.algorithm
         # Use the Salt IPC server
         if self.opts.get('ipc_mode', '') == 'tcp':
             pull_uri = int(self.opts.get('tcp_master_publish_pull', 4514))
@@ -1517,5 +1629,16 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
                 int_payload['topic_lst'] = match_ids
             else:
                 int_payload['topic_lst'] = load['tgt']
+        elif self.opts['publish_filtering'] and not self.opts.get('order_masters'):
+            # Only write to the connected minions the target matches, the
+            # syndics are not known to the minion data cache
+            match_ids = self.ckminions.check_publish_minions(
+                load['tgt'],
+                tgt_type=load['tgt_type'],
+                delimiter=load.get('delimiter', DEFAULT_TARGET_DELIM))
+
+            log.debug("Publish Side Match: %s", match_ids)
+            if match_ids is not None:
+                int_payload['topic_lst'] = match_ids
         # Send it over IPC!
         pub_sock.send(int_payload)
@@ -33,6 +33,7 @@ import salt.payload
 import salt.transport.client
 import salt.transport.server
 import salt.transport.mixins.auth
+from salt.defaults import DEFAULT_TARGET_DELIM
 from salt.ext import six
 from salt.exceptions import SaltReqTimeoutError, SaltException
 from salt._compat import ipaddress
@@ -67,6 +68,21 @@ except ImportError:
 log = logging.getLogger(__name__)
 
 
+def _get_worker_uri(opts, pool=None):
+    '''
+    Return the uri the workers of a pool connect to, ``None`` is the default
+    pool
+    '''
+    if opts.get('ipc_mode', '') == 'tcp':
+        port = int(opts.get('tcp_master_workers', 4515))
+        if pool is not None:
+            port += 1 + sorted(salt.transport.server.WORKER_POOLS).index(pool)
+        return 'tcp://127.0.0.1:{0}'.format(port)
+    if pool is None:
+        return 'ipc://{0}'.format(os.path.join(opts['sock_dir'], 'workers.ipc'))
+    return 'ipc://{0}'.format(os.path.join(opts['sock_dir'], 'workers-{0}.ipc'.format(pool)))
+
+
 def _get_master_uri(master_ip,
                     master_port,
                     source_ip=None,
@@ -274,10 +290,24 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
         raise SaltException('ReqChannel: missing master_uri/master_ip in self.opts')
 
     def _package_load(self, load):
-        return {
+        ret = {
             'enc': self.crypt,
             'load': load,
         }
+        # Tell the master which cipher the load is encrypted with
+        if self.crypt != 'clear' and self.auth.crypticle.cipher != 'cbc':
+            ret['cipher'] = self.auth.crypticle.cipher
+        return ret
+
+    @staticmethod
+    def _route(load):
+        '''
+        Return the command of a load, sent in the clear so the master can pick
+        the worker pool serving it
+        '''
+        if isinstance(load, dict):
+            return load.get('cmd')
+        return None
 
     @tornado.gen.coroutine
     def crypted_transfer_decode_dictentry(self, load, dictkey=None, tries=3, timeout=60):
@@ -289,6 +319,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
             self._package_load(self.auth.crypticle.dumps(load)),
             timeout=timeout,
             tries=tries,
+            route=self._route(load),
         )
         key = self.auth.get_keys()
         if 'key' not in ret:
@@ -298,6 +329,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
                 self._package_load(self.auth.crypticle.dumps(load)),
                 timeout=timeout,
                 tries=tries,
+                route=self._route(load),
             )
         if HAS_M2:
             aes = key.private_decrypt(ret['key'],
@@ -305,7 +337,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
         else:
             cipher = PKCS1_OAEP.new(key)
             aes = cipher.decrypt(ret['key'])
-        pcrypt = salt.crypt.Crypticle(self.opts, aes)
+        pcrypt = salt.crypt.Crypticle(self.opts, aes, cipher=ret.get('cipher', 'cbc'))
         data = pcrypt.loads(ret[dictkey])
         if six.PY3:
             data = salt.transport.frame.decode_embedded_strs(data)
@@ -333,6 +365,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
                 self._package_load(self.auth.crypticle.dumps(load)),
                 timeout=timeout,
                 tries=tries,
+                route=self._route(load),
             )
             # we may not have always data
             # as for example for saltcall ret submission, this is a blind
@@ -368,6 +401,7 @@ class AsyncZeroMQReqChannel(salt.transport.client.ReqChannel):
             self._package_load(load),
             timeout=timeout,
             tries=tries,
+            route=self._route(load),
         )
 
         raise tornado.gen.Return(ret)
@@ -602,20 +636,16 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         self.clients.setsockopt(zmq.BACKLOG, self.opts.get('zmq_backlog', 1000))
         self._start_zmq_monitor()
         self.workers = self.context.socket(zmq.DEALER)
-
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            self.w_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_workers', 4515)
-                )
-        else:
-            self.w_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'workers.ipc')
-                )
+        self.w_uri = _get_worker_uri(self.opts)
 
         log.info('Setting up the master communication server')
         self.clients.bind(self.uri)
         self.workers.bind(self.w_uri)
 
+        if self.worker_pools():
+            self._route_requests()
+            return
+
         while True:
             if self.clients.closed or self.workers.closed:
                 break
@@ -628,6 +658,57 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             except (KeyboardInterrupt, SystemExit):
                 break
 
+    def worker_pools(self):
+        '''
+        Return the names of the configured worker pools
+        '''
+        return sorted(pool for pool, count in six.iteritems(self.opts.get('worker_pools') or {})
+                      if pool in salt.transport.server.WORKER_POOLS and count)
+
+    def _route_requests(self):
+        '''
+        Forward each request to the worker pool serving its command and the
+        replies back to the clients
+        '''
+        self.pools = {}
+        poller = zmq.Poller()
+        poller.register(self.clients, zmq.POLLIN)
+        poller.register(self.workers, zmq.POLLIN)
+        for pool in self.worker_pools():
+            sock = self.context.socket(zmq.DEALER)
+            sock.bind(_get_worker_uri(self.opts, pool))
+            poller.register(sock, zmq.POLLIN)
+            self.pools[pool] = sock
+        routes = dict(
+            (salt.utils.stringutils.to_bytes(cmd), self.pools[pool])
+            for cmd, pool in six.iteritems(salt.transport.server.WORKER_POOL_COMMANDS)
+            if pool in self.pools
+        )
+        log.info('Routing requests to the worker pools: %s', ', '.join(self.pools))
+
+        while True:
+            if self.clients.closed or self.workers.closed:
+                break
+            try:
+                for sock, _ in poller.poll():
+                    frames = sock.recv_multipart(copy=False)
+                    if sock is self.clients:
+                        # The ROUTER envelope is the client identity and an
+                        # empty delimiter, followed by the payload and the
+                        # command of the request if the client sent it
+                        route = frames[3].bytes if len(frames) > 3 else None
+                        routes.get(route, self.workers).send_multipart(frames, copy=False)
+                    else:
+                        self.clients.send_multipart(frames, copy=False)
+            except zmq.ZMQError as exc:
+                if exc.errno == errno.EINTR:
+                    continue
+                if exc.errno == zmq.ETERM or self.clients.closed:
+                    break
+                six.reraise(*sys.exc_info())
+            except (KeyboardInterrupt, SystemExit):
+                break
+
     def close(self):
         '''
         Cleanly shutdown the router socket
@@ -647,6 +728,9 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             self.clients.close()
         if hasattr(self, 'workers') and self.workers.closed is False:
             self.workers.close()
+        for sock in six.itervalues(getattr(self, 'pools', {})):
+            if sock.closed is False:
+                sock.close()
         if hasattr(self, 'stream'):
             self.stream.close()
         if hasattr(self, '_socket') and self._socket.closed is False:
@@ -679,7 +763,7 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
             threading.Thread(target=self._w_monitor.start_poll).start()
             log.debug('ZMQ monitor has been started started')
 
-    def post_fork(self, payload_handler, io_loop):
+    def post_fork(self, payload_handler, io_loop, pool=None):
         '''
         After forking we need to create all of the local sockets to listen to the
         router
@@ -687,6 +771,7 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         :param func payload_handler: A function to called to handle incoming payloads as
                                      they are picked up off the wire
         :param IOLoop io_loop: An instance of a Tornado IOLoop, to handle event scheduling
+        :param str pool: The worker pool this worker serves, ``None`` for the default pool
         '''
         self.payload_handler = payload_handler
         self.io_loop = io_loop
@@ -695,18 +780,11 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         self._socket = self.context.socket(zmq.REP)
         self._start_zmq_monitor()
 
-        if self.opts.get('ipc_mode', '') == 'tcp':
-            self.w_uri = 'tcp://127.0.0.1:{0}'.format(
-                self.opts.get('tcp_master_workers', 4515)
-                )
-        else:
-            self.w_uri = 'ipc://{0}'.format(
-                os.path.join(self.opts['sock_dir'], 'workers.ipc')
-                )
+        self.w_uri = _get_worker_uri(self.opts, pool)
         log.info('Worker binding to socket %s', self.w_uri)
         self._socket.connect(self.w_uri)
 
-        salt.transport.mixins.auth.AESReqServerMixin.post_fork(self, payload_handler, io_loop)
+        salt.transport.mixins.auth.AESReqServerMixin.post_fork(self, payload_handler, io_loop, pool=pool)
 
         self.stream = zmq.eventloop.zmqstream.ZMQStream(self._socket, io_loop=self.io_loop)
         self.stream.on_recv_stream(self.handle_message)
@@ -776,11 +854,12 @@ class ZeroMQReqServerChannel(salt.transport.mixins.auth.AESReqServerMixin,
         if req_fun == 'send_clear':
             stream.send(self.serial.dumps(ret))
         elif req_fun == 'send':
-            stream.send(self.serial.dumps(self.crypticle.dumps(ret)))
+            stream.send(self.serial.dumps(self.crypticle.dumps(ret, cipher=payload.get('cipher'))))
         elif req_fun == 'send_private':
             stream.send(self.serial.dumps(self._encrypt_private(ret,
                                                                 req_opts['key'],
                                                                 req_opts['tgt'],
+                                                                payload.get('cipher'),
                                                                 )))
         else:
             log.error('Unknown req_fun %s', req_fun)
@@ -1023,12 +1102,18 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
         :param dict load: A load to be sent across the wire to minions
         '''
         payload = {'enc': 'aes'}
-        crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
+        crypticle = salt.crypt.Crypticle(self.opts,
+                                         salt.master.SMaster.secrets['aes']['secret'].value,
+                                         cipher=salt.crypt.publish_cipher(self.opts))
+        if crypticle.cipher != 'cbc':
+            payload['cipher'] = crypticle.cipher
         payload['load'] = crypticle.dumps(load)
         if self.opts['sign_pub_messages']:
-            master_pem_path = os.path.join(self.opts['pki_dir'], 'master.pem')
             log.debug("Signing data packet")
-            payload['sig'] = salt.crypt.sign_message(master_pem_path, payload['load'])
+            signer = salt.crypt.PublishSigner.get(self.opts)
+            payload['sig'] = signer.sign(payload['load'])
+            if signer.algorithm != 'rsa':
+                payload['sig_alg'] = signer.algorithm
         int_payload = {'payload': self.serial.dumps(payload)}
 
         # add some targeting stuff for lists only (for now)
@@ -1036,16 +1121,19 @@ class ZeroMQPubServerChannel(salt.transport.server.PubServerChannel):
             int_payload['topic_lst'] = load['tgt']
 
         # If zmq_filtering is enabled, target matching has to happen master side
-        match_targets = ["pcre", "glob", "list"]
-        if self.opts['zmq_filtering'] and load['tgt_type'] in match_targets:
+        if self.opts['zmq_filtering']:
             # Fetch a list of minions that match
-            _res = self.ckminions.check_minions(load['tgt'],
-                                                tgt_type=load['tgt_type'])
-            match_ids = _res['minions']
+            match_ids = self.ckminions.check_publish_minions(
+                load['tgt'],
+                tgt_type=load['tgt_type'],
+                delimiter=load.get('delimiter', DEFAULT_TARGET_DELIM))
 
             log.debug("Publish Side Match: %s", match_ids)
-            # Send list of miions thru so zmq can target them
-            int_payload['topic_lst'] = match_ids
+            if match_ids is not None:
+                # Send list of miions thru so zmq can target them
+                int_payload['topic_lst'] = match_ids
+            else:
+                int_payload.pop('topic_lst', None)
         payload = self.serial.dumps(int_payload)
         log.debug(
             'Sending payload to publish daemon. jid=%s size=%d',
@@ -1213,7 +1301,12 @@ class AsyncReqMessageClient(object):
                     data = self.serial.loads(msg[0])
                     future.set_result(data)
             self.stream.on_recv(mark_future)
-            self.stream.send(message)
+            if getattr(future, 'route', None):
+                # The command goes in its own frame so that the master can
+                # route the request without deserializing it
+                self.stream.send_multipart([message, future.route])
+            else:
+                self.stream.send(message)
 
             try:
                 ret = yield future
@@ -1259,7 +1352,7 @@ class AsyncReqMessageClient(object):
             else:
                 future.set_exception(SaltReqTimeoutError('Message timed out'))
 
-    def send(self, message, timeout=None, tries=3, future=None, callback=None, raw=False):
+    def send(self, message, timeout=None, tries=3, future=None, callback=None, raw=False, route=None):
         '''
         Return a future which will be completed when the message has a response
         '''
@@ -1268,6 +1361,7 @@ class AsyncReqMessageClient(object):
             future.tries = tries
             future.attempts = 0
             future.timeout = timeout
+            future.route = salt.utils.stringutils.to_bytes(route) if route else None
             # if a future wasn't passed in, we need to serialize the message
             message = self.serial.dumps(message)
         if callback is not None:
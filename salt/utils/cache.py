@@ -8,6 +8,7 @@ import os
 import re
 import time
 import logging
+from collections import OrderedDict
 try:
     import salt.utils.msgpack as msgpack
 except ImportError:
@@ -315,6 +316,47 @@ class CacheRegex(object):
         return regex
 
 
+class CacheLRU(object):
+    '''
+    Size bound mapping which evicts the least recently used entries
+    '''
+    def __init__(self, size=1000):
+        self.size = size
+        self.cache = OrderedDict()
+
+    def __contains__(self, key):
+        return key in self.cache
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __getitem__(self, key):
+        value = self.cache.pop(key)
+        self.cache[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self.cache.pop(key, None)
+        self.cache[key] = value
+        while len(self.cache) > self.size:
+            self.cache.popitem(last=False)
+
+    def get(self, key, default=None):
+        '''
+        Return the value for ``key`` and mark it as recently used
+        '''
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def clear(self):
+        '''
+        Clear the cache
+        '''
+        self.cache.clear()
+
+
 class ContextCache(object):
     def __init__(self, opts, name):
         '''
@@ -87,6 +87,7 @@ class SaltCacheLoader(BaseLoader):
         Cache a file from the salt master
         '''
         saltpath = salt.utils.url.create(template)
+        salt.fileclient.record_file(saltpath, self.saltenv)
         self.file_client().get_file(saltpath, '', True, self.saltenv)
 
     def check_cache(self, template):
@@ -5,20 +5,51 @@ Functions for interacting with the job cache
 
 # Import Python libs
 from __future__ import absolute_import, unicode_literals
+import ctypes
 import logging
+import multiprocessing
+import time
 
 # Import Salt libs
 import salt.minion
 import salt.utils.jid
 import salt.utils.event
+import salt.utils.process
 import salt.utils.verify
 
+# Import 3rd-party libs
+from salt.ext.six.moves import queue
+
 log = logging.getLogger(__name__)
 
 
-def store_job(opts, load, event=None, mminion=None):
+def _prep_jid(opts, load, mminion):
+    '''
+    Store the jid of a return in the master job cache
+    '''
+    job_cache = opts['master_job_cache']
+    jidstore_fstr = '{0}.prep_jid'.format(job_cache)
+    try:
+        mminion.returners[jidstore_fstr](False, passed_jid=load['jid'])
+    except KeyError:
+        emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
+        log.error(emsg)
+        raise KeyError(emsg)
+    except Exception:
+        log.critical(
+            "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
+            exc_info=True
+        )
+
+
+def store_job(opts, load, event=None, mminion=None, job_queue=None):
     '''
     Store job information using the configured master_job_cache
+
+    When a :py:class:`JobCacheQueue` is passed the return is fired on the event
+    bus right away and the write to the master job cache is left to the
+    :py:class:`JobCacheWriter` process. If the queue is full the return is
+    written synchronously.
     '''
     # Generate EndTime
     endtime = salt.utils.jid.jid_to_time(salt.utils.jid.gen_jid(opts))
@@ -31,7 +62,14 @@ def store_job(opts, load, event=None, mminion=None):
         mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
 
     job_cache = opts['master_job_cache']
-    if load['jid'] == 'req':
+    # Only the returns written to the master job cache go through the queue,
+    # the JobCacheWriter stores the jid of those not stored here already
+    queued = (job_queue is not None
+              and opts['job_cache']
+              and not opts.get('ext_job_cache')
+              and load['jid'] != 'nocache')
+    prepared = load['jid'] == 'req'
+    if prepared:
         # The minion is returning a standalone job, request a jobid
         load['arg'] = load.get('arg', load.get('fun_args', []))
         load['tgt_type'] = 'glob'
@@ -63,20 +101,9 @@ def store_job(opts, load, event=None, mminion=None):
                 "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
                 exc_info=True
             )
-    elif salt.utils.jid.is_jid(load['jid']):
+    elif salt.utils.jid.is_jid(load['jid']) and not queued:
         # Store the jid
-        jidstore_fstr = '{0}.prep_jid'.format(job_cache)
-        try:
-            mminion.returners[jidstore_fstr](False, passed_jid=load['jid'])
-        except KeyError:
-            emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
-            log.error(emsg)
-            raise KeyError(emsg)
-        except Exception:
-            log.critical(
-                "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
-                exc_info=True
-            )
+        _prep_jid(opts, load, mminion)
 
     if event:
         # If the return data is invalid, just ignore it
@@ -108,6 +135,13 @@ def store_job(opts, load, event=None, mminion=None):
         if 'user' in ret_:
             load.update({'user': ret_['user']})
 
+    if queued:
+        if job_queue.put((load, endtime, prepared)):
+            return
+        log.debug('The job cache queue is full, storing the return from %s '
+                  'for job %s synchronously', load['id'], load['jid'])
+        _prep_jid(opts, load, mminion)
+
     # Try to reach returner methods
     try:
         savefstr_func = mminion.returners[savefstr]
@@ -142,6 +176,220 @@ def store_job(opts, load, event=None, mminion=None):
         mminion.returners[updateetfstr](load['jid'], endtime)
 
 
+def store_jobs(opts, returns, mminion=None):
+    '''
+    Store a batch of returns using the configured master_job_cache
+
+    ``returns`` is a list of ``(load, endtime, prepared)`` tuples queued by
+    :py:func:`store_job`, which already validated them, fired them on the
+    event bus and, when ``prepared`` is True, stored their jid. The jid of
+    each other job is stored once per batch and, if the
+    returner implements ``returner_batch``, all the returns are handed to it in
+    a single call.
+    '''
+    if mminion is None:
+        mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
+
+    job_cache = opts['master_job_cache']
+    savefstr = '{0}.save_load'.format(job_cache)
+    fstr = '{0}.returner'.format(job_cache)
+    batchfstr = '{0}.returner_batch'.format(job_cache)
+    updateetfstr = '{0}.update_endtime'.format(job_cache)
+
+    endtimes = {}
+    for load, endtime, prepared in returns:
+        if not prepared and load['jid'] not in endtimes and salt.utils.jid.is_jid(load['jid']):
+            _prep_jid(opts, load, mminion)
+        endtimes[load['jid']] = max(endtime, endtimes.get(load['jid'], endtime))
+
+    loads = [load for load, _, _ in returns]
+    if job_cache != 'local_cache':
+        for load in loads:
+            try:
+                mminion.returners[savefstr](load['jid'], load)
+            except Exception:
+                log.critical(
+                    "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
+                    exc_info=True
+                )
+
+    if batchfstr in mminion.returners:
+        try:
+            mminion.returners[batchfstr](loads)
+        except Exception:
+            log.critical(
+                "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
+                exc_info=True
+            )
+    else:
+        for load in loads:
+            try:
+                mminion.returners[fstr](load)
+            except Exception:
+                log.critical(
+                    "The specified '{0}' returner threw a stack trace:\n".format(job_cache),
+                    exc_info=True
+                )
+
+    if (opts.get('job_cache_store_endtime')
+            and updateetfstr in mminion.returners):
+        for jid, endtime in endtimes.items():
+            mminion.returners[updateetfstr](jid, endtime)
+
+
+class JobCacheQueue(object):
+    '''
+    A bounded queue of returns shared by the master workers and the
+    JobCacheWriter process
+    '''
+    def __init__(self, maxsize):
+        self.queue = multiprocessing.Queue(maxsize)
+        # Returns which were written synchronously because the queue was full
+        self.overflows = multiprocessing.Value(ctypes.c_ulong, 0)
+
+    def put(self, item):
+        '''
+        Queue an item without blocking, returns False if the queue is full
+        '''
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            with self.overflows.get_lock():
+                self.overflows.value += 1
+            return False
+        return True
+
+    def get_batch(self, size, wait, timeout=None):
+        '''
+        Wait up to ``timeout`` seconds for an item, then keep collecting items
+        for up to ``wait`` seconds or until ``size`` items have been read
+        '''
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=timeout))
+            deadline = time.time() + wait
+            while len(batch) < size:
+                remaining = deadline - time.time()
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def qsize(self):
+        '''
+        Return the approximate number of queued items, None where the platform
+        cannot tell
+        '''
+        try:
+            return self.queue.qsize()
+        except NotImplementedError:
+            return None
+
+
+class JobCacheWriter(salt.utils.process.SignalHandlingMultiprocessingProcess):
+    '''
+    A dedicated process which writes the returns queued by the master workers
+    to the master job cache in batches
+    '''
+    def __init__(self, opts, job_queue, **kwargs):
+        super(JobCacheWriter, self).__init__(**kwargs)
+        self.opts = opts
+        self.job_queue = job_queue
+        self.batch_size = max(1, int(self.opts['master_job_cache_batch_size']))
+        self.batch_wait = float(self.opts['master_job_cache_batch_wait'])
+        self.stop = False
+        self._reset_stats()
+
+    # __setstate__ and __getstate__ are only used on Windows.
+    # We do this so that __init__ will be invoked on Windows in the child
+    # process so that a register_after_fork() equivalent will work on Windows.
+    def __setstate__(self, state):
+        self._is_child = True
+        self.__init__(
+            state['opts'],
+            state['job_queue'],
+            log_queue=state['log_queue'],
+            log_queue_level=state['log_queue_level']
+        )
+
+    def __getstate__(self):
+        return {
+            'opts': self.opts,
+            'job_queue': self.job_queue,
+            'log_queue': self.log_queue,
+            'log_queue_level': self.log_queue_level
+        }
+
+    def _reset_stats(self):
+        self.stat_clock = time.time()
+        self.stats = {'returns': 0, 'batches': 0, 'max_batch': 0,
+                      'write_time': 0, 'max_depth': 0}
+
+    def _handle_signals(self, signum, sigframe):
+        # Flush what is left in the queue and terminate
+        self.stop = True
+        while True:
+            batch = self.job_queue.get_batch(self.batch_size, 0, timeout=0)
+            if not batch:
+                break
+            self.flush(batch)
+        super(JobCacheWriter, self)._handle_signals(signum, sigframe)
+
+    def flush(self, batch):
+        '''
+        Write a batch of returns to the master job cache
+        '''
+        start = time.time()
+        try:
+            store_jobs(self.opts, batch, mminion=self.mminion)
+        except Exception as exc:
+            log.error('Could not store %s job returns: %s', len(batch), exc)
+        self.stats['write_time'] += time.time() - start
+        self.stats['returns'] += len(batch)
+        self.stats['batches'] += 1
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+
+    def _post_stats(self):
+        '''
+        Report the queue depth and the overflows since the last report
+        '''
+        now = time.time()
+        if now - self.stat_clock < self.opts['master_stats_event_iter']:
+            return
+        with self.job_queue.overflows.get_lock():
+            overflows = self.job_queue.overflows.value
+            self.job_queue.overflows.value = 0
+        if overflows:
+            log.warning('The job cache queue was full, %s returns were '
+                        'written by the master workers', overflows)
+        if self.opts['master_stats']:
+            stats = dict(self.stats,
+                         depth=self.job_queue.qsize(),
+                         overflows=overflows,
+                         time=now - self.stat_clock)
+            self.event.fire_event(stats, salt.utils.event.tagify('JobCacheWriter', 'stats'))
+        self._reset_stats()
+
+    def run(self):
+        '''
+        Drain the job cache queue
+        '''
+        salt.utils.process.appendproctitle(self.__class__.__name__)
+        self.mminion = salt.minion.MasterMinion(self.opts, states=False, rend=False)
+        self.event = salt.utils.event.get_master_event(self.opts, self.opts['sock_dir'], listen=False)
+        while not self.stop:
+            depth = self.job_queue.qsize()
+            if depth is not None:
+                self.stats['max_depth'] = max(self.stats['max_depth'], depth)
+            batch = self.job_queue.get_batch(self.batch_size, self.batch_wait, timeout=1)
+            if batch:
+                self.flush(batch)
+            self._post_stats()
+
+
 def store_minions(opts, jid, minions, mminion=None, syndic_id=None):
     '''
     Store additional minions matched on lower-level masters using the configured
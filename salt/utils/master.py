@@ -21,6 +21,7 @@ import salt.client
 import salt.pillar
 import salt.utils.atomicfile
 import salt.utils.files
+import salt.utils.minion_index
 import salt.utils.minions
 import salt.utils.platform
 import salt.utils.stringutils
@@ -458,10 +459,15 @@ class MasterPillarUtil(object):
                     (clear_grains and not minion_pillar)):
                     # Not saving pillar or grains, so just delete the cache file
                     self.cache.flush(bank, 'data')
+                    salt.utils.minion_index.update_minion_data(self.opts, minion_id, None)
                 elif clear_pillar and minion_grains:
                     self.cache.store(bank, 'data', {'grains': minion_grains})
+                    salt.utils.minion_index.update_minion_data(
+                        self.opts, minion_id, {'grains': minion_grains})
                 elif clear_grains and minion_pillar:
                     self.cache.store(bank, 'data', {'pillar': minion_pillar})
+                    salt.utils.minion_index.update_minion_data(
+                        self.opts, minion_id, {'pillar': minion_pillar})
                 if clear_mine:
                     # Delete the whole mine file
                     self.cache.flush(bank, 'mine')
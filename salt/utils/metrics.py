@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+'''
+Latency histograms for the master workers
+
+Each MWorker records how long it takes to serve every command in a
+:py:class:`Histogram` and, along with the ``master_stats`` events, writes a
+snapshot of the histograms and of the time it spent busy to the
+``master_stats`` directory of the master cachedir. The snapshots of all the
+workers are merged by the ``metrics`` runner.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import bisect
+import logging
+import os
+import time
+
+# Import salt libs
+import salt.payload
+import salt.utils.atomicfile
+import salt.utils.files
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in seconds, from 1ms to about 65s
+BUCKETS = tuple(0.001 * 2 ** idx for idx in range(17))
+
+
+class Histogram(object):
+    '''
+    A fixed bucket latency histogram
+    '''
+    def __init__(self, counts=None, total=0.0, maximum=0.0):
+        self.counts = list(counts) if counts else [0] * (len(BUCKETS) + 1)
+        self.total = total
+        self.maximum = maximum
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['counts'], data['sum'], data['max'])
+
+    def to_dict(self):
+        return {'counts': self.counts, 'sum': self.total, 'max': self.maximum}
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def observe(self, value):
+        '''
+        Record a duration in seconds
+        '''
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        '''
+        Add the observations of another histogram to this one
+        '''
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    def quantile(self, quantile):
+        '''
+        Estimate a quantile by interpolating inside the bucket it falls in
+        '''
+        count = self.count
+        if not count:
+            return 0.0
+        rank = quantile * count
+        seen = 0
+        for idx, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKETS[idx - 1] if idx else 0.0
+                upper = BUCKETS[idx] if idx < len(BUCKETS) else self.maximum
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(value, self.maximum)
+            seen += bucket_count
+        return self.maximum
+
+    def summary(self):
+        '''
+        Return the count, mean, p50, p99 and max of the histogram
+        '''
+        count = self.count
+        return {'count': count,
+                'mean': self.total / count if count else 0.0,
+                'p50': self.quantile(0.5),
+                'p99': self.quantile(0.99),
+                'max': self.maximum}
+
+
+def stats_dir(opts):
+    '''
+    Return the directory holding the worker stats snapshots
+    '''
+    return os.path.join(opts['cachedir'], 'master_stats')
+
+
+def write_worker_stats(opts, name, histograms, busy, interval):
+    '''
+    Persist the stats of a worker for the last ``interval`` seconds
+    '''
+    sdir = stats_dir(opts)
+    data = {'time': time.time(),
+            'interval': interval,
+            'busy': busy,
+            'histograms': dict((cmd, hist.to_dict())
+                               for cmd, hist in six.iteritems(histograms))}
+    try:
+        if not os.path.isdir(sdir):
+            os.makedirs(sdir)
+        with salt.utils.atomicfile.atomic_open(os.path.join(sdir, '{0}.p'.format(name)), 'wb') as fp_:
+            salt.payload.Serial(opts).dump(data, fp_)
+    except (IOError, OSError) as exc:
+        log.error('Unable to write the stats of %s: %s', name, exc)
+
+
+def read_worker_stats(opts, max_age=None):
+    '''
+    Return the stats snapshots of the workers keyed by worker name, skipping
+    the snapshots older than ``max_age`` seconds
+    '''
+    sdir = stats_dir(opts)
+    serial = salt.payload.Serial(opts)
+    ret = {}
+    try:
+        names = os.listdir(sdir)
+    except OSError:
+        return ret
+    now = time.time()
+    for fn_ in names:
+        if not fn_.endswith('.p'):
+            continue
+        try:
+            with salt.utils.files.fopen(os.path.join(sdir, fn_), 'rb') as fp_:
+                data = serial.load(fp_)
+        except (IOError, OSError, ValueError) as exc:
+            log.debug('Unable to read worker stats %s: %s', fn_, exc)
+            continue
+        if max_age is not None and now - data['time'] > max_age:
+            continue
+        ret[fn_[:-2]] = data
+    return ret
+
+
+def merge_worker_stats(workers):
+    '''
+    Merge the snapshots returned by read_worker_stats into one histogram per
+    command and the busy ratio of every worker
+    '''
+    histograms = {}
+    busy = {}
+    for name, data in six.iteritems(workers):
+        busy[name] = data['busy'] / data['interval'] if data['interval'] else 0.0
+        for cmd, hist in six.iteritems(data['histograms']):
+            histograms.setdefault(cmd, Histogram()).merge(Histogram.from_dict(hist))
+    return histograms, busy
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+'''
+In-memory inverted index of the minion data cache
+
+The index maps grain and pillar keys and values to the set of minion IDs
+carrying them, so that cache based targeting (grain, pillar, pillar_exact and
+the compound matchers built on top of them) can resolve a target with a few
+set operations instead of fetching and matching the cached data of every
+minion.
+
+The index is kept in memory in each master process and is persisted in the
+master cachedir as an append-only journal of length-prefixed msgpack frames.
+Every update of the minion data cache appends a frame to the journal, and
+every process replays the frames it has not seen yet before answering a
+query. The Maintenance process rebuilds the journal from the minion data
+cache when the master starts and periodically compacts it into a single
+snapshot frame.
+
+Enable it with the ``minion_data_index`` master option.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import collections
+import logging
+import os
+import struct
+
+# Import salt libs
+import salt.cache
+import salt.payload
+import salt.utils.atomicfile
+import salt.utils.data
+import salt.utils.files
+import salt.utils.stringutils
+from salt.defaults import DEFAULT_TARGET_DELIM
+from salt.ext import six
+
+log = logging.getLogger(__name__)
+
+SEARCH_TYPES = ('grains', 'pillar')
+GLOB_CHARS = frozenset('*?[')
+
+# Each journal frame is a msgpack payload prefixed with its length
+_FRAME_HEADER = struct.Struct(str('>I'))
+
+# Indexes are shared by every CkMinions instance in a process
+_INDEXES = {}
+
+
+def index_path(opts):
+    '''
+    Return the path of the persisted minion data index
+    '''
+    return os.path.join(opts['cachedir'], '.minion_data_index')
+
+
+def get_index(opts):
+    '''
+    Return the MinionDataIndex shared by this process
+    '''
+    path = index_path(opts)
+    if path not in _INDEXES:
+        _INDEXES[path] = MinionDataIndex(opts)
+    return _INDEXES[path]
+
+
+def update_minion_data(opts, minion_id, data):
+    '''
+    Record new minion data in the index if the index is enabled. ``data`` is
+    the dict stored under ``minions/<minion_id>`` in the minion data cache,
+    passing None removes the minion from the index.
+    '''
+    if not opts.get('minion_data_index', False):
+        return
+    try:
+        get_index(opts).update(minion_id, data)
+    except (IOError, OSError) as exc:
+        log.error('Unable to update the minion data index for %s: %s',
+                  minion_id, exc)
+
+
+def _lower(value):
+    '''
+    Normalize a key or value the same way subdict_match does
+    '''
+    try:
+        return six.text_type(value).lower()
+    except UnicodeDecodeError:
+        return salt.utils.stringutils.to_unicode(value).lower()
+
+
+def _index_terms(data, path=()):
+    '''
+    Yield every (path, value) pair that subdict_match can match against.
+    Paths are tuples of lowercased keys, dict keys are yielded as values of
+    their parent path since matchers also test for key existence.
+    '''
+    if isinstance(data, dict):
+        for key, val in six.iteritems(data):
+            key = _lower(key)
+            yield path, key
+            for term in _index_terms(val, path + (key,)):
+                yield term
+    elif isinstance(data, (list, tuple)):
+        for idx, member in enumerate(data):
+            if isinstance(member, (dict, list, tuple)):
+                for term in _index_terms(member, path):
+                    yield term
+                for term in _index_terms(member, path + (six.text_type(idx),)):
+                    yield term
+            else:
+                yield path, _lower(member)
+                yield path + (six.text_type(idx),), _lower(member)
+    elif data is not None:
+        yield path, _lower(data)
+
+
+class MinionDataIndex(object):
+    '''
+    Inverted grain/pillar index over the minion data cache
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.path = index_path(opts)
+        self.serial = salt.payload.Serial(opts)
+        self._clear()
+
+    def _clear(self):
+        self.data = {}
+        self._keys = dict((stype, collections.defaultdict(set)) for stype in SEARCH_TYPES)
+        self._values = dict((stype, collections.defaultdict(set)) for stype in SEARCH_TYPES)
+        self._terms = {}
+        self._ino = None
+        self._offset = 0
+        self.journal_frames = 0
+
+    # Journal handling
+
+    def _frame(self, record):
+        payload = self.serial.dumps(record)
+        return _FRAME_HEADER.pack(len(payload)) + payload
+
+    def _read_frames(self, fp_):
+        '''
+        Apply every complete frame from the current position of ``fp_``
+        '''
+        while True:
+            header = fp_.read(_FRAME_HEADER.size)
+            if len(header) < _FRAME_HEADER.size:
+                break
+            size = _FRAME_HEADER.unpack(header)[0]
+            payload = fp_.read(size)
+            if len(payload) < size:
+                break
+            self._apply(self.serial.loads(payload))
+            self._offset += _FRAME_HEADER.size + size
+            self.journal_frames += 1
+
+    def _replay(self, fp_):
+        self._ino = os.fstat(fp_.fileno()).st_ino
+        fp_.seek(self._offset)
+        self._read_frames(fp_)
+
+    def exists(self):
+        '''
+        Return True if the index has been built on disk
+        '''
+        return os.path.isfile(self.path)
+
+    def refresh(self):
+        '''
+        Replay journal frames written by other processes. Returns False when
+        no index has been built yet, in which case callers should fall back
+        to reading the minion data cache.
+        '''
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return False
+        if not stat.st_size:
+            # The Maintenance process is building the index
+            return False
+        if stat.st_ino != self._ino or stat.st_size < self._offset:
+            # The journal was compacted or rebuilt, start over
+            self._clear()
+        elif stat.st_size == self._offset:
+            return True
+        try:
+            with salt.utils.files.flopen(self.path, 'rb') as fp_:
+                self._replay(fp_)
+        except (IOError, OSError) as exc:
+            log.error('Unable to read the minion data index: %s', exc)
+            return False
+        return True
+
+    def _append(self, record):
+        '''
+        Append a record to the journal, retrying if the journal was replaced
+        by a compaction while we waited for the lock
+        '''
+        frame = self._frame(record)
+        while True:
+            with salt.utils.files.flopen(self.path, 'ab') as fp_:
+                try:
+                    current = os.stat(self.path).st_ino
+                except OSError:
+                    current = None
+                if current != os.fstat(fp_.fileno()).st_ino:
+                    continue
+                fp_.write(frame)
+                return
+
+    def _write(self, data):
+        '''
+        Atomically replace the journal with a single snapshot frame
+        '''
+        with salt.utils.atomicfile.atomic_open(self.path, 'wb') as fp_:
+            fp_.write(self._frame({'snapshot': data}))
+
+    def update(self, minion_id, data):
+        '''
+        Record new cached data for a minion, None removes the minion
+        '''
+        if not self.exists():
+            # Until the Maintenance process has built the index the minion
+            # data cache is the only source of truth
+            return
+        self._append({'id': minion_id, 'data': data})
+        self.refresh()
+
+    def remove(self, minion_id):
+        '''
+        Drop a minion from the index
+        '''
+        self.update(minion_id, None)
+
+    def rebuild(self, cache=None):
+        '''
+        Build the index from the minion data cache and persist it
+        '''
+        if cache is None:
+            cache = salt.cache.factory(self.opts)
+        cdir = os.path.dirname(self.path)
+        if not os.path.isdir(cdir):
+            os.makedirs(cdir)
+        with salt.utils.files.flopen(self.path, 'ab'):
+            # Hold the journal lock while scanning the cache, an update made
+            # meanwhile is appended to the snapshot instead of being lost
+            data = {}
+            for minion_id in cache.list('minions') or []:
+                mdata = cache.fetch('minions/{0}'.format(minion_id), 'data')
+                if mdata:
+                    data[minion_id] = mdata
+            log.debug('Building the minion data index for %d minions', len(data))
+            self._write(data)
+        self.refresh()
+
+    def compact(self):
+        '''
+        Fold the journal into a single snapshot frame
+        '''
+        if not self.exists():
+            return
+        with salt.utils.files.flopen(self.path, 'ab') as lock_fp:
+            # Hold the journal lock so no frame lands in the old file
+            if os.fstat(lock_fp.fileno()).st_ino != self._ino:
+                self._clear()
+            with salt.utils.files.fopen(self.path, 'rb') as fp_:
+                self._replay(fp_)
+            self._write(self.data)
+        self.refresh()
+
+    # In-memory index
+
+    def _apply(self, record):
+        if 'snapshot' in record:
+            for minion_id, data in six.iteritems(record['snapshot']):
+                self._set(minion_id, data)
+        else:
+            self._set(record['id'], record['data'])
+
+    def _drop(self, minion_id):
+        for stype, kind, term in self._terms.pop(minion_id, ()):
+            index = self._keys if kind == 'k' else self._values
+            ids = index[stype].get(term)
+            if ids is not None:
+                ids.discard(minion_id)
+                if not ids:
+                    del index[stype][term]
+        self.data.pop(minion_id, None)
+
+    def _set(self, minion_id, data):
+        self._drop(minion_id)
+        if not data:
+            return
+        self.data[minion_id] = data
+        terms = set()
+        for stype in SEARCH_TYPES:
+            sdata = data.get(stype)
+            if isinstance(sdata, dict):
+                for key in sdata:
+                    terms.add((stype, 'k', _lower(key)))
+            for term in _index_terms(sdata):
+                terms.add((stype, 'v', term))
+        for stype, kind, term in terms:
+            index = self._keys if kind == 'k' else self._values
+            index[stype][term].add(minion_id)
+        self._terms[minion_id] = terms
+
+    def minions(self):
+        '''
+        Return the set of minions that have cached data
+        '''
+        return set(self.data)
+
+    def candidates(self, search_type, expr, delimiter=DEFAULT_TARGET_DELIM,
+                   regex_match=False, exact_match=False):
+        '''
+        Return a superset of the minions whose cached ``search_type`` data
+        matches ``expr``
+        '''
+        splits = expr.split(delimiter)
+        if len(splits) == 1:
+            return set()
+        if not regex_match and (exact_match or not GLOB_CHARS.intersection(expr)):
+            # Plain key/value lookup: the value may hang below any of the
+            # keys subdict_match tries
+            lowered = [_lower(split) for split in splits]
+            ret = set()
+            for idx in range(len(splits) - 1, 0, -1):
+                term = (tuple(lowered[:idx]), delimiter.join(lowered[idx:]))
+                ret.update(self._values[search_type].get(term, ()))
+            return ret
+        if splits[0] == '*' or GLOB_CHARS.intersection(splits[0]):
+            return self.minions()
+        return set(self._keys[search_type].get(_lower(splits[0]), ()))
+
+    def match(self, search_type, expr, delimiter=DEFAULT_TARGET_DELIM,
+              regex_match=False, exact_match=False):
+        '''
+        Return the set of minions whose cached ``search_type`` data matches
+        ``expr``
+        '''
+        ret = set()
+        for minion_id in self.candidates(search_type,
+                                         expr,
+                                         delimiter=delimiter,
+                                         regex_match=regex_match,
+                                         exact_match=exact_match):
+            if salt.utils.data.subdict_match(self.data[minion_id].get(search_type),
+                                             expr,
+                                             delimiter=delimiter,
+                                             regex_match=regex_match,
+                                             exact_match=exact_match):
+                ret.add(minion_id)
+        return ret
@@ -7,13 +7,16 @@ expected to return
 # Import python libs
 from __future__ import absolute_import, unicode_literals
 import os
+import errno
 import fnmatch
 import re
+import time
 import logging
 
 # Import salt libs
 import salt.payload
 import salt.roster
+import salt.utils.cache
 import salt.utils.data
 import salt.utils.files
 import salt.utils.network
@@ -23,6 +26,7 @@ from salt.defaults import DEFAULT_TARGET_DELIM
 from salt.exceptions import CommandExecutionError, SaltCacheError
 import salt.auth.ldap
 import salt.cache
+import salt.utils.minion_index
 from salt.ext import six
 
 # Import 3rd-party libs
@@ -36,6 +40,28 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+COMPOUND_OPERS = ('and', 'or', 'not', '(', ')')
+
+# Target types resolved with the minion data cache, compound targets and
+# nodegroups may contain any of them
+CACHE_TARGET_TYPES = frozenset((
+    'grain',
+    'grain_pcre',
+    'pillar',
+    'pillar_pcre',
+    'pillar_exact',
+    'ipcidr',
+    'compound',
+    'compound_pillar_exact',
+    'nodegroup',
+))
+
+# Compiled compound targets shared by every CkMinions instance in a process
+_COMPOUND_CACHE = None
+
+# Accepted minion registries shared by every CkMinions instance in a process
+_ACCEPTED_MINIONS = {}
+
 TARGET_REX = re.compile(
         r'''(?x)
         (
@@ -179,6 +205,200 @@ def nodegroup_comp(nodegroup, nodegroups, skip=None, first_call=True):
         return ret
 
 
+class AcceptedMinions(object):
+    '''
+    Registry of the accepted minion keys in a PKI directory
+
+    The key listing is kept in memory and only re-read when the directory
+    changes, which is detected with a single stat of the directory, so
+    membership tests and iteration do not hit the filesystem for every job.
+    '''
+    # A directory modified this close to the time it was listed may change
+    # again within the same timestamp tick, so its listing is not trusted
+    RACY_WINDOW = 2
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+        self._minions = []
+        self._members = frozenset()
+
+    def invalidate(self):
+        '''
+        Force the next lookup to re-read the directory
+        '''
+        self._stamp = None
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT:
+                raise
+            # No key has been accepted yet
+            self._stamp = None
+            self._minions = []
+            self._members = frozenset()
+            return
+        stamp = (stat.st_ino, stat.st_mtime)
+        if stamp == self._stamp:
+            return
+        minions = []
+        for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(self.path)):
+            if not fn_.startswith('.') and os.path.isfile(os.path.join(self.path, fn_)):
+                minions.append(fn_)
+        self._minions = minions
+        self._members = frozenset(minions)
+        if time.time() - stat.st_mtime > self.RACY_WINDOW:
+            self._stamp = stamp
+        else:
+            self._stamp = None
+
+    def minions(self):
+        '''
+        Return a snapshot of the sorted accepted minion IDs
+        '''
+        self._refresh()
+        return list(self._minions)
+
+    def members(self):
+        '''
+        Return the accepted minion IDs as a frozenset
+        '''
+        self._refresh()
+        return self._members
+
+    def __contains__(self, minion_id):
+        return minion_id in self.members()
+
+
+def get_accepted_minions(opts, acc='minions'):
+    '''
+    Return the AcceptedMinions registry shared by this process
+    '''
+    path = os.path.join(opts['pki_dir'], acc)
+    if path not in _ACCEPTED_MINIONS:
+        _ACCEPTED_MINIONS[path] = AcceptedMinions(path)
+    return _ACCEPTED_MINIONS[path]
+
+
+def accepted_minions_changed(opts):
+    '''
+    Notify the registries of this process that keys were accepted, rejected
+    or deleted
+    '''
+    for acc in ('minions', 'accepted'):
+        registry = _ACCEPTED_MINIONS.get(os.path.join(opts['pki_dir'], acc))
+        if registry is not None:
+            registry.invalidate()
+
+
+class _CompoundParser(object):
+    '''
+    Recursive descent parser turning compound target words into a nested
+    tuple plan, ``not`` binds tighter than ``and``, which binds tighter than
+    ``or``. A ``not`` directly following an operand implies ``and``.
+    '''
+    def __init__(self, words):
+        self.words = words
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.words):
+            return self.words[self.pos]
+        return None
+
+    def parse(self):
+        plan = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError('unexpected "{0}"'.format(self.peek()))
+        return plan
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == 'or':
+            self.pos += 1
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_unary()
+        while self.peek() in ('and', 'not'):
+            if self.peek() == 'and':
+                self.pos += 1
+            node = ('and', node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.peek() == 'not':
+            self.pos += 1
+            return ('not', self.parse_primary(negated=True))
+        return self.parse_primary()
+
+    def parse_primary(self, negated=False):
+        word = self.peek()
+        if word is None:
+            raise ValueError('unexpected end of expression')
+        if word in COMPOUND_OPERS and word != '(':
+            raise ValueError('unexpected "{0}"'.format(word))
+        self.pos += 1
+        if word == '(':
+            node = self.parse_or()
+            # Parentheses left open are closed at the end of the expression
+            if self.peek() == ')':
+                self.pos += 1
+            elif self.peek() is not None:
+                raise ValueError('unexpected "{0}"'.format(self.peek()))
+            return node
+        target_info = parse_target(word)
+        if target_info['engine'] is None:
+            return ('term', None, word, None, False)
+        return ('term',
+                target_info['engine'],
+                target_info['pattern'],
+                target_info['delimiter'],
+                negated and target_info['engine'] == 'L')
+
+
+def compile_compound(expr, nodegroups):
+    '''
+    Compile a compound target expression, expanding nodegroups, into a plan
+    of nested tuples which CkMinions evaluates with set operations:
+
+    - ``('or', left, right)``
+    - ``('and', left, right)``
+    - ``('not', operand)``
+    - ``('term', engine, pattern, delimiter, ignore_missing)``, where engine
+      is None for bare globs
+
+    Returns None if the expression is invalid.
+    '''
+    if isinstance(expr, six.string_types):
+        words = expr.split()
+    else:
+        # we make a shallow copy in order to not affect the passed in arg
+        words = list(expr)
+
+    expanded = []
+    while words:
+        word = words.pop(0)
+        if word not in COMPOUND_OPERS:
+            target_info = parse_target(word)
+            if target_info['engine'] == 'N':
+                # if we encounter a node group, just evaluate it in-place
+                decomposed = nodegroup_comp(target_info['pattern'], nodegroups)
+                if decomposed:
+                    words = decomposed + words
+                continue
+        expanded.append(word)
+
+    try:
+        return _CompoundParser(expanded).parse()
+    except ValueError as exc:
+        log.error('Invalid compound target %s: %s', expr, exc)
+        return None
+
+
 class CkMinions(object):
     '''
     Used to check what minions should respond from a target
@@ -192,12 +412,24 @@ class CkMinions(object):
         self.opts = opts
         self.serial = salt.payload.Serial(opts)
         self.cache = salt.cache.factory(opts)
+        if self.opts.get('minion_data_index', False):
+            self.index = salt.utils.minion_index.get_index(opts)
+        else:
+            self.index = None
+        self._nodegroups_key = None
         # TODO: this is actually an *auth* check
         if self.opts.get('transport', 'zeromq') in ('zeromq', 'tcp'):
             self.acc = 'minions'
         else:
             self.acc = 'accepted'
 
+    @property
+    def accepted(self):
+        '''
+        The accepted minion registry shared by this process
+        '''
+        return get_accepted_minions(self.opts, self.acc)
+
     def _check_nodegroup_minions(self, expr, greedy):  # pylint: disable=unused-argument
         '''
         Return minions found by looking at nodegroups
@@ -219,7 +451,7 @@ class CkMinions(object):
         '''
         if isinstance(expr, six.string_types):
             expr = [m for m in expr.split(',') if m]
-        minions = self._pki_minions()
+        minions = self._pki_minion_set()
         return {'minions': [x for x in expr if x in minions],
                 'missing': [] if ignore_missing else [x for x in expr if x not in minions]}
 
@@ -238,10 +470,6 @@ class CkMinions(object):
         '''
         minions = []
         pki_cache_fn = os.path.join(self.opts['pki_dir'], self.acc, '.key_cache')
-        try:
-            os.makedirs(os.path.dirname(pki_cache_fn))
-        except OSError:
-            pass
         try:
             if self.opts['key_cache'] and os.path.exists(pki_cache_fn):
                 log.debug('Returning cached minion list')
@@ -252,10 +480,7 @@ class CkMinions(object):
                     with salt.utils.files.fopen(pki_cache_fn, mode='rb') as fn_:
                         return self.serial.load(fn_)
             else:
-                for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                    if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                        minions.append(fn_)
-            return minions
+                return self.accepted.minions()
         except OSError as exc:
             log.error(
                 'Encountered OSError while evaluating minions in PKI dir: %s',
@@ -263,6 +488,23 @@ class CkMinions(object):
             )
             return minions
 
+    def _pki_minion_set(self):
+        '''
+        Return the accepted minions as a frozenset for membership tests
+        '''
+        pki_cache_fn = os.path.join(self.opts['pki_dir'], self.acc, '.key_cache')
+        if self.opts.get('key_cache') and os.path.exists(pki_cache_fn):
+            return frozenset(self._pki_minions())
+        try:
+            # The registry keeps the frozenset until the directory changes
+            return self.accepted.members()
+        except OSError as exc:
+            log.error(
+                'Encountered OSError while evaluating minions in PKI dir: %s',
+                exc
+            )
+            return frozenset()
+
     def _check_cache_minions(self,
                              expr,
                              delimiter,
@@ -278,14 +520,19 @@ class CkMinions(object):
         '''
         cache_enabled = self.opts.get('minion_data_cache', False)
 
+        if cache_enabled and self.index is not None and self.index.refresh():
+            return self._check_index_minions(expr,
+                                             delimiter,
+                                             greedy,
+                                             search_type,
+                                             regex_match=regex_match,
+                                             exact_match=exact_match)
+
         def list_cached_minions():
             return self.cache.list('minions')
 
         if greedy:
-            minions = []
-            for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                    minions.append(fn_)
+            minions = self.accepted.minions()
         elif cache_enabled:
             minions = list_cached_minions()
         else:
@@ -320,6 +567,31 @@ class CkMinions(object):
         return {'minions': minions,
                 'missing': []}
 
+    def _check_index_minions(self,
+                             expr,
+                             delimiter,
+                             greedy,
+                             search_type,
+                             regex_match=False,
+                             exact_match=False):
+        '''
+        Same as _check_cache_minions, but resolve the target through the
+        in-memory minion data index instead of fetching every cached minion
+        '''
+        matched = self.index.match(search_type,
+                                   expr,
+                                   delimiter=delimiter,
+                                   regex_match=regex_match,
+                                   exact_match=exact_match)
+        if greedy:
+            accepted = self._pki_minion_set()
+            # Accepted minions without cached data may still match
+            minions = (accepted - self.index.minions()) | (accepted & matched)
+        else:
+            minions = matched
+        return {'minions': list(minions),
+                'missing': []}
+
     def _check_grain_minions(self, expr, delimiter, greedy):
         '''
         Return the minions found by looking via grains
@@ -439,11 +711,7 @@ class CkMinions(object):
             )
             cache_enabled = self.opts.get('minion_data_cache', False)
             if greedy:
-                mlist = []
-                for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-                    if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                        mlist.append(fn_)
-                return {'minions': mlist,
+                return {'minions': self.accepted.minions(),
                         'missing': []}
             elif cache_enabled:
                 return {'minions': self.cache.list('minions'),
@@ -474,18 +742,19 @@ class CkMinions(object):
         if not isinstance(expr, six.string_types) and not isinstance(expr, (list, tuple)):
             log.error('Compound target that is neither string, list nor tuple')
             return {'minions': [], 'missing': []}
-        minions = set(self._pki_minions())
+        minions = self._pki_minion_set()
         log.debug('minions: %s', minions)
 
-        nodegroups = self.opts.get('nodegroups', {})
-
         if self.opts.get('minion_data_cache', False):
+            plan = self._compile_compound(expr)
+            if plan is None:
+                return {'minions': [], 'missing': []}
+
             ref = {'G': self._check_grain_minions,
                    'P': self._check_grain_pcre_minions,
                    'I': self._check_pillar_minions,
                    'J': self._check_pillar_pcre_minions,
                    'L': self._check_list_minions,
-                   'N': None,    # nodegroups should already be expanded
                    'S': self._check_ipcidr_minions,
                    'E': self._check_pcre_minions,
                    'R': self._all_minions}
@@ -493,132 +762,63 @@ class CkMinions(object):
                 ref['I'] = self._check_pillar_exact_minions
                 ref['J'] = self._check_pillar_exact_minions
 
-            results = []
-            unmatched = []
-            opers = ['and', 'or', 'not', '(', ')']
             missing = []
-
-            if isinstance(expr, six.string_types):
-                words = expr.split()
-            else:
-                # we make a shallow copy in order to not affect the passed in arg
-                words = expr[:]
-
-            while words:
-                word = words.pop(0)
-                target_info = parse_target(word)
-
-                # Easy check first
-                if word in opers:
-                    if results:
-                        if results[-1] == '(' and word in ('and', 'or'):
-                            log.error('Invalid beginning operator after "(": %s', word)
-                            return {'minions': [], 'missing': []}
-                        if word == 'not':
-                            if not results[-1] in ('&', '|', '('):
-                                results.append('&')
-                            results.append('(')
-                            results.append(six.text_type(set(minions)))
-                            results.append('-')
-                            unmatched.append('-')
-                        elif word == 'and':
-                            results.append('&')
-                        elif word == 'or':
-                            results.append('|')
-                        elif word == '(':
-                            results.append(word)
-                            unmatched.append(word)
-                        elif word == ')':
-                            if not unmatched or unmatched[-1] != '(':
-                                log.error('Invalid compound expr (unexpected '
-                                          'right parenthesis): %s',
-                                          expr)
-                                return {'minions': [], 'missing': []}
-                            results.append(word)
-                            unmatched.pop()
-                            if unmatched and unmatched[-1] == '-':
-                                results.append(')')
-                                unmatched.pop()
-                        else:  # Won't get here, unless oper is added
-                            log.error('Unhandled oper in compound expr: %s',
-                                      expr)
-                            return {'minions': [], 'missing': []}
+            terms = {}
+
+            def _evaluate(node):
+                if node[0] == 'or':
+                    return _evaluate(node[1]) | _evaluate(node[2])
+                if node[0] == 'and':
+                    return _evaluate(node[1]) & _evaluate(node[2])
+                if node[0] == 'not':
+                    return minions - _evaluate(node[1])
+                # Identical terms are only looked up once per evaluation
+                if node not in terms:
+                    _, engine, pattern, tgt_delim, ignore_missing = node
+                    if engine is None:
+                        # The match is not explicitly defined, evaluate as a glob
+                        _results = self._check_glob_minions(pattern, True)
                     else:
-                        # seq start with oper, fail
-                        if word == 'not':
-                            results.append('(')
-                            results.append(six.text_type(set(minions)))
-                            results.append('-')
-                            unmatched.append('-')
-                        elif word == '(':
-                            results.append(word)
-                            unmatched.append(word)
-                        else:
-                            log.error(
-                                'Expression may begin with'
-                                ' binary operator: %s', word
-                            )
-                            return {'minions': [], 'missing': []}
-
-                elif target_info and target_info['engine']:
-                    if 'N' == target_info['engine']:
-                        # if we encounter a node group, just evaluate it in-place
-                        decomposed = nodegroup_comp(target_info['pattern'], nodegroups)
-                        if decomposed:
-                            words = decomposed + words
-                        continue
-
-                    engine = ref.get(target_info['engine'])
-                    if not engine:
-                        # If an unknown engine is called at any time, fail out
-                        log.error(
-                            'Unrecognized target engine "%s" for'
-                            ' target expression "%s"',
-                            target_info['engine'],
-                            word,
-                        )
-                        return {'minions': [], 'missing': []}
-
-                    engine_args = [target_info['pattern']]
-                    if target_info['engine'] in ('G', 'P', 'I', 'J'):
-                        engine_args.append(target_info['delimiter'] or ':')
-                    engine_args.append(greedy)
-
-                    # ignore missing minions for lists if we exclude them with
-                    # a 'not'
-                    if 'L' == target_info['engine']:
-                        engine_args.append(results and results[-1] == '-')
-                    _results = engine(*engine_args)
-                    results.append(six.text_type(set(_results['minions'])))
+                        engine_args = [pattern]
+                        if engine in ('G', 'P', 'I', 'J'):
+                            engine_args.append(tgt_delim or ':')
+                        engine_args.append(greedy)
+                        # ignore missing minions for lists if we exclude them
+                        # with a 'not'
+                        if 'L' == engine:
+                            engine_args.append(ignore_missing)
+                        _results = ref[engine](*engine_args)
                     missing.extend(_results['missing'])
-                    if unmatched and unmatched[-1] == '-':
-                        results.append(')')
-                        unmatched.pop()
+                    terms[node] = set(_results['minions'])
+                return terms[node]
 
-                else:
-                    # The match is not explicitly defined, evaluate as a glob
-                    _results = self._check_glob_minions(word, True)
-                    results.append(six.text_type(set(_results['minions'])))
-                    if unmatched and unmatched[-1] == '-':
-                        results.append(')')
-                        unmatched.pop()
-
-            # Add a closing ')' for each item left in unmatched
-            results.extend([')' for item in unmatched])
-
-            results = ' '.join(results)
-            log.debug('Evaluating final compound matching expr: %s',
-                      results)
-            try:
-                minions = list(eval(results))  # pylint: disable=W0123
-                return {'minions': minions, 'missing': missing}
-            except Exception:
-                log.error('Invalid compound target: %s', expr)
-                return {'minions': [], 'missing': []}
+            log.debug('Evaluating compiled compound expr: %s', plan)
+            return {'minions': list(_evaluate(plan)), 'missing': missing}
 
         return {'minions': list(minions),
                 'missing': []}
 
+    def _compile_compound(self, expr):
+        '''
+        Return the compiled plan for a compound expression, compiling it on a
+        cache miss. Returns None for invalid expressions.
+        '''
+        nodegroups = self.opts.get('nodegroups', {})
+        size = self.opts.get('compound_cache_size', 1000)
+        if not size:
+            return compile_compound(expr, nodegroups)
+
+        global _COMPOUND_CACHE  # pylint: disable=global-statement
+        if _COMPOUND_CACHE is None or _COMPOUND_CACHE.size != size:
+            _COMPOUND_CACHE = salt.utils.cache.CacheLRU(size)
+        if self._nodegroups_key is None:
+            self._nodegroups_key = repr(sorted(six.iteritems(nodegroups)))
+        key = (expr if isinstance(expr, six.string_types) else tuple(expr),
+               self._nodegroups_key)
+        if key not in _COMPOUND_CACHE:
+            _COMPOUND_CACHE[key] = compile_compound(expr, nodegroups)
+        return _COMPOUND_CACHE[key]
+
     def connected_ids(self, subset=None, show_ip=False, show_ipv4=None, include_localhost=None):
         '''
         Return a set of all connected minion ids, optionally within a subset
@@ -684,11 +884,7 @@ class CkMinions(object):
         '''
         Return a list of all minions that have auth'd
         '''
-        mlist = []
-        for fn_ in salt.utils.data.sorted_ignorecase(os.listdir(os.path.join(self.opts['pki_dir'], self.acc))):
-            if not fn_.startswith('.') and os.path.isfile(os.path.join(self.opts['pki_dir'], self.acc, fn_)):
-                mlist.append(fn_)
-        return {'minions': mlist, 'missing': []}
+        return {'minions': self.accepted.minions(), 'missing': []}
 
     def check_minions(self,
                       expr,
@@ -730,6 +926,48 @@ class CkMinions(object):
             _res = {'minions': [], 'missing': []}
         return _res
 
+    def _cache_coverage(self):
+        '''
+        Return the fraction of the accepted minions which have data in the
+        minion data cache
+        '''
+        accepted = self._pki_minion_set()
+        if not accepted:
+            return 1.0
+        if self.index is not None and self.index.refresh():
+            cached = self.index.minions()
+        else:
+            cached = self.cache.list('minions')
+        return len(accepted.intersection(cached)) / float(len(accepted))
+
+    def check_publish_minions(self,
+                              expr,
+                              tgt_type='glob',
+                              delimiter=DEFAULT_TARGET_DELIM):
+        '''
+        Return the ids of the minions a publication for the target has to be
+        sent to, or None when it has to be broadcast to every connected minion.
+
+        Targets matched on cached grains, pillar or addresses are only
+        resolved when the minion data cache covers at least
+        ``publish_filter_coverage`` of the accepted minions.
+        '''
+        if tgt_type in CACHE_TARGET_TYPES:
+            if not self.opts.get('minion_data_cache', False):
+                return None
+            coverage = self._cache_coverage()
+            if coverage < self.opts.get('publish_filter_coverage', 1.0):
+                log.debug(
+                    'Broadcasting %s target, the minion data cache covers '
+                    '%.0f%% of the accepted minions', tgt_type, coverage * 100)
+                return None
+        minions = self.check_minions(expr, tgt_type, delimiter)['minions']
+        if not minions:
+            # The master only publishes targets it resolved, so resolving
+            # nothing here means the lookup failed
+            return None
+        return minions
+
     def validate_tgt(self, valid, expr, tgt_type, minions=None, expr_form=None):
         '''
         Return a Bool. This function returns if the expression sent in is
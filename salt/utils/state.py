@@ -245,4 +245,7 @@ def get_sls_opts(opts, **kwargs):
     else:
         opts['pillarenv'] = pillarenv
 
+    if kwargs.get('profile') is not None:
+        opts['state_profile'] = bool(kwargs['profile'])
+
     return opts
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+'''
+Time encrypting and decrypting loads with the session key ciphers, for the
+payload sizes seen on the request and publish channels.
+
+    python tests/crypticle_bench.py --sizes 1024,102400,10485760
+'''
+# pylint: disable=resource-leakage
+# Import python libs
+from __future__ import absolute_import, print_function
+import optparse
+import os
+import timeit
+
+# Import Salt libs
+import salt.crypt
+
+
+def parse():
+    '''
+    Parse the command line options
+    '''
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-s',
+        '--sizes',
+        dest='sizes',
+        default='1024,10240,102400,1048576,10485760',
+        help='Comma separated payload sizes in bytes')
+    parser.add_option(
+        '-t',
+        '--time',
+        dest='time',
+        default=1.0,
+        type='float',
+        help='The seconds to spend on each cipher and size')
+    options, _ = parser.parse_args()
+    return options.__dict__
+
+
+def measure(func, seconds):
+    '''
+    Return the seconds one call of func takes
+    '''
+    timer = timeit.Timer(func)
+    number, elapsed = 1, timer.timeit(1)
+    while elapsed < seconds:
+        number = max(number * 2, int(number * seconds / max(elapsed, 1e-9)))
+        elapsed = timer.timeit(number)
+    return elapsed / number
+
+
+def run(sizes, seconds):
+    '''
+    Print the MB/s of dumps and loads of every cipher for each size
+    '''
+    key = salt.crypt.Crypticle.generate_key_string()
+    ciphers = ['cbc'] + salt.crypt.AEAD_CIPHERS
+    print('AEAD backend: {0}'.format('cryptography' if salt.crypt.CRYPTOGRAPHY_AEAD else 'pycryptodome'))
+    print('{0:>10} {1:>18} {2:>12} {3:>12}'.format('size', 'cipher', 'dumps MB/s', 'loads MB/s'))
+    for size in sizes:
+        load = {'fun': 'state.apply', 'arg': [os.urandom(size)]}
+        for cipher in ciphers:
+            crypticle = salt.crypt.Crypticle({}, key, cipher=cipher)
+            data = crypticle.dumps(load)
+            dumps = measure(lambda: crypticle.dumps(load), seconds)
+            loads = measure(lambda: crypticle.loads(data), seconds)
+            print('{0:>10} {1:>18} {2:>12.1f} {3:>12.1f}'.format(
+                size, cipher, size / dumps / 2 ** 20, size / loads / 2 ** 20))
+
+
+if __name__ == '__main__':
+    opts = parse()
+    run([int(size) for size in opts['sizes'].split(',')], opts['time'])
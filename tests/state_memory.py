@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+'''
+Measure the memory held per chunk while the state system compiles and runs a
+large generated state tree. Needs python 3 for tracemalloc.
+
+    python tests/state_memory.py --chunks 20000
+'''
+# pylint: disable=resource-leakage
+# Import python libs
+from __future__ import absolute_import, print_function
+import gc
+import logging
+import optparse
+import shutil
+import tempfile
+import tracemalloc
+
+# Import Salt libs
+import salt.config
+import salt.state
+import salt.utils.yaml
+
+# Import Salt Testing libs
+from tests.support.mock import patch
+
+# Import 3rd-party libs
+from salt.ext import six
+
+STATE = '''
+id{num}:
+  test:
+    - succeed_without_changes
+    - name: /srv/app/file{num}
+    - source: salt://app/files/file{num}
+    - user: root
+    - group: root
+    - mode: 644
+'''
+REQUIRE = '''
+    - require:
+      - test: id0
+'''
+
+
+def parse():
+    '''
+    Parse the command line options
+    '''
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-c',
+        '--chunks',
+        dest='chunks',
+        default=5000,
+        type='int',
+        help='The number of states to generate')
+    options, _ = parser.parse_args()
+    return options.__dict__
+
+
+def gen_high(count):
+    '''
+    Generate high data the way a rendered sls file has it, every state but
+    the first requiring the first one
+    '''
+    sls = []
+    for num in range(count):
+        sls.append(STATE.format(num=num))
+        if num:
+            sls.append(REQUIRE)
+    high = salt.utils.yaml.safe_load(''.join(sls))
+    for body in six.itervalues(high):
+        body['__sls__'] = 'app'
+        body['__env__'] = 'base'
+    return high
+
+
+def traced():
+    '''
+    Return the memory currently traced after a full collection
+    '''
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def run(chunks):
+    '''
+    Compile and run the generated states, printing the bytes held per chunk
+    '''
+    cachedir = tempfile.mkdtemp()
+    opts = salt.config.minion_config(None)
+    opts.update({'file_client': 'local',
+                 'cachedir': cachedir,
+                 'state_events': False})
+    try:
+        with patch('salt.state.State._gather_pillar', return_value={}):
+            state = salt.state.State(opts)
+        high = gen_high(chunks)
+        tracemalloc.start()
+        start = traced()
+        low = state.compile_high_data(high)
+        compiled = traced()
+        print('chunks:  {0} bytes/chunk'.format((compiled - start) // chunks))
+        state.requisite_index = salt.state.RequisiteIndex(low)
+        running = state.call_chunks(low)
+        ran = traced()
+        print('running: {0} bytes/chunk'.format((ran - compiled) // chunks))
+        print('peak:    {0} bytes/chunk'.format(
+            (tracemalloc.get_traced_memory()[1] - start) // chunks))
+        tracemalloc.stop()
+        return running
+    finally:
+        shutil.rmtree(cachedir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    # Salt holds on to the log records until logging is set up
+    logging.disable(logging.CRITICAL)
+    run(parse()['chunks'])
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+'''
+Time publishing to many connected minions over the TCP transport. Fake
+subscribers connect to the publish port from a few local processes and count
+the publications they receive. Needs python 3 for selectors.
+
+    python tests/tcp_pub_bench.py --subscribers 10000 --processes 4
+'''
+# pylint: disable=resource-leakage
+# Import python libs
+from __future__ import absolute_import, print_function
+import ctypes
+import logging
+import multiprocessing
+import optparse
+import resource
+import selectors
+import shutil
+import socket
+import tempfile
+import time
+
+# Import Salt libs
+import salt.config
+import salt.crypt
+import salt.master
+import salt.transport.server
+import salt.utils.process
+
+# Import 3rd-party libs
+import msgpack
+from salt.ext import six
+
+
+def parse():
+    '''
+    Parse the command line options
+    '''
+    parser = optparse.OptionParser()
+    parser.add_option(
+        '-s',
+        '--subscribers',
+        dest='subscribers',
+        default=1000,
+        type='int',
+        help='The number of fake minions connected to the publisher')
+    parser.add_option(
+        '-p',
+        '--processes',
+        dest='processes',
+        default=1,
+        type='int',
+        help='The tcp_pub_processes of the publisher')
+    parser.add_option(
+        '-n',
+        '--publishes',
+        dest='publishes',
+        default=100,
+        type='int',
+        help='The number of publications to send')
+    parser.add_option(
+        '--size',
+        dest='size',
+        default=1024,
+        type='int',
+        help='The size of the publication argument in bytes')
+    parser.add_option(
+        '--startup',
+        dest='startup',
+        default=10,
+        type='int',
+        help='The seconds to wait for the publisher processes to start')
+    parser.add_option(
+        '--clients',
+        dest='clients',
+        default=4,
+        type='int',
+        help='The number of processes the fake minions are spread over')
+    options, _ = parser.parse_args()
+    return options.__dict__
+
+
+def connect(port, timeout=60):
+    '''
+    Connect to the publisher, waiting for it to listen
+    '''
+    start = time.time()
+    while True:
+        try:
+            return socket.create_connection(('127.0.0.1', port))
+        except socket.error:
+            if time.time() - start > timeout:
+                raise
+            time.sleep(0.1)
+
+
+def subscribe(port, count, publishes, ready, done):
+    '''
+    Connect count sockets to the publisher and read from them until every
+    socket received publishes publications
+    '''
+    selector = selectors.DefaultSelector()
+    for _ in range(count):
+        sock = connect(port)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, [msgpack.Unpacker(), 0])
+    ready.put(count)
+    pending = count
+    while pending:
+        for key, _ in selector.select(timeout=60):
+            data = key.fileobj.recv(1048576)
+            if not data:
+                raise RuntimeError('The publisher closed a connection')
+            unpacker, received = key.data
+            unpacker.feed(data)
+            for _ in unpacker:
+                received += 1
+            key.data[1] = received
+            if received >= publishes:
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+                pending -= 1
+    done.put(count)
+
+
+def run(subscribers, processes, publishes, size, startup, clients):
+    '''
+    Publish to the fake minions and print the publications and the frames
+    written per second
+    '''
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    root_dir = tempfile.mkdtemp()
+    opts = salt.config.master_config(None)
+    opts.update({'root_dir': root_dir,
+                 'sock_dir': root_dir,
+                 'pki_dir': root_dir,
+                 'cachedir': root_dir,
+                 'transport': 'tcp',
+                 'interface': '127.0.0.1',
+                 'publish_port': 14505,
+                 'tcp_pub_processes': processes,
+                 'sign_pub_messages': False})
+    salt.master.SMaster.secrets['aes'] = {
+        'secret': multiprocessing.Array(
+            ctypes.c_char,
+            six.b(salt.crypt.Crypticle.generate_key_string()),
+        ),
+    }
+    process_manager = salt.utils.process.ProcessManager(name='PubBench_ProcessManager')
+    ready = multiprocessing.Queue()
+    done = multiprocessing.Queue()
+    workers = []
+    try:
+        channel = salt.transport.server.PubServerChannel.factory(opts)
+        channel.pre_fork(process_manager)
+        # Every publisher process has to listen before the subscribers connect
+        # for them to be spread across the processes
+        connect(opts['publish_port']).close()
+        time.sleep(startup)
+        for num in range(clients):
+            count = subscribers // clients + (num < subscribers % clients)
+            worker = multiprocessing.Process(
+                target=subscribe,
+                args=(opts['publish_port'], count, publishes, ready, done))
+            worker.start()
+            workers.append(worker)
+        for _ in workers:
+            ready.get(timeout=300)
+        # Allow time for the publishers to accept the connections
+        time.sleep(2)
+        load = {'tgt_type': 'glob', 'tgt': '*', 'fun': 'test.arg',
+                'arg': ['0' * size], 'ret': ''}
+        start = time.time()
+        for jid in range(publishes):
+            load['jid'] = jid
+            channel.publish(load)
+        sent = time.time()
+        for _ in workers:
+            done.get(timeout=600)
+        elapsed = time.time() - start
+        print('published:      {0:.1f} publications/s'.format(publishes / (sent - start)))
+        print('received:       {0:.1f} publications/s'.format(publishes / elapsed))
+        print('frames written: {0:.0f} frames/s'.format(subscribers * publishes / elapsed))
+    finally:
+        for worker in workers:
+            worker.terminate()
+        process_manager.stop_restarting()
+        process_manager.kill_children()
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    # The publisher processes log every publication at debug level
+    logging.disable(logging.CRITICAL)
+    run(**parse())
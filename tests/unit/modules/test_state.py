@@ -49,6 +49,13 @@ class MockState(object):
     def __init__(self):
         pass
 
+    @staticmethod
+    def expand_results(running):
+        '''
+            Mock expand_results method
+        '''
+        return running
+
     class State(object):
         '''
             Mock state class
@@ -152,6 +159,13 @@ class MockState(object):
         def requisite_in(self, data):  # pylint: disable=unused-argument
             return data, []
 
+        @staticmethod
+        def stream_summary(running):
+            '''
+                Mock stream_summary method
+            '''
+            return running, None
+
     class HighState(object):
         '''
             Mock HighState class
@@ -251,7 +265,8 @@ class MockState(object):
 
         @staticmethod
         def call_highstate(exclude, cache, cache_name, force=None,
-                           whitelist=None, orchestration_jid=None):
+                           whitelist=None, orchestration_jid=None,
+                           incremental=None):
             '''
                 Mock call_highstate method
             '''
@@ -353,3 +353,104 @@ class Local_CacheTest(TestCase, AdaptedConfigurationTestCaseMixin, LoaderModuleM
         self._check_dir_files('new_jid_dir was not removed',
                               self.EMPTY_JID_DIR,
                               status='removed')
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(not local_cache.HAS_SQLITE3, 'sqlite3 is not available')
+class LocalCacheIndexTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the sqlite index of the local job cache
+    '''
+    def setup_loader_modules(self):
+        self.tmp_cache_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_cache_dir, ignore_errors=True)
+        self.addCleanup(local_cache._INDEX.clear)
+        local_cache._INDEX.clear()
+        return {local_cache: {'__opts__': {'cachedir': self.tmp_cache_dir,
+                                           'hash_type': 'sha256',
+                                           'keep_jobs': 1,
+                                           'job_cache_index': True}}}
+
+    def _save_job(self, fun):
+        jid = local_cache.prep_jid()
+        local_cache.save_load(jid, {'jid': jid, 'fun': fun, 'arg': [],
+                                    'tgt': '', 'tgt_type': 'glob', 'user': 'root'})
+        return jid
+
+    def test_index_is_built_from_existing_jobs(self):
+        with patch.dict(local_cache.__opts__, {'job_cache_index': False}):
+            jid = self._save_job('test.ping')
+        # Jobs are listed from the job cache until the index is built
+        self.assertIn(jid, local_cache.get_jids())
+        self.assertIsNone(local_cache._ready_index())
+        conn = local_cache._index()
+        self.assertEqual(conn.execute('SELECT jid FROM jobs').fetchall(), [])
+        local_cache.clean_old_jobs()
+        self.assertIs(local_cache._ready_index(), conn)
+        self.assertEqual(conn.execute('SELECT jid FROM jobs').fetchall(), [(jid,)])
+
+    def test_endtime_of_an_unindexed_job(self):
+        local_cache.clean_old_jobs()
+        local_cache.update_endtime('20191017000000000000', '2019, Oct 17 00:00:01.000000')
+        conn = local_cache._ready_index()
+        self.assertEqual(conn.execute('SELECT jid, endtime FROM jobs').fetchall(),
+                         [('20191017000000000000', '2019, Oct 17 00:00:01.000000')])
+
+    def test_get_jids_filter_uses_index(self):
+        jids = [self._save_job(fun) for fun in
+                ('test.ping', 'saltutil.find_job', 'state.apply', 'test.arg')]
+        local_cache.clean_old_jobs()
+        with patch.object(local_cache, '_walk_through', MagicMock()) as walk:
+            ret = local_cache.get_jids_filter(2)
+            self.assertEqual([job['JID'] for job in ret], [jids[2], jids[3]])
+            self.assertEqual(ret[0]['Function'], 'state.apply')
+            ret = local_cache.get_jids_filter(3, filter_find_job=False)
+            self.assertEqual([job['JID'] for job in ret], jids[1:])
+            self.assertEqual(sorted(local_cache.get_jids()), sorted(jids))
+            walk.assert_not_called()
+
+    def test_clean_old_jobs_uses_index(self):
+        old_jid = self._save_job('test.ping')
+        new_jid = self._save_job('test.ping')
+        conn = local_cache._index()
+        conn.execute('UPDATE jobs SET created = ? WHERE jid = ?',
+                     (time.time() - 7200, old_jid))
+        local_cache.clean_old_jobs()
+        self.assertEqual(sorted(local_cache.get_jids()), [new_jid])
+        self.assertFalse(os.path.exists(salt.utils.jid.jid_dir(
+            old_jid, os.path.join(self.tmp_cache_dir, 'jobs'), 'sha256')))
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class LocalCacheStreamTestCase(TestCase, LoaderModuleMockMixin):
+    '''
+    Tests for the state returns streamed by the minions
+    '''
+    def setup_loader_modules(self):
+        self.tmp_cache_dir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmp_cache_dir, ignore_errors=True)
+        return {local_cache: {'__opts__': {'cachedir': self.tmp_cache_dir,
+                                           'hash_type': 'sha256',
+                                           'keep_jobs': 1,
+                                           'job_cache_index': False}}}
+
+    def test_get_jid_merges_stream(self):
+        jid = local_cache.prep_jid()
+        ok = {'result': True, 'changes': {}, '__run_num__': 0}
+        failed = {'result': False, 'changes': {}, '__run_num__': 1}
+        local_cache.save_stream({'id': 'minion', 'jid': jid, 'stream': 'abc', 'seq': 0,
+                                 'return': {'ok': ok}})
+        local_cache.save_stream({'id': 'minion', 'jid': jid, 'stream': 'abc', 'seq': 1,
+                                 'return': {'failed': failed}})
+        # Another state run of the same job does not overwrite the frames
+        self.assertTrue(local_cache.save_stream({'id': 'minion', 'jid': jid, 'stream': 'def', 'seq': 0,
+                                                 'return': {'other': ok}}))
+        local_cache.returner({'id': 'minion', 'jid': jid, 'retcode': 2,
+                              'return': {'failed': failed},
+                              'stream': {'stream': 'abc', 'frames': 2, 'states': 1}})
+        self.assertEqual(local_cache.get_jid(jid),
+                         {'minion': {'return': {'ok': ok, 'failed': failed},
+                                     'retcode': 2}})
+        # Frames of unknown jobs are not stored
+        self.assertFalse(local_cache.save_stream({'id': 'minion', 'jid': '20190101000000000000',
+                                                  'stream': 'abc', 'seq': 0, 'return': {'ok': ok}}))
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+'''
+unit tests for the metrics runner
+'''
+
+# Import Python Libs
+from __future__ import absolute_import, print_function, unicode_literals
+import shutil
+import tempfile
+
+# Import Salt Testing Libs
+from tests.support.mixins import LoaderModuleMockMixin
+from tests.support.unit import TestCase
+
+# Import Salt Libs
+import salt.runners.metrics as metrics
+import salt.utils.metrics
+
+
+class MetricsTest(TestCase, LoaderModuleMockMixin):
+    '''
+    Validate the metrics runner
+    '''
+    def setup_loader_modules(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cachedir, ignore_errors=True)
+        self.opts = {'cachedir': self.cachedir,
+                     'master_stats': True,
+                     'master_stats_event_iter': 60}
+        return {metrics: {'__opts__': self.opts}}
+
+    def setUp(self):
+        hist = salt.utils.metrics.Histogram()
+        hist.observe(0.003)
+        salt.utils.metrics.write_worker_stats(self.opts, 'MWorker-0', {'_pillar': hist}, 30, 60)
+
+    def test_workers(self):
+        ret = metrics.workers()
+        self.assertEqual(ret['busy'], {'MWorker-0': 0.5})
+        self.assertEqual(ret['busy_mean'], 0.5)
+        self.assertEqual(ret['commands']['_pillar']['count'], 1)
+        self.assertEqual(ret['commands']['_pillar']['max'], 0.003)
+
+    def test_prometheus(self):
+        ret = metrics.prometheus().splitlines()
+        self.assertIn('salt_master_request_seconds_bucket{cmd="_pillar",le="0.002"} 0', ret)
+        self.assertIn('salt_master_request_seconds_bucket{cmd="_pillar",le="0.004"} 1', ret)
+        self.assertIn('salt_master_request_seconds_count{cmd="_pillar"} 1', ret)
+        self.assertIn('salt_master_worker_busy_ratio{worker="MWorker-0"} 0.5', ret)
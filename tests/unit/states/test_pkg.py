@@ -15,6 +15,7 @@ from tests.support.mock import (
 # Import Salt Libs
 from salt.ext import six
 import salt.states.pkg as pkg
+import salt.utils.state
 from salt.ext.six.moves import zip
 
 
@@ -235,3 +236,114 @@ class PkgTestCase(TestCase, LoaderModuleMockMixin):
         for installed_versions, operator, version, expected_result in test_parameters:
             msg = "installed_versions: {}, operator: {}, version: {}, expected_result: {}".format(installed_versions, operator, version, expected_result)
             self.assertEqual(expected_result, pkg._fulfills_version_spec(installed_versions, operator, version), msg)
+
+    def test_batch(self):
+        '''
+        Test running pkg states as one batch
+        '''
+        lowstate = [
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'a', 'name': 'pkga', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'b', 'name': 'b', 'pkgs': ['pkgb', 'pkgc'],
+             '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'c', 'name': 'pkgd', '__env__': 'base',
+             'require': [{'file': 'foo'}]},
+            {'state': 'pkg', 'fun': 'installed', '__id__': 'd', 'name': 'pkge', '__env__': 'base'},
+        ]
+        uninstall = MagicMock(return_value={'name': 'pkga',
+                                            'changes': dict((name, {'old': ver['old'], 'new': ''})
+                                                            for name, ver in six.iteritems(self.pkgs)),
+                                            'result': True,
+                                            'comment': 'Removed'})
+        with patch.dict(pkg.__opts__, {'test': False, 'state_pkg_batch': True}), \
+                patch.dict(pkg.__utils__, {'state.gen_tag': salt.utils.state.gen_tag}), \
+                patch.object(pkg, '_uninstall', uninstall), \
+                patch.object(pkg, '__lowstate__', lowstate, create=True), \
+                patch.object(pkg, '__instance_id__', '1', create=True), \
+                patch.object(pkg, '__env__', 'base', create=True):
+            with patch.object(pkg, '__low__', lowstate[1], create=True):
+                ret = pkg.removed('b', pkgs=['pkgb', 'pkgc'])
+            self.assertEqual(ret['name'], 'b')
+            self.assertEqual(sorted(ret['changes']), ['pkgb', 'pkgc'])
+            self.assertTrue(ret['comment'].startswith('Run in a batch of 2 pkg.removed states.'))
+            with patch.object(pkg, '__low__', lowstate[0], create=True):
+                ret = pkg.removed('pkga')
+            self.assertEqual(ret['name'], 'pkga')
+            self.assertEqual(list(ret['changes']), ['pkga'])
+            uninstall.assert_called_once()
+            self.assertEqual(uninstall.call_args[1]['pkgs'], ['pkga', 'pkgb', 'pkgc'])
+
+            # States using requisites run on their own
+            with patch.object(pkg, '__low__', lowstate[2], create=True):
+                pkg.removed('pkgd')
+            self.assertEqual(uninstall.call_count, 2)
+            self.assertEqual(uninstall.call_args[1]['name'], 'pkgd')
+
+    def test_batch_concurrency(self):
+        '''
+        Test that no batch is run when the states run concurrently
+        '''
+        lowstate = [
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'a', 'name': 'pkga', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'b', 'name': 'pkgb', '__env__': 'base'},
+        ]
+        uninstall = MagicMock(return_value={'name': 'pkga', 'changes': {}, 'result': True,
+                                            'comment': 'Removed'})
+        with patch.dict(pkg.__opts__, {'test': False, 'state_pkg_batch': True,
+                                       'state_concurrency': 4}), \
+                patch.dict(pkg.__utils__, {'state.gen_tag': salt.utils.state.gen_tag}), \
+                patch('salt.utils.platform.is_windows', MagicMock(return_value=False)), \
+                patch.object(pkg, '_uninstall', uninstall), \
+                patch.object(pkg, '__lowstate__', lowstate, create=True), \
+                patch.object(pkg, '__instance_id__', '3', create=True), \
+                patch.object(pkg, '__env__', 'base', create=True), \
+                patch.object(pkg, '__low__', lowstate[0], create=True):
+            pkg.removed('pkga')
+            self.assertIsNone(uninstall.call_args[1]['pkgs'])
+
+    def test_batch_plan(self):
+        '''
+        Test that only pkg states following each other are batched
+        '''
+        lowstate = [
+            {'state': 'pkg', 'fun': 'installed', '__id__': 'a', 'name': 'pkga', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'installed', '__id__': 'b', 'name': 'pkgb', '__env__': 'base'},
+            {'state': 'pkgrepo', 'fun': 'managed', '__id__': 'repo', 'name': 'repo', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'installed', '__id__': 'c', 'name': 'pkgc', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'd', 'name': 'pkgd', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'installed', '__id__': 'e', 'name': 'pkge', '__env__': 'base'},
+        ]
+        with patch.dict(pkg.__utils__, {'state.gen_tag': salt.utils.state.gen_tag}):
+            plan = pkg._plan_batches(lowstate)
+        self.assertEqual(sorted(tag.split('_|-')[1] for tag in plan), ['a', 'b'])
+        self.assertEqual(list(plan['pkg_|-a_|-pkga_|-installed']['members'].values()),
+                         [['pkga'], ['pkgb']])
+
+    def test_batch_failure(self):
+        '''
+        Test that the states of a failed batch report their own result
+        '''
+        lowstate = [
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'a', 'name': 'pkga', '__env__': 'base'},
+            {'state': 'pkg', 'fun': 'removed', '__id__': 'b', 'name': 'pkgb', '__env__': 'base'},
+        ]
+        uninstall = MagicMock(side_effect=[
+            {'name': 'pkga', 'changes': {'pkga': {'old': '1.0', 'new': ''}},
+             'result': False, 'comment': 'Failed to remove pkgb'},
+            {'name': 'pkgb', 'changes': {}, 'result': False,
+             'comment': 'Failed to remove pkgb'}])
+        with patch.dict(pkg.__opts__, {'test': False, 'state_pkg_batch': True}), \
+                patch.dict(pkg.__utils__, {'state.gen_tag': salt.utils.state.gen_tag}), \
+                patch.object(pkg, '_uninstall', uninstall), \
+                patch.object(pkg, '__lowstate__', lowstate, create=True), \
+                patch.object(pkg, '__instance_id__', '2', create=True), \
+                patch.object(pkg, '__env__', 'base', create=True):
+            with patch.object(pkg, '__low__', lowstate[0], create=True):
+                ret = pkg.removed('pkga')
+            self.assertTrue(ret['result'])
+            self.assertEqual(list(ret['changes']), ['pkga'])
+            with patch.object(pkg, '__low__', lowstate[1], create=True):
+                ret = pkg.removed('pkgb')
+            self.assertFalse(ret['result'])
+            self.assertEqual(uninstall.call_count, 2)
+            self.assertEqual(uninstall.call_args[1]['name'], 'pkgb')
+            self.assertIsNone(uninstall.call_args[1]['pkgs'])
@@ -2,6 +2,7 @@
 
 # python libs
 from __future__ import absolute_import
+import base64
 import os
 import tempfile
 import shutil
@@ -39,6 +40,8 @@ if not HAS_PYCRYPTO_RSA:
         HAS_PYCRYPTO_RSA = True
     except ImportError:
         HAS_PYCRYPTO_RSA = False
+if salt.crypt.HAS_ED25519:
+    from cryptography.hazmat.primitives import serialization
 
 
 PRIVKEY_DATA = (
@@ -159,6 +162,14 @@ class CryptTestCase(TestCase):
         with patch('salt.utils.files.fopen', mock_open(read_data=PUBKEY_DATA)):
             self.assertTrue(crypt.verify_signature('/keydir/keyname.pub', MSG, SIG))
 
+    def test_busy_retry_after(self):
+        opts = {'auth_retry_after_max': 60}
+        self.assertEqual(crypt._busy_retry_after(opts, {'retry_after': 2.5}), 2.5)
+        # The hint comes in a clear reply
+        self.assertEqual(crypt._busy_retry_after(opts, {'retry_after': 3600}), 60)
+        for retry_after in (None, '10', True, -1, 0):
+            self.assertIsNone(crypt._busy_retry_after(opts, {'retry_after': retry_after}))
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 @skipIf(not HAS_M2, 'm2crypto is not available')
@@ -313,3 +324,84 @@ class TestM2CryptoRegression47124(TestCase):
         with patch('salt.crypt.get_rsa_key', return_value=key):
             signature = salt.crypt.sign_message('/keydir/keyname.pem', message, passphrase='password')
         self.assertEqual(signature, self.SIGNATURE)
+
+
+class CrypticleTestCase(TestCase):
+    '''
+    Test the session key encryption
+    '''
+    def setUp(self):
+        self.key = salt.crypt.Crypticle.generate_key_string()
+
+    def test_cbc(self):
+        crypticle = salt.crypt.Crypticle({}, self.key)
+        self.assertEqual(crypticle.loads(crypticle.dumps({'fun': 'test.ping'})),
+                         {'fun': 'test.ping'})
+        data = crypticle.dumps({'fun': 'test.ping'})
+        data = data[:-1] + six.int2byte(six.indexbytes(data, -1) ^ 1)
+        self.assertRaises(salt.crypt.AuthenticationError, crypticle.loads, data)
+
+    @skipIf(not salt.crypt.AEAD_CIPHERS, 'pycryptodome is not available')
+    def test_aead(self):
+        for cipher in salt.crypt.AEAD_CIPHERS:
+            crypticle = salt.crypt.Crypticle({}, self.key, cipher=cipher)
+            data = crypticle.dumps({'fun': 'test.ping'})
+            self.assertEqual(crypticle.loads(data), {'fun': 'test.ping'})
+            self.assertEqual(crypticle.decrypt(crypticle.encrypt(b'salt')), b'salt')
+            # A crypticle of the same key decrypts the cipher it is told
+            other = salt.crypt.Crypticle({}, self.key)
+            self.assertEqual(other.loads(data, cipher=cipher), {'fun': 'test.ping'})
+            self.assertRaises(salt.crypt.AuthenticationError, other.loads, data)
+            tampered = data[:-1] + six.int2byte(six.indexbytes(data, -1) ^ 1)
+            self.assertRaises(salt.crypt.AuthenticationError, crypticle.loads, tampered)
+            self.assertRaises(salt.crypt.AuthenticationError, crypticle.loads, data[:20])
+        self.assertRaises(salt.crypt.AuthenticationError,
+                          salt.crypt.Crypticle({}, self.key).loads, data, cipher='rot13')
+
+    def test_pick_session_cipher(self):
+        opts = {'session_ciphers': ['chacha20-poly1305', 'aes-gcm']}
+        with patch('salt.crypt.AEAD_CIPHERS', ['aes-gcm', 'chacha20-poly1305']):
+            self.assertEqual(salt.crypt.pick_session_cipher(opts, ['aes-gcm', 'chacha20-poly1305']),
+                             'chacha20-poly1305')
+            self.assertEqual(salt.crypt.pick_session_cipher(opts, ['aes-gcm']), 'aes-gcm')
+            self.assertEqual(salt.crypt.pick_session_cipher(opts, None), 'cbc')
+            self.assertEqual(salt.crypt.pick_session_cipher({'session_ciphers': []}, ['aes-gcm']), 'cbc')
+        with patch('salt.crypt.AEAD_CIPHERS', ['aes-gcm']):
+            self.assertEqual(salt.crypt.pick_session_cipher(opts, ['chacha20-poly1305']), 'cbc')
+            self.assertEqual(salt.crypt.publish_cipher({'publish_cipher': 'chacha20-poly1305'}), 'cbc')
+            self.assertEqual(salt.crypt.publish_cipher({'publish_cipher': 'aes-gcm'}), 'aes-gcm')
+
+
+class PublishSignerTestCase(TestCase):
+    '''
+    Test signing the publications
+    '''
+    def setUp(self):
+        self.pki_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pki_dir)
+        self.addCleanup(salt.crypt.PublishSigner.instances.clear)
+
+    @skipIf(not salt.crypt.HAS_ED25519, 'cryptography is not available')
+    def test_ed25519(self):
+        opts = {'pki_dir': self.pki_dir, 'publish_signing_algorithm': 'ed25519'}
+        salt.crypt.gen_ed25519_keys(self.pki_dir, 'master_ed25519')
+        signer = salt.crypt.PublishSigner.get(opts)
+        self.assertIs(salt.crypt.PublishSigner.get(opts), signer)
+        self.assertEqual(signer.algorithm, 'ed25519')
+        pub = base64.b64encode(signer.key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw))
+        sig = signer.sign(b'load')
+        self.assertTrue(salt.crypt.verify_ed25519(pub, b'load', sig))
+        self.assertFalse(salt.crypt.verify_ed25519(pub, b'other load', sig))
+        self.assertFalse(salt.crypt.verify_ed25519(None, b'load', sig))
+
+    def test_cached_pub_key(self):
+        path = os.path.join(self.pki_dir, 'minion_master.pub')
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('key')
+        with patch('salt.crypt.get_rsa_pub_key', MagicMock(side_effect=[1, 2])) as get_key:
+            self.assertEqual(salt.crypt.get_cached_rsa_pub_key(path), 1)
+            self.assertEqual(salt.crypt.get_cached_rsa_pub_key(path), 1)
+            self.assertEqual(get_key.call_count, 1)
+            os.utime(path, (0, 0))
+            self.assertEqual(salt.crypt.get_cached_rsa_pub_key(path), 2)
@@ -13,6 +13,7 @@ import os
 import shutil
 import tempfile
 import textwrap
+import time
 
 # Import Salt Testing libs
 from tests.support.runtests import RUNTIME_VARS
@@ -127,6 +128,40 @@ class PillarTestCase(TestCase):
                                                      'fake_pillar',
                                                      arg='foo')
 
+    def test_parallel_ext_pillar(self):
+        opts = {
+            'optimization_order': [0, 1, 2],
+            'renderer': 'json',
+            'renderer_blacklist': [],
+            'renderer_whitelist': [],
+            'state_top': '',
+            'pillar_roots': {'base': []},
+            'file_roots': {'base': []},
+            'extension_modules': '',
+            'ext_pillar': [{'first': 'one'}, {'second': 'two'}, {'hang': 'three'}],
+            'ext_pillar_parallel': True,
+            'ext_pillar_timeout': {'hang': 0.2},
+        }
+
+        def _ext_pillar(ret, delay):
+            def _func(minion_id, pillar, arg):  # pylint: disable=unused-argument
+                time.sleep(delay)
+                pillar['modified'] = True
+                return dict(ret, arg=arg)
+            return _func
+
+        ext_pillars = {'first': _ext_pillar({'first': True, 'last': 'first'}, 0.5),
+                       'second': _ext_pillar({'second': True, 'last': 'second'}, 0.5),
+                       'hang': _ext_pillar({'last': 'hang'}, 5)}
+        with patch('salt.loader.pillars', MagicMock(return_value=ext_pillars)):
+            pillar = salt.pillar.Pillar(opts, {}, 'mocked-minion', 'base')
+        start = time.time()
+        ret, errors = pillar.ext_pillar({'sls': True})
+        self.assertLess(time.time() - start, 0.9)
+        self.assertEqual(ret, {'sls': True, 'first': True, 'second': True,
+                               'last': 'second', 'arg': 'two'})
+        self.assertEqual(errors, ['Failed to load ext_pillar hang: timed out after 0.2 seconds'])
+
     def test_ext_pillar_no_extra_minion_data_val_list(self):
         opts = {
             'optimization_order': [0, 1, 2],
@@ -960,6 +995,61 @@ sub_with_slashes:
         self.assertEqual(compiled_pillar['found'], 'my precious')
         self.assertEqual(compiled_pillar['mojo'], "bad risin'")
 
+    @with_tempdir()
+    def test_render_cache(self, tempdir):
+        files = {
+            'top.sls': "base:\n  '*':\n    - common\n    - templated\n    - declared\n",
+            'common.sls': 'ports: [80, 443]\n',
+            'templated.sls': 'os: {{ grains["os"] }}\n',
+            'declared.sls': 'users: {{ ["alice", "bob"] }}\n',
+        }
+        for name, content in files.items():
+            with fopen(os.path.join(tempdir, name), 'w') as fp_:
+                fp_.write(content)
+        opts = {
+            'optimization_order': [0, 1, 2],
+            'renderer': 'jinja|yaml',
+            'renderer_blacklist': [],
+            'renderer_whitelist': [],
+            'state_top': 'top.sls',
+            'pillar_roots': {'base': [tempdir]},
+            'extension_modules': '',
+            'saltenv': 'base',
+            'file_roots': [],
+            'file_ignore_regex': None,
+            'file_ignore_glob': None,
+            'pillar_render_cache': True,
+            'pillar_render_cache_static': ['decl*'],
+        }
+        rendered = []
+        compile_template = salt.pillar.compile_template
+
+        def _compile_template(template, *args, **kwargs):
+            rendered.append(os.path.basename(template))
+            return compile_template(template, *args, **kwargs)
+
+        with patch('salt.pillar._RENDER_CACHE', None), \
+                patch.object(salt.pillar, 'compile_template', _compile_template):
+            for minion_id, os_ in (('minion1', 'Ubuntu'), ('minion2', 'CentOS')):
+                pillar = salt.pillar.Pillar(opts, {'os': os_}, minion_id, 'base')
+                pillar.matchers['confirm_top.confirm_top'] = lambda *x, **y: True
+                compiled = pillar.compile_pillar()
+                self.assertEqual(compiled, {'ports': [80, 443],
+                                            'os': os_,
+                                            'users': ['alice', 'bob']})
+                # The cached data must not leak changes made by the caller
+                compiled['ports'].append(8080)
+            self.assertEqual(sorted(rendered),
+                             ['common.sls', 'declared.sls', 'templated.sls',
+                              'templated.sls', 'top.sls', 'top.sls'])
+
+            # Editing a file invalidates its cached render
+            with fopen(os.path.join(tempdir, 'common.sls'), 'w') as fp_:
+                fp_.write('ports: [22]\n')
+            pillar = salt.pillar.Pillar(opts, {'os': 'Ubuntu'}, 'minion3', 'base')
+            pillar.matchers['confirm_top.confirm_top'] = lambda *x, **y: True
+            self.assertEqual(pillar.compile_pillar()['ports'], [22])
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 @patch('salt.transport.client.ReqChannel.factory', MagicMock())
@@ -1130,3 +1220,75 @@ class AsyncRemotePillarTestCase(TestCase):
              'pillar_override': {},
              'extra_minion_data': {'path_to_add': 'fake_data'}},
             dictkey='pillar')
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class PillarCacheFingerprintTestCase(TestCase):
+    '''
+    Tests for the fingerprint based invalidation of salt.pillar.PillarCache
+    '''
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp(dir=RUNTIME_VARS.TMP)
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.root = os.path.join(self.tmpdir, 'pillar')
+        os.makedirs(self.root)
+        os.makedirs(os.path.join(self.tmpdir, 'pillar_cache'))
+        self.sls = os.path.join(self.root, 'foo.sls')
+        with fopen(self.sls, 'w') as fp_:
+            fp_.write('foo: bar\n')
+        self.opts = {'cachedir': self.tmpdir,
+                     'pillar_roots': {'base': [self.root]},
+                     'pillar_cache_backend': 'disk',
+                     'pillar_cache_ttl': 0,
+                     'pillar_cache_fingerprint': True,
+                     'pillar_cache_ext_pillar': [],
+                     'ext_pillar': []}
+        self.grains = {'os': 'Fedora'}
+
+    def _compile(self, **kwargs):
+        cache = salt.pillar.PillarCache(self.opts,
+                                        kwargs.get('grains', self.grains),
+                                        'minion', 'base')
+        with patch.object(cache, 'fetch_pillar', MagicMock(return_value={'foo': 'bar'})) as fetch:
+            self.assertEqual(cache.compile_pillar(), {'foo': 'bar'})
+        return fetch.called
+
+    def test_invalidation(self):
+        self.assertTrue(self._compile())
+        self.assertFalse(self._compile())
+        # Other grains
+        self.assertTrue(self._compile(grains={'os': 'Debian'}))
+        self.assertFalse(self._compile(grains={'os': 'Debian'}))
+        # Same content with a new mtime
+        stat = os.stat(self.sls)
+        os.utime(self.sls, (stat.st_atime, stat.st_mtime + 10))
+        self.assertFalse(self._compile(grains={'os': 'Debian'}))
+        # New content
+        with fopen(self.sls, 'w') as fp_:
+            fp_.write('foo: baz\n')
+        self.assertTrue(self._compile(grains={'os': 'Debian'}))
+        # New file
+        with fopen(os.path.join(self.root, 'new.sls'), 'w') as fp_:
+            fp_.write('new: file\n')
+        self.assertTrue(self._compile(grains={'os': 'Debian'}))
+        self.assertFalse(self._compile(grains={'os': 'Debian'}))
+
+    def test_ext_pillar_cacheable(self):
+        self.opts['ext_pillar'] = [{'file_tree': {'root_dir': '/srv/ext'}}]
+        self.assertTrue(self._compile())
+        self.assertTrue(self._compile())
+        self.opts['pillar_cache_ext_pillar'] = ['file_tree']
+        self.assertTrue(self._compile())
+        self.assertFalse(self._compile())
+
+    def test_changed_while_compiling(self):
+        def _fetch():
+            with fopen(self.sls, 'w') as fp_:
+                fp_.write('foo: changed\n')
+            return {'foo': 'bar'}
+        cache = salt.pillar.PillarCache(self.opts, self.grains, 'minion', 'base')
+        with patch.object(cache, 'fetch_pillar', MagicMock(side_effect=_fetch)):
+            self.assertEqual(cache.compile_pillar(), {'foo': 'bar'})
+        # The pillar compiled from the old file was not cached
+        self.assertTrue(self._compile())
+        self.assertFalse(self._compile())
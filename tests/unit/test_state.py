@@ -5,9 +5,11 @@
 
 # Import Python libs
 from __future__ import absolute_import, print_function, unicode_literals
+import copy
 import os
 import shutil
 import tempfile
+import time
 
 # Import Salt Testing libs
 import tests.integration as integration
@@ -23,6 +25,8 @@ from tests.support.runtests import RUNTIME_VARS
 # Import Salt libs
 import salt.exceptions
 import salt.state
+import salt.utils.files
+import salt.utils.platform
 from salt.utils.odict import OrderedDict
 from salt.utils.decorators import state as statedecorators
 
@@ -129,6 +133,278 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             run_num = ret['test_|-step_one_|-step_one_|-succeed_with_changes']['__run_num__']
             self.assertEqual(run_num, 0)
 
+    def test_requisite_index(self):
+        '''
+        Test that the requisite index resolves requisites the way scanning
+        the chunks with fnmatch does
+        '''
+        chunks = [
+            {'state': 'pkg', 'fun': 'installed', 'name': 'nginx', '__id__': 'nginx', '__sls__': 'web.nginx'},
+            {'state': 'file', 'fun': 'managed', 'name': '/etc/nginx/nginx.conf',
+             '__id__': 'nginx_conf', '__sls__': 'web.nginx'},
+            {'state': 'service', 'fun': 'running', 'name': 'nginx', '__id__': 'nginx_svc', '__sls__': 'web.nginx'},
+            {'state': 'pkg', 'fun': 'installed', 'name': 'postgresql', '__id__': 'db', '__sls__': 'db'},
+        ]
+        index = salt.state.RequisiteIndex(chunks)
+        self.assertEqual(index.lookup('id', 'nginx'), [chunks[0], chunks[2]])
+        self.assertEqual(index.lookup('pkg', 'nginx'), [chunks[0]])
+        self.assertEqual(index.lookup('file', '/etc/nginx/*'), [chunks[1]])
+        self.assertEqual(index.lookup('id', 'nginx*'), chunks[:3])
+        self.assertEqual(index.lookup('sls', 'web.*'), chunks[:3])
+        self.assertEqual(index.lookup('pkg', 'db'), [chunks[3]])
+        self.assertEqual(index.lookup('service', 'db'), [])
+        self.assertEqual(index.lookup('id', None), [])
+        with self.assertRaises(salt.exceptions.SaltRenderError):
+            index.lookup('file', {'test1': 'test'})
+        self.assertTrue(index.current(chunks))
+        self.assertFalse(index.current(list(chunks)))
+
+    @skipIf(salt.utils.platform.is_windows(), 'Concurrent state runs are not supported on Windows')
+    def test_call_high_concurrent(self):
+        '''
+        Test that independent states run concurrently while requisites,
+        order and failhard are respected
+        '''
+        def _state(state, fun, *args, **kwargs):
+            body = [fun] + [{key: val} for key, val in kwargs.items()]
+            return {state: body + list(args), '__sls__': 'concurrent', '__env__': 'base'}
+
+        high_data = OrderedDict([
+            ('first', _state('test', 'succeed_with_changes', order=1)),
+            ('sleep1', _state('cmd', 'run', name='sleep 1', shell='/bin/sh')),
+            ('sleep2', _state('cmd', 'run', name='sleep 1', shell='/bin/sh')),
+            ('sleep3', _state('cmd', 'run', name='sleep 1', shell='/bin/sh')),
+            ('after', _state('test', 'succeed_without_changes',
+                             watch=[{'cmd': 'sleep1'}, {'cmd': 'sleep2'}])),
+            ('fail', _state('test', 'fail_without_changes', require=[{'cmd': 'sleep3'}])),
+            ('onfail', _state('test', 'succeed_with_changes', onfail=[{'test': 'fail'}])),
+            ('dep_fail', _state('test', 'succeed_with_changes', require=[{'test': 'fail'}])),
+        ])
+        minion_opts = self.get_temp_config('minion')
+        minion_opts['state_concurrency'] = 4
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+            start = time.time()
+            ret = state_obj.call_high(copy.deepcopy(high_data))
+            self.assertLess(time.time() - start, 2.5)
+        ret = dict((tag.split('_|-')[1], data) for tag, data in ret.items())
+        self.assertEqual(sorted(data['__run_num__'] for data in ret.values()), list(range(8)))
+        self.assertEqual(ret['first']['__run_num__'], 0)
+        for id_ in ('sleep1', 'sleep2'):
+            self.assertLess(ret[id_]['__run_num__'], ret['after']['__run_num__'])
+        self.assertEqual(ret['after']['comment'], 'Watch statement fired.')
+        self.assertFalse(ret['fail']['result'])
+        self.assertTrue(ret['onfail']['result'])
+        self.assertEqual(ret['dep_fail']['comment'], 'One or more requisite failed: concurrent.fail')
+
+        high_data['fail']['test'].append({'failhard': True})
+        with patch('salt.state.State._gather_pillar'):
+            ret = salt.state.State(minion_opts).call_high(copy.deepcopy(high_data))
+        ids = set(tag.split('_|-')[1] for tag in ret)
+        self.assertIn('fail', ids)
+        self.assertNotIn('onfail', ids)
+        self.assertNotIn('dep_fail', ids)
+
+    def test_call_high_incremental(self):
+        '''
+        Test that incremental runs skip the states whose inputs did not change
+        '''
+        high_data = OrderedDict([
+            ('unchanged', {'test': ['succeed_without_changes'],
+                           '__sls__': 'incremental', '__env__': 'base'}),
+            ('modified', {'test': ['succeed_with_changes', {'order': 1}],
+                          '__sls__': 'incremental', '__env__': 'base'}),
+            ('watcher', {'test': ['succeed_without_changes', {'watch': [{'test': 'modified'}]}],
+                         '__sls__': 'incremental', '__env__': 'base'}),
+            ('command', {'cmd': ['run', {'name': 'true'}, {'shell': '/bin/sh'}],
+                         '__sls__': 'incremental', '__env__': 'base'}),
+        ])
+        minion_opts = self.get_temp_config('minion')
+
+        def _run(high):
+            with patch('salt.state.State._gather_pillar'):
+                state_obj = salt.state.State(minion_opts)
+                state_obj.load_incremental()
+                ret = state_obj.call_high(copy.deepcopy(high))
+                state_obj.save_incremental(ret)
+            return dict((tag.split('_|-')[1], data) for tag, data in ret.items())
+
+        ret = _run(high_data)
+        self.assertFalse(any('__incremental__' in data for data in ret.values()))
+
+        ret = _run(high_data)
+        self.assertTrue(ret['unchanged'].get('__incremental__'))
+        self.assertTrue(ret['modified'].get('__incremental__'))
+        self.assertTrue(ret['watcher'].get('__incremental__'))
+        # cmd states opt out
+        self.assertNotIn('__incremental__', ret['command'])
+
+        high_data['modified']['test'].append({'comment': 'new'})
+        ret = _run(high_data)
+        self.assertTrue(ret['unchanged'].get('__incremental__'))
+        self.assertNotIn('__incremental__', ret['modified'])
+        self.assertEqual(ret['watcher']['comment'], 'Watch statement fired.')
+
+        # A new state shifts the order given to the others
+        high_data = OrderedDict([('added', {'test': ['succeed_without_changes', {'order': 10000}],
+                                            '__sls__': 'incremental', '__env__': 'base'})] +
+                                list(high_data.items()))
+        ret = _run(high_data)
+        self.assertNotIn('__incremental__', ret['added'])
+        self.assertTrue(ret['unchanged'].get('__incremental__'))
+
+    def test_incremental_upstream(self):
+        '''
+        Test that states checking upstream are never skipped by incremental
+        runs
+        '''
+        import salt.states.file
+        import salt.states.pkg
+        low = {'__id__': 'foo', '__sls__': 'incremental', '__env__': 'base'}
+        minion_opts = self.get_temp_config('minion')
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+        state_obj.incremental = {}
+        with patch.object(state_obj, 'states', {'pkg.latest': salt.states.pkg.latest,
+                                                'file.managed': salt.states.file.managed}):
+            self.assertIsNone(state_obj._incremental_record(
+                dict(low, state='pkg', fun='latest', name='vim')))
+            managed = dict(low, state='file', fun='managed', name='/tmp/foo',
+                           source='https://example.com/foo')
+            self.assertIsNone(state_obj._incremental_record(managed))
+            managed['source_hash'] = 'https://example.com/foo.sha256'
+            self.assertIsNone(state_obj._incremental_record(managed))
+            managed['source_hash'] = 'sha256=' + 'a' * 64
+            self.assertIsNotNone(state_obj._incremental_record(managed))
+
+    def test_call_high_profile(self):
+        '''
+        Test that profiled runs return the phases of each state and fire the
+        steps of the run
+        '''
+        high_data = OrderedDict([
+            ('first', {'test': ['succeed_with_changes'],
+                       '__sls__': 'profile', '__env__': 'base'}),
+            ('second', {'test': ['succeed_without_changes',
+                                 {'onlyif': 'true'},
+                                 {'watch': [{'test': 'first'}]}],
+                        '__sls__': 'profile', '__env__': 'base'}),
+        ])
+        minion_opts = self.get_temp_config('minion')
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+            ret = state_obj.call_high(copy.deepcopy(high_data))
+        self.assertNotIn('__profile__', ret)
+
+        minion_opts['state_profile'] = True
+        with patch('salt.state.State._gather_pillar'), \
+                patch('salt.state.State._fire_profile') as fire_profile:
+            state_obj = salt.state.State(minion_opts)
+            ret = state_obj.call_high(copy.deepcopy(high_data))
+        self.assertEqual(sorted(fire_profile.call_args[0][0]), ['compile', 'execute'])
+        self.assertEqual(len(ret), 2)
+        ret = dict((tag.split('_|-')[1], data) for tag, data in ret.items())
+        self.assertEqual(sorted(ret['first']['__profile__']),
+                         ['call', 'event', 'requisites'])
+        # The mod_watch call counts for the watching state
+        self.assertEqual(ret['second']['comment'], 'Watch statement fired.')
+        self.assertEqual(sorted(ret['second']['__profile__']),
+                         ['call', 'checks', 'event', 'requisites'])
+        self.assertEqual(state_obj.profiles, {})
+
+    def test_call_high_stream(self):
+        '''
+        Test that the chunk returns are streamed to the master in frames and
+        that the return only holds a summary of them
+        '''
+        high_data = OrderedDict([
+            ('first', {'test': ['succeed_with_changes'],
+                       '__sls__': 'stream', '__env__': 'base'}),
+            ('second', {'test': ['succeed_without_changes'],
+                        '__sls__': 'stream', '__env__': 'base'}),
+            ('third', {'test': ['fail_without_changes'],
+                       '__sls__': 'stream', '__env__': 'base'}),
+        ])
+        minion_opts = self.get_temp_config('minion')
+        minion_opts.update({'state_stream': True,
+                            'state_stream_batch': 2,
+                            'master_uri': 'tcp://127.0.0.1:4506'})
+        channel = MagicMock()
+        channel.send.return_value = True
+        sauth = MagicMock()
+        with patch('salt.state.State._gather_pillar'), \
+                patch('salt.transport.client.ReqChannel.factory', MagicMock(return_value=channel)), \
+                patch('salt.crypt.SAuth', sauth):
+            state_obj = salt.state.State(minion_opts, jid='20190101000000000000')
+            ret = state_obj.call_high(copy.deepcopy(high_data))
+        frames = [call[0][0] for call in channel.send.call_args_list]
+        self.assertEqual([(frame['cmd'], frame['stream'], frame['seq'], len(frame['return']))
+                          for frame in frames],
+                         [('_return_stream', state_obj.stream_id, 0, 2),
+                          ('_return_stream', state_obj.stream_id, 1, 1)])
+        self.assertNotIn('__saltfunc__', frames[0]['return']['test_|-first_|-first_|-succeed_with_changes'])
+        channel.close.assert_called_once_with()
+        # The token is made once for all of the frames
+        sauth.return_value.gen_token.assert_called_once_with(b'salt')
+
+        left, summary = state_obj.stream_summary(ret)
+        self.assertEqual(list(left), ['test_|-third_|-third_|-fail_without_changes'])
+        self.assertEqual(summary['states'], 2)
+        self.assertEqual(summary['changed'], 1)
+        self.assertEqual(summary['frames'], 2)
+        self.assertEqual(summary['stream'], state_obj.stream_id)
+
+        # A frame which failed or which the master did not store sends the
+        # whole return at the end of the run
+        for reply in (Exception('timed out'), False, {}):
+            channel.reset_mock()
+            channel.send.side_effect = reply if isinstance(reply, Exception) else None
+            channel.send.return_value = reply
+            with patch('salt.state.State._gather_pillar'), \
+                    patch('salt.transport.client.ReqChannel.factory', MagicMock(return_value=channel)), \
+                    patch('salt.crypt.SAuth', MagicMock()):
+                state_obj = salt.state.State(minion_opts, jid='20190101000000000001')
+                ret = state_obj.call_high(copy.deepcopy(high_data))
+            self.assertEqual(channel.send.call_count, 1)
+            self.assertEqual(state_obj.stream_summary(ret), (ret, None))
+
+    def test_call_high_compact_results(self):
+        '''
+        Test that the chunk returns are held compactly during the run and
+        handed back as plain dicts
+        '''
+        high_data = OrderedDict([
+            ('first', {'test': ['succeed_with_changes'],
+                       '__sls__': 'compact', '__env__': 'base'}),
+            ('second', {'test': ['succeed_without_changes', {'require': [{'test': 'first'}]}],
+                        '__sls__': 'compact', '__env__': 'base'}),
+        ])
+        minion_opts = self.get_temp_config('minion')
+        with patch('salt.state.State._gather_pillar'):
+            state_obj = salt.state.State(minion_opts)
+            ret = state_obj.call_high(high_data)
+        self.assertEqual(len(ret), 2)
+        for tag in ret:
+            self.assertIs(type(ret[tag]), dict)
+        self.assertTrue(ret['test_|-second_|-second_|-succeed_without_changes']['result'])
+        self.assertIsNone(state_obj.requisite_index)
+
+        result = salt.state.StateResult({'name': 'first', 'result': True,
+                                         'changes': {}, 'comment': '',
+                                         '__run_num__': 0, 'warnings': ['w']})
+        self.assertEqual(sorted(result), ['__run_num__', 'changes', 'comment',
+                                          'name', 'result', 'warnings'])
+        self.assertEqual(result['warnings'], ['w'])
+        self.assertEqual(result.get('duration', 'unset'), 'unset')
+        result['duration'] = 1.5
+        del result['comment']
+        self.assertNotIn('comment', result)
+        self.assertRaises(KeyError, result.__getitem__, 'comment')
+        self.assertEqual(result.copy(), {'name': 'first', 'result': True,
+                                         'changes': {}, '__run_num__': 0,
+                                         'duration': 1.5, 'warnings': ['w']})
+        self.assertEqual(copy.deepcopy(result), result.copy())
+
     def test_verify_onlyif_parse(self):
         low_data = {
             "onlyif": [
@@ -195,6 +471,45 @@ class StateCompilerTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
             return_result = state_obj._run_check_unless(low_data, '')
             self.assertEqual(expected_result, return_result)
 
+    def test_verify_builtin_checks(self):
+        '''
+        Test that the file, directory and which conditions are evaluated
+        without running commands and reused until a state changes
+        '''
+        tmp_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.addCleanup(shutil.rmtree, tmp_dir, ignore_errors=True)
+        path = os.path.join(tmp_dir, 'nginx.conf')
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('http {\n    stub_status;\n}\n')
+        low_data = {'name': 'nginx', 'state': 'test', '__id__': 'nginx',
+                    'fun': 'succeed_with_changes', '__env__': 'base',
+                    '__sls__': 'nginx',
+                    'onlyif': [{'directory': tmp_dir},
+                               {'which': 'sh'}],
+                    'unless': [{'file': path, 'regex': r'^\s*stub_status'}]}
+
+        with patch('salt.state.State._gather_pillar'):
+            minion_opts = self.get_temp_config('minion')
+            state_obj = salt.state.State(minion_opts)
+        state_obj.functions['cmd.retcode'] = MagicMock(side_effect=AssertionError)
+        self.assertEqual(state_obj._run_check_onlyif(low_data, {}),
+                         {'comment': 'onlyif condition is true', 'result': False})
+        self.assertEqual(state_obj._run_check_unless(low_data, {}),
+                         {'comment': 'unless condition is true', 'result': True, 'skip_watch': True})
+
+        # The result is reused until a state reports changes
+        with salt.utils.files.fopen(path, 'w') as fp_:
+            fp_.write('http {\n}\n')
+        self.assertTrue(state_obj._run_check_unless(low_data, {})['result'])
+        del low_data['unless']
+        state_obj.call(low_data)
+        self.assertEqual(state_obj._run_check_unless(
+            dict(low_data, unless=[{'file': path, 'regex': r'^\s*stub_status'}]), {}),
+            {'comment': 'unless condition is false', 'result': False})
+        self.assertEqual(state_obj._run_check_onlyif(
+            dict(low_data, onlyif={'file': os.path.join(tmp_dir, 'missing')}), {}),
+            {'comment': 'onlyif condition is false', 'result': True, 'skip_watch': True})
+
 
 class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
     def setUp(self):
@@ -293,6 +608,66 @@ class HighStateTestCase(TestCase, AdaptedConfigurationTestCaseMixin):
         ret = salt.state.find_sls_ids('issue-47182.stateA.newer', high)
         self.assertEqual(ret, [('somestuff', 'cmd')])
 
+    def test_render_highstate_cached(self):
+        files = {
+            'top.sls': "base:\n  '*':\n    - web\n",
+            'web.sls': '{% from "map.jinja" import port %}\nweb:\n  test.succeed_without_changes:\n    - name: {{ port }}\n',
+            'map.jinja': '{% set port = 80 %}\n',
+        }
+        for name, content in files.items():
+            with salt.utils.files.fopen(os.path.join(self.state_tree_dir, name), 'w') as fp_:
+                fp_.write(content)
+        render_highstate = self.highstate.render_highstate
+
+        def _render():
+            self.highstate.building_highstate = OrderedDict()
+            matches = self.highstate.top_matches(self.highstate.get_top())
+            with patch.object(self.highstate, 'render_highstate',
+                              MagicMock(side_effect=render_highstate)) as render:
+                high, errors = self.highstate.render_highstate_cached(matches)
+            self.assertEqual(errors, [])
+            return high['web']['test'][0]['name'], render.called
+
+        self.assertEqual(_render(), (80, True))
+        self.assertEqual(_render(), (80, False))
+
+        # Imported templates are tracked
+        with salt.utils.files.fopen(os.path.join(self.state_tree_dir, 'map.jinja'), 'w') as fp_:
+            fp_.write('{% set port = 8080 %}\n')
+        self.assertEqual(_render(), (8080, True))
+        self.assertEqual(_render(), (8080, False))
+
+        self.highstate.state.opts['pillar'] = {'new': 'value'}
+        self.assertEqual(_render(), (8080, True))
+
+    def test_render_state_includes(self):
+        '''
+        Test that shared includes are rendered once and merged in include
+        order, and that the extends of names are resolved
+        '''
+        files = {
+            'base.sls': 'base:\n  test.nop:\n    - name: base_name\n',
+            'a.sls': 'include:\n  - base\n  - b\na:\n  test.nop: []\n',
+            'b.sls': 'include:\n  - base\nb:\n  test.nop: []\n'
+                     'extend:\n  base_name:\n    test:\n      - comment: extended\n',
+        }
+        for name, content in files.items():
+            with salt.utils.files.fopen(os.path.join(self.state_tree_dir, name), 'w') as fp_:
+                fp_.write(content)
+        self.highstate.building_highstate = OrderedDict()
+        with patch('salt.state.compile_template', MagicMock(side_effect=salt.state.compile_template)) as render:
+            high, errors = self.highstate.render_highstate({'base': ['a']})
+        self.assertEqual(errors, [])
+        self.assertEqual(render.call_count, 3)
+        self.assertEqual([name for name in high if not name.startswith('__')], ['a', 'base', 'b'])
+        # The included files are ordered first
+        orders = dict((name, high[name]['test'][-1]['order']) for name in ('a', 'base', 'b'))
+        self.assertEqual(sorted(orders, key=orders.get), ['base', 'b', 'a'])
+
+        high, errors = self.highstate.state.reconcile_extend(high)
+        self.assertEqual(errors, [])
+        self.assertIn({'comment': 'extended'}, high['base']['test'])
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 @skipIf(pytest is None, 'PyTest is missing')
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for the master side of minion authentication
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import shutil
+import tempfile
+import time
+
+# Import Salt libs
+import salt.utils.files
+from salt.transport.mixins.auth import AuthAdmission, MinionKeyCache
+
+# Import Salt Testing libs
+from tests.support.unit import TestCase
+from tests.support.mock import MagicMock, patch
+
+
+class MinionKeyCacheTestCase(TestCase):
+    '''
+    TestCase for the accepted minion public keys kept in memory
+    '''
+    def setUp(self):
+        self.pki_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.pki_dir, 'minion')
+        self._write('key1')
+
+    def tearDown(self):
+        shutil.rmtree(self.pki_dir, ignore_errors=True)
+
+    def _write(self, key, age=60):
+        with salt.utils.files.fopen(self.path, 'w') as fp_:
+            fp_.write(key)
+        stamp = time.time() - age
+        os.utime(self.path, (stamp, stamp))
+
+    def test_keys_are_read_again_when_the_file_changes(self):
+        cache = MinionKeyCache(10)
+        with patch('salt.crypt.get_rsa_pub_key', MagicMock(side_effect=lambda path: 'parsed')) as parse:
+            self.assertEqual(cache.read(self.path), 'key1')
+            self.assertEqual(cache.get(self.path), 'parsed')
+            self.assertEqual(cache.get(self.path), 'parsed')
+            self.assertEqual(parse.call_count, 1)
+            with patch('salt.utils.files.fopen', MagicMock(side_effect=salt.utils.files.fopen)) as fopen:
+                self.assertEqual(cache.read(self.path), 'key1')
+                fopen.assert_not_called()
+
+            self._write('key22')
+            self.assertEqual(cache.read(self.path), 'key22')
+            cache.get(self.path)
+            self.assertEqual(parse.call_count, 2)
+
+    def test_recently_modified_keys_are_not_cached(self):
+        cache = MinionKeyCache(10)
+        self._write('key1', age=0)
+        self.assertEqual(cache.read(self.path), 'key1')
+        self.assertEqual(len(cache.keys), 0)
+        # Nor any key when the cache is disabled
+        cache = MinionKeyCache(0)
+        self._write('key1')
+        self.assertEqual(cache.read(self.path), 'key1')
+        self.assertEqual(len(cache.keys), 0)
+
+
+class AuthAdmissionTestCase(TestCase):
+    '''
+    TestCase for the admission of minion sign ins
+    '''
+    def test_admit_at_rate(self):
+        admission = AuthAdmission(4)
+        # A second worth of sign ins is admitted at once
+        admitted = [admission.admit(100.0) for _ in range(5)]
+        self.assertEqual(admitted, [None] * 5)
+        # The others come back one per interval
+        retry_after = [admission.admit(100.0) for _ in range(3)]
+        self.assertEqual(retry_after, [0.25, 0.5, 0.75])
+        self.assertIsNone(admission.admit(100.25))
+        # Behind the minions already told to come back
+        self.assertEqual(admission.admit(100.25), 0.75)
+        # The sign ins are admitted again once the rate allows it
+        self.assertIsNone(admission.admit(110.0))
+
+    def test_retry_after_is_capped(self):
+        admission = AuthAdmission(4, max_wait=2)
+        for _ in range(5):
+            admission.admit(100.0)
+        # Minions coming back before their time do not push the others out
+        retry_after = [admission.admit(100.0) for _ in range(20)]
+        self.assertEqual(max(retry_after), 2)
+        # The times handed out drain as the time passes
+        self.assertEqual([admission.admit(101.0) for _ in range(5)], [None, None, None, None, 1.25])
+        self.assertIsNone(admission.admit(103.0))
+
+    def test_refused_without_wait(self):
+        admission = AuthAdmission(4, max_wait=0)
+        admitted = [admission.admit(100.0) for _ in range(8)]
+        # Still refused, just told to come back right away
+        self.assertEqual(admitted, [None] * 5 + [0] * 3)
@@ -10,6 +10,7 @@ import threading
 import tornado.gen
 import tornado.ioloop
 import tornado.concurrent
+from tornado.iostream import StreamClosedError
 from tornado.testing import AsyncTestCase, gen_test
 
 import salt.config
@@ -18,9 +19,10 @@ import salt.utils.platform
 import salt.utils.process
 import salt.transport.server
 import salt.transport.client
+import salt.transport.frame
 import salt.exceptions
 from salt.ext.six.moves import range
-from salt.transport.tcp import SaltMessageClientPool
+from salt.transport.tcp import SaltMessageClientPool, PubServer, Subscriber
 
 # Import Salt Testing libs
 from tests.support.unit import TestCase, skipIf
@@ -310,3 +312,43 @@ class SaltMessageClientPoolTest(AsyncTestCase):
 
         with self.assertRaises(tornado.ioloop.TimeoutError):
             test_connect(self)
+
+
+class PubServerTest(TestCase):
+    '''
+    Tests around writing publications to the connected minions
+    '''
+    def setUp(self):
+        with patch('salt.master.AESFuncs', MagicMock()):
+            self.pub_server = PubServer({}, io_loop=MagicMock(), shard_publisher=MagicMock())
+        self.streams = {}
+        for id_ in ('minion1', 'minion2', 'gone'):
+            stream = MagicMock()
+            if id_ == 'gone':
+                stream.write.side_effect = StreamClosedError()
+            else:
+                future = tornado.concurrent.Future()
+                future.set_result(None)
+                stream.write.return_value = future
+            client = Subscriber(stream, ('127.0.0.1', 4505))
+            client.id_ = id_
+            self.pub_server.clients.add(client)
+            self.pub_server.present[id_] = {client}
+            self.streams[id_] = stream
+
+    def test_publish_payload(self):
+        self.pub_server.publish_payload({'payload': b'load'}, None)
+        frame = salt.transport.frame.frame_msg(b'load')
+        self.pub_server.shard_publisher.publish.assert_called_once_with(
+            {'frame': frame, 'topic_lst': None})
+        for stream in six.itervalues(self.streams):
+            stream.write.assert_called_once_with(frame)
+        self.assertEqual(sorted(self.pub_server.present), ['minion1', 'minion2'])
+        self.assertEqual(len(self.pub_server.clients), 2)
+        self.pub_server.io_loop.add_future.assert_not_called()
+
+    def test_publish_frame(self):
+        self.pub_server.publish_frame({'frame': b'frame', 'topic_lst': ['minion2', 'minion3']})
+        self.streams['minion1'].write.assert_not_called()
+        self.streams['minion2'].write.assert_called_once_with(b'frame')
+        self.pub_server.shard_publisher.publish.assert_not_called()
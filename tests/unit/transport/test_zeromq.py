@@ -195,6 +195,81 @@ class AESReqTestCases(BaseZMQReqCase, ReqChannelMixin):
                 ret = self.channel.send(msg, timeout=5)
 
 
+class PooledReqTestCases(TestCase, AdaptedConfigurationTestCaseMixin):
+    '''
+    Test the routing of requests to worker pools
+    '''
+    @classmethod
+    def setUpClass(cls):
+        ret_port = get_unused_localhost_port()
+        cls.master_config = cls.get_temp_config(
+            'master',
+            **{'transport': 'zeromq',
+               'ret_port': ret_port,
+               'publish_port': get_unused_localhost_port(),
+               'tcp_master_workers': get_unused_localhost_port(),
+               'worker_pools': {'pillar': 1}}
+        )
+        cls.minion_config = cls.get_temp_config(
+            'minion',
+            **{'transport': 'zeromq',
+               'master_ip': '127.0.0.1',
+               'master_port': ret_port,
+               'master_uri': 'tcp://127.0.0.1:{0}'.format(ret_port)}
+        )
+
+        cls.process_manager = salt.utils.process.ProcessManager(name='ReqServer_ProcessManager')
+        cls.server_channel = salt.transport.server.ReqServerChannel.factory(cls.master_config)
+        cls.server_channel.pre_fork(cls.process_manager)
+        cls.pool_channel = salt.transport.server.ReqServerChannel.factory(cls.master_config)
+
+        cls.io_loop = zmq.eventloop.ioloop.ZMQIOLoop()
+        cls.io_loop.make_current()
+        cls.server_channel.post_fork(cls._handle_default, io_loop=cls.io_loop)
+        cls.pool_channel.post_fork(cls._handle_pool, io_loop=cls.io_loop, pool='pillar')
+
+        cls.server_thread = threading.Thread(target=cls.io_loop.start)
+        cls.server_thread.daemon = True
+        cls.server_thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process_manager.stop_restarting()
+        cls.process_manager.kill_children()
+        cls.io_loop.add_callback(cls.io_loop.stop)
+        cls.server_thread.join()
+        time.sleep(2)  # Give the procs a chance to fully close before we stop the io_loop
+        cls.server_channel.close()
+        cls.pool_channel.close()
+        del cls.server_channel
+        del cls.pool_channel
+        del cls.io_loop
+        del cls.process_manager
+        del cls.server_thread
+        del cls.master_config
+        del cls.minion_config
+
+    @classmethod
+    @tornado.gen.coroutine
+    def _handle_default(cls, payload):
+        raise tornado.gen.Return(('default', {'fun': 'send_clear'}))
+
+    @classmethod
+    @tornado.gen.coroutine
+    def _handle_pool(cls, payload):
+        raise tornado.gen.Return(('pillar', {'fun': 'send_clear'}))
+
+    def test_route_by_command(self):
+        '''
+        Requests are served by the pool of their command
+        '''
+        channel = salt.transport.client.ReqChannel.factory(self.minion_config, crypt='clear')
+        self.assertEqual(channel.send({'cmd': '_pillar'}, timeout=10), 'pillar')
+        self.assertEqual(channel.send({'cmd': '_return'}, timeout=10), 'default')
+        self.assertEqual(channel.send({'foo': 'bar'}, timeout=10), 'default')
+        del channel
+
+
 class BaseZMQPubCase(AsyncTestCase, AdaptedConfigurationTestCaseMixin):
     '''
     Test the req server/client pair
@@ -454,3 +454,21 @@ class CacheDiskTestCase(TestCase):
             self.assertNotIn('foo', cd2)
         finally:
             shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+class CacheLRUTestCase(TestCase):
+
+    def test_eviction(self):
+        '''
+        Make sure the least recently used entries are evicted first
+        '''
+        lru = cache.CacheLRU(2)
+        lru['foo'] = 1
+        lru['bar'] = 2
+        self.assertEqual(lru.get('foo'), 1)
+        lru['baz'] = 3
+        self.assertEqual(len(lru), 2)
+        self.assertIn('foo', lru)
+        self.assertNotIn('bar', lru)
+        self.assertIsNone(lru.get('bar'))
+        self.assertRaises(KeyError, lru.__getitem__, 'bar')
@@ -11,6 +11,8 @@ from tests.support.unit import skipIf, TestCase
 from tests.support.mock import (
     NO_MOCK,
     NO_MOCK_REASON,
+    MagicMock,
+    call,
     patch
 )
 
@@ -59,3 +61,75 @@ class JobTest(TestCase):
                 with self.assertLogs('salt.utils.job', level='CRITICAL') as logged:
                     job.store_job(MockMasterMinion.opts, {'jid': '20190618090114890985', 'return': {'success': True}, 'id': 'a'})
                     self.assertIn("The specified 'foo' returner threw a stack trace", logged.output[0])
+
+    def test_store_job_queued(self):
+        '''
+        test that store_job leaves queued returns to the job cache writer
+        '''
+        load = {'jid': '20190618090114890985', 'return': {'success': True}, 'id': 'a'}
+        returners = {'foo.prep_jid': MagicMock(), 'foo.returner': MagicMock()}
+        job_queue = MagicMock()
+        with patch.object(salt.minion, 'MasterMinion', MockMasterMinion), \
+                patch.dict(MockMasterMinion.returners, returners), \
+                patch('salt.utils.verify.valid_id', return_value=True):
+            job_queue.put.return_value = True
+            job.store_job(MockMasterMinion.opts, dict(load), job_queue=job_queue)
+            self.assertEqual(job_queue.put.call_args[0][0][0], load)
+            self.assertFalse(job_queue.put.call_args[0][0][2])
+            returners['foo.prep_jid'].assert_not_called()
+            returners['foo.returner'].assert_not_called()
+
+            # The jid of a standalone job is stored before it is queued
+            job.store_job(MockMasterMinion.opts, dict(load, jid='req'), job_queue=job_queue)
+            self.assertTrue(job_queue.put.call_args[0][0][2])
+            returners['foo.prep_jid'].assert_called_once_with(nocache=False)
+            returners['foo.prep_jid'].reset_mock()
+
+            # A full queue falls back to a synchronous write
+            job_queue.put.return_value = False
+            job.store_job(MockMasterMinion.opts, dict(load), job_queue=job_queue)
+            returners['foo.prep_jid'].assert_called_once_with(False, passed_jid=load['jid'])
+            returners['foo.returner'].assert_called_once_with(load)
+
+            # Returns kept out of the master job cache still store their jid
+            returners['foo.prep_jid'].reset_mock()
+            job_queue.put.reset_mock()
+            opts = dict(MockMasterMinion.opts, ext_job_cache='bar')
+            job.store_job(opts, dict(load), job_queue=job_queue)
+            returners['foo.prep_jid'].assert_called_once_with(False, passed_jid=load['jid'])
+            job_queue.put.assert_not_called()
+
+    def test_store_jobs(self):
+        '''
+        test that store_jobs stores each jid once and uses returner_batch
+        '''
+        opts = dict(MockMasterMinion.opts, job_cache_store_endtime=True)
+        returns = [({'jid': '20190618090114890985', 'return': {'success': True}, 'id': 'a'}, 1, False),
+                   ({'jid': '20190618090114890985', 'return': {'success': True}, 'id': 'b'}, 3, False),
+                   ({'jid': '20190618090114890986', 'return': {'success': True}, 'id': 'a'}, 2, False),
+                   # A standalone job, store_job stored its new jid
+                   ({'jid': '20190618090114890987', 'return': {'success': True}, 'id': 'a'}, 2, True)]
+        returners = {'foo.prep_jid': MagicMock(),
+                     'foo.returner': MagicMock(),
+                     'foo.returner_batch': MagicMock(),
+                     'foo.update_endtime': MagicMock()}
+        with patch.dict(MockMasterMinion.returners, returners):
+            job.store_jobs(opts, returns, mminion=MockMasterMinion())
+        self.assertEqual(returners['foo.prep_jid'].call_count, 2)
+        returners['foo.returner'].assert_not_called()
+        returners['foo.returner_batch'].assert_called_once_with([load for load, _, _ in returns])
+        self.assertEqual(sorted(returners['foo.update_endtime'].call_args_list),
+                         [call('20190618090114890985', 3), call('20190618090114890986', 2),
+                          call('20190618090114890987', 2)])
+
+    def test_job_cache_queue(self):
+        '''
+        test the bounded job cache queue
+        '''
+        job_queue = job.JobCacheQueue(2)
+        self.assertTrue(job_queue.put(1))
+        self.assertTrue(job_queue.put(2))
+        self.assertFalse(job_queue.put(3))
+        self.assertEqual(job_queue.overflows.value, 1)
+        self.assertEqual(job_queue.get_batch(10, 0.1, timeout=1), [1, 2])
+        self.assertEqual(job_queue.get_batch(10, 0.1, timeout=0.1), [])
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+'''
+unit tests for salt.utils.metrics
+'''
+
+# Import Python Libs
+from __future__ import absolute_import, print_function, unicode_literals
+import shutil
+import tempfile
+
+# Import Salt Testing Libs
+from tests.support.unit import TestCase
+
+# Import Salt Libs
+import salt.utils.metrics
+
+
+class HistogramTestCase(TestCase):
+    '''
+    Validate salt.utils.metrics.Histogram
+    '''
+    def test_quantiles(self):
+        hist = salt.utils.metrics.Histogram()
+        for _ in range(98):
+            hist.observe(0.0015)
+        hist.observe(0.3)
+        hist.observe(0.5)
+        summary = hist.summary()
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['max'], 0.5)
+        self.assertTrue(0.001 < summary['p50'] <= 0.002, summary)
+        self.assertTrue(0.256 < summary['p99'] <= 0.5, summary)
+
+    def test_overflow_bucket(self):
+        hist = salt.utils.metrics.Histogram()
+        hist.observe(1000)
+        self.assertEqual(hist.counts[-1], 1)
+        self.assertTrue(salt.utils.metrics.BUCKETS[-1] < hist.quantile(0.5) < 1000)
+        self.assertEqual(hist.quantile(1), 1000)
+
+    def test_worker_stats(self):
+        cachedir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cachedir, ignore_errors=True)
+        opts = {'cachedir': cachedir}
+        for name, duration in (('MWorker-0', 0.01), ('MWorker-1', 0.1)):
+            hist = salt.utils.metrics.Histogram()
+            hist.observe(duration)
+            salt.utils.metrics.write_worker_stats(opts, name, {'_return': hist}, duration * 6, 60)
+        workers = salt.utils.metrics.read_worker_stats(opts, max_age=120)
+        histograms, busy = salt.utils.metrics.merge_worker_stats(workers)
+        self.assertEqual(sorted(busy), ['MWorker-0', 'MWorker-1'])
+        self.assertAlmostEqual(busy['MWorker-1'], 0.01)
+        self.assertEqual(histograms['_return'].count, 2)
+        self.assertEqual(histograms['_return'].maximum, 0.1)
+        self.assertEqual(salt.utils.metrics.read_worker_stats(opts, max_age=-1), {})
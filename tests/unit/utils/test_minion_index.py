@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.test_minion_index
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the in-memory minion data index
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function, unicode_literals
+import shutil
+import tempfile
+import threading
+
+# Import Salt Testing libs
+from tests.support.unit import TestCase
+from tests.support.mock import patch, MagicMock
+
+# Import salt libs
+import salt.utils.data
+import salt.utils.minion_index
+import salt.utils.minions
+
+MINION_DATA = {
+    'web1': {'grains': {'os': 'Ubuntu', 'roles': ['web', 'db'],
+                        'ip_interfaces': {'eth0': ['10.0.0.1']}},
+             'pillar': {'env': 'prod', 'app': {'port': 8080}}},
+    'web2': {'grains': {'os': 'CentOS', 'roles': ['web']},
+             'pillar': {'env': 'dev', 'app': {'port': 80}}},
+    'db1': {'grains': {'os': 'Ubuntu', 'roles': ['db'], 'ver': 'a:b'},
+            'pillar': {'env': 'prod'}},
+}
+
+
+class MinionDataIndexTestCase(TestCase):
+    '''
+    TestCase for salt.utils.minion_index.MinionDataIndex
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.cachedir,
+                     'minion_data_cache': True,
+                     'minion_data_index': True}
+        cache = MagicMock()
+        cache.list.return_value = list(MINION_DATA)
+        cache.fetch.side_effect = lambda bank, key: MINION_DATA[bank.split('/')[1]]
+        self.index = salt.utils.minion_index.MinionDataIndex(self.opts)
+        self.index.rebuild(cache)
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir, ignore_errors=True)
+
+    def _scan(self, search_type, expr, **kwargs):
+        return set(id_ for id_, data in MINION_DATA.items()
+                   if salt.utils.data.subdict_match(data.get(search_type), expr, **kwargs))
+
+    def test_match_agrees_with_subdict_match(self):
+        for search_type, expr, kwargs in (
+                ('grains', 'os:ubuntu', {}),
+                ('grains', 'os:Ubu*', {}),
+                ('grains', 'roles:db', {}),
+                ('grains', 'roles:1', {}),
+                ('grains', 'ver:a:b', {}),
+                ('grains', 'ip_interfaces:eth0:10.0.0.1', {}),
+                ('grains', '*:web', {}),
+                ('grains', 'os:(Cent|Ubu).*', {'regex_match': True}),
+                ('pillar', 'app:port:80', {}),
+                ('pillar', 'app:port', {}),
+                ('pillar', 'env:prod', {'exact_match': True}),
+                ('pillar', 'missing:key', {})):
+            self.assertEqual(self.index.match(search_type, expr, **kwargs),
+                             self._scan(search_type, expr, **kwargs),
+                             (search_type, expr))
+
+    def test_update_is_seen_by_other_processes(self):
+        other = salt.utils.minion_index.MinionDataIndex(self.opts)
+        self.assertTrue(other.refresh())
+        self.index.update('web2', {'grains': {'os': 'Ubuntu'}})
+        self.index.remove('db1')
+        self.assertTrue(other.refresh())
+        self.assertEqual(other.match('grains', 'os:Ubuntu'), set(['web1', 'web2']))
+        self.assertEqual(other.minions(), set(['web1', 'web2']))
+
+        self.index.compact()
+        self.assertEqual(self.index.journal_frames, 1)
+        self.index.update('db2', {'grains': {'os': 'Ubuntu'}})
+        self.assertTrue(other.refresh())
+        self.assertEqual(other.match('grains', 'os:Ubuntu'), set(['web1', 'web2', 'db2']))
+
+    def test_update_during_rebuild_is_kept(self):
+        other = salt.utils.minion_index.MinionDataIndex(self.opts)
+        updater = threading.Thread(target=other.update,
+                                   args=('db2', {'grains': {'os': 'Ubuntu'}}))
+
+        def list_minions(bank):
+            # The update blocks on the journal lock until the rebuild is done
+            updater.start()
+            updater.join(0.5)
+            return list(MINION_DATA)
+        cache = MagicMock()
+        cache.list.side_effect = list_minions
+        cache.fetch.side_effect = lambda bank, key: MINION_DATA[bank.split('/')[1]]
+        self.index.rebuild(cache)
+        updater.join()
+        self.assertTrue(self.index.refresh())
+        self.assertEqual(self.index.match('grains', 'os:Ubuntu'), set(['web1', 'db1', 'db2']))
+
+    def test_check_minions_uses_index(self):
+        ckminions = salt.utils.minions.CkMinions(self.opts)
+        ckminions.index = self.index
+        with patch.object(ckminions, '_pki_minions', MagicMock(return_value=['web1', 'web2', 'db1', 'new'])), \
+                patch.object(ckminions, '_pki_minion_set',
+                             MagicMock(return_value=frozenset(['web1', 'web2', 'db1', 'new']))), \
+                patch.object(ckminions.cache, 'fetch') as fetch:
+            ret = ckminions._check_grain_minions('os:Ubuntu', ':', True)
+            self.assertEqual(sorted(ret['minions']), ['db1', 'new', 'web1'])
+            ret = ckminions._check_grain_minions('os:Ubuntu', ':', False)
+            self.assertEqual(sorted(ret['minions']), ['db1', 'web1'])
+            fetch.assert_not_called()
@@ -2,9 +2,14 @@
 
 # Import python libs
 from __future__ import absolute_import, unicode_literals
+import os
+import shutil
 import sys
+import tempfile
+import time
 
 # Import Salt Libs
+import salt.utils.files
 import salt.utils.minions
 
 # Import Salt Testing Libs
@@ -272,6 +277,7 @@ class CkMinionsTestCase(TestCase):
         self.assertFalse(ret)
 
     @patch('salt.utils.minions.CkMinions._pki_minions', MagicMock(return_value=['alpha', 'beta', 'gamma']))
+    @patch('salt.utils.minions.CkMinions._pki_minion_set', MagicMock(return_value=frozenset(['alpha', 'beta', 'gamma'])))
     def test_auth_check(self):
         # Test function-only rule
         auth_list = ['test.ping']
@@ -370,6 +376,151 @@ class CkMinionsTestCase(TestCase):
 
 
 @skipIf(sys.version_info < (2, 7), 'Python 2.7 needed for dictionary equality assertions')
+class CompoundMinionsTestCase(TestCase):
+    '''
+    TestCase for the compiled compound target evaluation
+    '''
+    def setUp(self):
+        salt.utils.minions._COMPOUND_CACHE = None
+        self.ckminions = salt.utils.minions.CkMinions({'minion_data_cache': True,
+                                                       'nodegroups': NODEGROUPS})
+        grains = {'foo:bar': ['host1', 'web1'], 'os:Ubuntu': ['host2', 'host3']}
+        self.ckminions._check_grain_minions = MagicMock(
+            side_effect=lambda expr, delim, greedy: {'minions': grains.get(expr, []),
+                                                     'missing': []})
+
+    def _check(self, expr):
+        return sorted(self.ckminions._check_compound_minions(expr, ':', True)['minions'])
+
+    @patch('salt.utils.minions.CkMinions._pki_minions',
+           MagicMock(return_value=['host1', 'host2', 'host3', 'web1', 'web2']))
+    @patch('salt.utils.minions.CkMinions._pki_minion_set',
+           MagicMock(return_value=frozenset(['host1', 'host2', 'host3', 'web1', 'web2'])))
+    def test_compound_evaluation(self):
+        self.assertEqual(self._check('G@os:Ubuntu or web2'), ['host2', 'host3', 'web2'])
+        self.assertEqual(self._check('not G@os:Ubuntu'), ['host1', 'web1', 'web2'])
+        self.assertEqual(self._check('web* not G@foo:bar'), ['web2'])
+        self.assertEqual(self._check('( host* or web1 ) and not host1'), ['host2', 'host3', 'web1'])
+        # Nodegroups without nested nodegroups are not enclosed in parentheses
+        self.assertEqual(self._check('N@group2 and not L@web1'), ['host1', 'web1'])
+        self.assertEqual(self._check('N@group3 and G@os:Ubuntu'), ['host2', 'host3'])
+        self.assertEqual(self._check('G@os:Ubuntu or host1 and web*'), ['host2', 'host3'])
+        # Parentheses left open are closed at the end
+        self.assertEqual(self._check('( host1 or host2'), ['host1', 'host2'])
+
+    @patch('salt.utils.minions.CkMinions._pki_minions', MagicMock(return_value=['host1']))
+    @patch('salt.utils.minions.CkMinions._pki_minion_set', MagicMock(return_value=frozenset(['host1'])))
+    def test_invalid_compound(self):
+        for expr in ('and host1', 'host1 host2', '( or host1 )', 'host1 )',
+                     'not not host1', 'host1 and', ''):
+            self.assertEqual(self._check(expr), [], expr)
+
+    def test_compiled_plan_is_cached(self):
+        with patch('salt.utils.minions.compile_compound',
+                   MagicMock(wraps=salt.utils.minions.compile_compound)) as compile_mock:
+            plan = self.ckminions._compile_compound('G@os:Ubuntu and web*')
+            self.assertEqual(plan, ('and',
+                                    ('term', 'G', 'os:Ubuntu', None, False),
+                                    ('term', None, 'web*', None, False)))
+            other = salt.utils.minions.CkMinions(self.ckminions.opts)
+            self.assertIs(other._compile_compound('G@os:Ubuntu and web*'), plan)
+            self.assertEqual(compile_mock.call_count, 1)
+
+
+@patch('salt.utils.minions.CkMinions._pki_minions',
+       MagicMock(return_value=['host1', 'host2', 'host3', 'web1']))
+@patch('salt.utils.minions.CkMinions._pki_minion_set',
+       MagicMock(return_value=frozenset(['host1', 'host2', 'host3', 'web1'])))
+class PublishMinionsTestCase(TestCase):
+    '''
+    TestCase for resolving the minions a publication is sent to
+    '''
+    def setUp(self):
+        self.ckminions = salt.utils.minions.CkMinions({'minion_data_cache': True,
+                                                       'publish_filter_coverage': 0.75})
+        self.ckminions.cache = MagicMock()
+        self.ckminions.cache.list.return_value = ['host1', 'host2', 'web1', 'gone']
+        self.ckminions._check_grain_minions = MagicMock(
+            return_value={'minions': ['host2', 'host3'], 'missing': []})
+
+    def test_resolve_targets(self):
+        self.assertEqual(self.ckminions.check_publish_minions('host*'),
+                         ['host1', 'host2', 'host3'])
+        self.assertEqual(self.ckminions.check_publish_minions('os:Ubuntu', 'grain'),
+                         ['host2', 'host3'])
+        # Nothing matched, the master would not have published the target
+        self.assertIsNone(self.ckminions.check_publish_minions('db*'))
+
+    def test_broadcast_without_cache_coverage(self):
+        self.ckminions.cache.list.return_value = ['host1', 'web1', 'gone']
+        self.assertIsNone(self.ckminions.check_publish_minions('os:Ubuntu', 'grain'))
+        self.assertIsNone(self.ckminions.check_publish_minions('G@os:Ubuntu', 'compound'))
+        self.assertEqual(self.ckminions.check_publish_minions('web*'), ['web1'])
+        self.ckminions.opts['minion_data_cache'] = False
+        self.ckminions.cache.list.return_value = ['host1', 'host2', 'host3', 'web1']
+        self.assertIsNone(self.ckminions.check_publish_minions('os:Ubuntu', 'grain'))
+        self.ckminions._check_grain_minions.assert_not_called()
+
+
+class AcceptedMinionsTestCase(TestCase):
+    '''
+    TestCase for salt.utils.minions.AcceptedMinions
+    '''
+    def setUp(self):
+        self.pki_dir = tempfile.mkdtemp()
+        self.acc = os.path.join(self.pki_dir, 'minions')
+        os.makedirs(self.acc)
+        for minion_id in ('beta', 'Alpha', '.key_cache'):
+            with salt.utils.files.fopen(os.path.join(self.acc, minion_id), 'w') as fp_:
+                fp_.write('key')
+        os.makedirs(os.path.join(self.acc, 'subdir'))
+        self._age()
+        self.registry = salt.utils.minions.AcceptedMinions(self.acc)
+
+    def tearDown(self):
+        shutil.rmtree(self.pki_dir, ignore_errors=True)
+
+    def _age(self):
+        stamp = time.time() - 60
+        os.utime(self.acc, (stamp, stamp))
+
+    def test_listing_is_cached_until_the_directory_changes(self):
+        self.assertEqual(self.registry.minions(), ['Alpha', 'beta'])
+        with patch('os.listdir', MagicMock(side_effect=os.listdir)) as listdir:
+            self.assertIn('beta', self.registry)
+            self.assertNotIn('gamma', self.registry)
+            self.assertEqual(self.registry.minions(), ['Alpha', 'beta'])
+            listdir.assert_not_called()
+
+            with salt.utils.files.fopen(os.path.join(self.acc, 'gamma'), 'w') as fp_:
+                fp_.write('key')
+            self.assertIn('gamma', self.registry)
+            self.assertEqual(listdir.call_count, 1)
+            # A recently modified directory is listed again
+            self.assertIn('gamma', self.registry)
+            self.assertEqual(listdir.call_count, 2)
+
+            self._age()
+            self.registry.invalidate()
+            self.assertIn('gamma', self.registry)
+            self.assertIn('gamma', self.registry)
+            self.assertEqual(listdir.call_count, 3)
+
+    def test_ckminions_share_the_member_set(self):
+        ckminions = salt.utils.minions.CkMinions({'pki_dir': self.pki_dir,
+                                                  'key_cache': '',
+                                                  'transport': 'zeromq'})
+        with patch.dict(salt.utils.minions._ACCEPTED_MINIONS, {self.acc: self.registry}):
+            members = ckminions._pki_minion_set()
+            self.assertEqual(members, frozenset(['Alpha', 'beta']))
+            self.assertIs(ckminions._pki_minion_set(), members)
+
+    def test_missing_directory(self):
+        registry = salt.utils.minions.AcceptedMinions(os.path.join(self.pki_dir, 'nope'))
+        self.assertEqual(registry.minions(), [])
+        self.assertNotIn('beta', registry)
+
+
 class TargetParseTestCase(TestCase):
 
     def test_parse_grains_target(self):